@@ -0,0 +1,68 @@
+# Compara el AST de objetos de Parser con el ASTPlano de ParserPlano sobre
+# un programa de n instrucciones (por defecto un millón): memoria retenida
+# por el AST y tiempos de análisis sintáctico, semántico y traducción.
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from compilador.lexico import TokenBuffer
+from compilador.plano import ParserPlano
+from compilador.semantico import SemanticAnalyzer
+from compilador.sintactico import Parser
+from compilador.traductor import ASTToCTranslator
+
+
+def generar_programa(n):
+    # Unas n instrucciones, en grupos de 8 con un IF/ELSE y un WHILE
+    lineas = ['BEGIN', 'VAR x = 0;', 'VAR y = 1;']
+    for i in range(n // 8):
+        lineas.append(f'x = x * 2 + y - {i};')
+        lineas.append(f'IF x > {i} THEN')
+        lineas.append('    y = y + 1;')
+        lineas.append('ELSE')
+        lineas.append(f'    PRINT x * {i};')
+        lineas.append('END')
+        lineas.append('WHILE y < 3 DO')
+        lineas.append('    CALL f(x, "s", 2.5);')
+        lineas.append('END')
+    lineas.append('END')
+    return '\n'.join(lineas) + '\n'
+
+
+def tiempo(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+def medir(clase, tokens):
+    # La memoria se mide en una pasada aparte: tracemalloc distorsiona los
+    # tiempos
+    tracemalloc.start()
+    ast = clase(tokens).parse()
+    retenida = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del ast
+    ast, tiempo_parse = tiempo(lambda: clase(tokens).parse())
+    analizador = SemanticAnalyzer()
+    _, tiempo_semantico = tiempo(lambda: analizador.analyze(ast))
+    _, tiempo_traduccion = tiempo(lambda: ASTToCTranslator(ast, analizador.tipos).translate_to(io.StringIO()))
+    return retenida, tiempo_parse, tiempo_semantico, tiempo_traduccion
+
+
+def main(n=1000000):
+    fuente = generar_programa(n)
+    tokens = TokenBuffer(fuente)
+    print(f'Fuente: {len(fuente)} bytes, {len(tokens)} tokens')
+    for nombre, clase in (('objetos', Parser), ('plano', ParserPlano)):
+        retenida, tiempo_parse, tiempo_semantico, tiempo_traduccion = medir(clase, tokens)
+        print(f'{nombre:8} AST {retenida / 1e6:8.1f} MB  parse {tiempo_parse:6.2f} s  '
+              f'semántico {tiempo_semantico:6.2f} s  traducción {tiempo_traduccion:6.2f} s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,57 @@
+# Compara el escáner generado (AFD de compilador.automata con palabras clave
+# por hash perfecto) con la expresión regular token_re de la que sale: tokens
+# por segundo de cada uno sobre el mismo programa, y comprueba que ambos
+# producen los mismos tokens.
+import os
+import sys
+from array import array
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from comparar_tokens import generar_programa, mejor_tiempo
+
+from compilador.lexico import CODIGOS, CODIGOS_CLAVE, TokenBuffer, escanear, token_re
+
+
+def con_regex(contenido):
+    # El bucle de TokenBuffer antes del escáner generado: finditer sobre la
+    # alternancia y las palabras clave buscadas en un diccionario
+    tipos, inicios, fines = array('B'), array('I'), array('I')
+    descartados = {CODIGOS['SKIP'], CODIGOS['NEWLINE'], CODIGOS['COMMENT']}
+    id_ = CODIGOS['ID']
+    for mo in token_re.finditer(contenido):
+        tipo = mo.lastindex
+        if tipo in descartados:
+            continue
+        start, end = mo.span()
+        if tipo == id_:
+            tipo = CODIGOS_CLAVE.get(contenido[start:end], id_)
+        tipos.append(tipo)
+        inicios.append(start)
+        fines.append(end)
+    return tipos, inicios, fines
+
+
+def con_automata(contenido):
+    buffer = TokenBuffer(contenido)
+    return buffer.tipos, buffer.inicios, buffer.fines
+
+
+def main(n=50000):
+    contenido = generar_programa(n)
+    # Unas líneas con caracteres no válidos, para medir también los tokens
+    # ERROR
+    contenido += '@ # $ ? ¿ ~\n' * (n // 100)
+    print(f'Fuente: {len(contenido)} bytes')
+    resultados = {}
+    for nombre, escaner in (('regex', con_regex), ('automata', con_automata)):
+        tokens, tiempo = mejor_tiempo(lambda: escaner(contenido), 10)
+        resultados[nombre] = tokens
+        print(f'{nombre:10} {len(tokens[0])} tokens  {len(tokens[0]) / tiempo:12.0f} tokens/s')
+    todos, tiempo = mejor_tiempo(lambda: sum(1 for _ in escanear(contenido)), 10)
+    print(f'{"escanear":10} {todos} tokens  {todos / tiempo:12.0f} tokens/s (con espacios y saltos, generador)')
+    print('tokens iguales' if resultados['regex'] == resultados['automata'] else 'tokens DISTINTOS')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
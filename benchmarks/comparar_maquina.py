@@ -0,0 +1,85 @@
+# Compara el tiempo total de ejecutar un programa en la máquina virtual con
+# el de traducirlo a C, compilarlo con el compilador de C del sistema (cc, o
+# el de --cc) y ejecutar el binario, para programas cortos y para bucles
+# largos. Los tiempos incluyen el análisis, así que muestran la latencia que
+# ve quien ejecuta el programa.
+import argparse
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+import compilador
+from compilador.maquina import ejecutar
+
+
+def programa_corto():
+    return 'BEGIN\nVAR x = 10;\nVAR z = 5.5;\nIF x > 5 THEN\nz = z + x;\nEND\nPRINT z;\nEND\n'
+
+
+def programa_bucles(n):
+    # Dos bucles anidados con aritmética entera: n * 100 vueltas interiores
+    return f'''BEGIN
+VAR s = 0;
+VAR k = 3;
+FOR i = 1 TO {n} DO
+    FOR j = 1 TO 100 DO
+        s = s + i * k - j / 7;
+    END
+    IF s > 1000000 THEN
+        s = s - 1000000;
+    END
+END
+PRINT s;
+END
+'''
+
+
+def tiempo(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+def en_maquina(fuente):
+    salida = io.StringIO()
+    ejecutar(fuente, salida=salida)
+    return salida.getvalue()
+
+
+def en_c(fuente, cc, directorio):
+    ruta_c = os.path.join(directorio, 'programa.c')
+    ruta_binario = os.path.join(directorio, 'programa')
+    with open(ruta_c, 'w') as archivo:
+        archivo.write(compilador.compile(fuente))
+    subprocess.run([cc, '-O2', '-w', '-o', ruta_binario, ruta_c], check=True)
+    return subprocess.run([ruta_binario], check=True, capture_output=True, text=True).stdout
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cc', default=shutil.which('cc') or shutil.which('gcc'), help='compilador de C')
+    args = parser.parse_args(argv)
+    casos = [
+        ('corto', programa_corto()),
+        ('bucles 10k', programa_bucles(100)),
+        ('bucles 1M', programa_bucles(10000)),
+    ]
+    with tempfile.TemporaryDirectory() as directorio:
+        for nombre, fuente in casos:
+            salida_maquina, tiempo_maquina = tiempo(lambda: en_maquina(fuente))
+            linea = f'{nombre:12} máquina {tiempo_maquina * 1000:9.1f} ms'
+            if args.cc:
+                salida_c, tiempo_c = tiempo(lambda: en_c(fuente, args.cc, directorio))
+                igual = 'igual' if salida_c == salida_maquina else 'DISTINTA'
+                linea += f'   C {tiempo_c * 1000:9.1f} ms   salida {igual}'
+            print(linea)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Compara la lista de tuplas de tokenize con TokenBuffer y con
+# TokenBufferMapeado (el fuente en un archivo proyectado en memoria): memoria
+# retenida, tiempo de tokenización y tiempo de Parser.parse sobre cada
+# representación. La memoria de TokenBufferMapeado no incluye el fuente, que
+# no se lee en un str.
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from compilador.lexico import TokenBuffer, TokenBufferMapeado, tokenize
+from compilador.sintactico import Parser
+
+
+def generar_programa(n):
+    lineas = ['BEGIN']
+    for i in range(n):
+        lineas.append(f'    VAR x{i} = {i} + 2.5;')
+        lineas.append(f'    IF x{i} > 3 THEN')
+        lineas.append(f'        PRINT x{i} * 2;')
+        lineas.append('    END')
+    lineas.append('END')
+    return '\n'.join(lineas) + '\n'
+
+
+def mejor_tiempo(funcion, repeticiones=3):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempo = time.perf_counter() - inicio
+        if mejor is None or tiempo < mejor:
+            mejor = tiempo
+    return resultado, mejor
+
+
+def medir(construir, contenido):
+    # La memoria se mide aparte: tracemalloc distorsiona los tiempos
+    tracemalloc.start()
+    tokens = construir(contenido)
+    retenida, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tokens, tiempo = mejor_tiempo(lambda: construir(contenido))
+    _, tiempo_parse = mejor_tiempo(lambda: Parser(tokens).parse())
+    return len(tokens), tiempo, retenida, pico, tiempo_parse
+
+
+def main(n=50000):
+    contenido = generar_programa(n)
+    print(f'Fuente: {len(contenido)} bytes')
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'programa.txt')
+        with open(ruta, 'w') as archivo:
+            archivo.write(contenido)
+        for nombre, construir in (('tokenize', tokenize), ('TokenBuffer', TokenBuffer),
+                                  ('Mapeado', lambda contenido: TokenBufferMapeado(ruta))):
+            cantidad, tiempo, retenida, pico, tiempo_parse = medir(construir, contenido)
+            print(f'{nombre:12} {cantidad} tokens  {cantidad / tiempo:12.0f} tokens/s  '
+                  f'{retenida / cantidad:7.1f} B/token (pico {pico / cantidad:.1f})  '
+                  f'parse {tiempo_parse:.3f} s  total {tiempo + tiempo_parse:.3f} s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,39 @@
+# Compara tokenize secuencial con tokenize repartido en un pool de procesos
+# (workers > 1) sobre un programa grande: tokens por segundo con cada número
+# de procesos y comprobación de que la lista de tokens es la misma.
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from comparar_tokens import generar_programa
+
+from compilador.lexico import tokenize
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=1000000, help='bloques IF del programa generado (unos 85 bytes cada uno)')
+    parser.add_argument('-j', type=int, nargs='*', help='números de procesos a probar (por defecto 2, 4, ... hasta los núcleos)')
+    args = parser.parse_args(argv)
+    nucleos = os.cpu_count() or 1
+    procesos = args.j or [j for j in (2, 4, 8, 16, 32) if j <= nucleos] or [2]
+    contenido = generar_programa(args.n)
+    print(f'Fuente: {len(contenido) / 2 ** 20:.1f} MB, {nucleos} núcleos')
+
+    inicio = time.perf_counter()
+    referencia = tokenize(contenido)
+    secuencial = time.perf_counter() - inicio
+    print(f'secuencial {len(referencia) / secuencial:12.0f} tokens/s  {secuencial:.2f} s')
+    for workers in procesos:
+        inicio = time.perf_counter()
+        tokens = tokenize(contenido, workers=workers)
+        tiempo = time.perf_counter() - inicio
+        print(f'{workers:3} procesos {len(tokens) / tiempo:12.0f} tokens/s  {tiempo:.2f} s  '
+              f'x{secuencial / tiempo:.2f}  {"iguales" if tokens == referencia else "DISTINTOS"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# Mide ASTToCTranslator sobre programas muy largos y muy anidados. Con
+# --referencia REV compara además con la versión de compilador/traductor.py
+# de esa revisión de git (p. ej. --referencia HEAD~1), y con -j N mide
+# translate_paralelo con N procesos y comprueba que el C es el mismo.
+import argparse
+import io
+import os
+import subprocess
+import sys
+import time
+import types
+
+raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, raiz)
+
+from compilador.lexico import TokenBuffer
+from compilador.sintactico import Parser
+from compilador.traductor import ASTToCTranslator
+
+
+def programa_largo(n):
+    lineas = ['BEGIN', '    VAR x = 0;']
+    for i in range(n):
+        lineas.append(f'    x = x + {i};')
+        lineas.append(f'    PRINT x * {i};')
+    lineas.append('END')
+    return '\n'.join(lineas) + '\n'
+
+
+def programa_anidado(profundidad, por_nivel):
+    lineas = ['BEGIN', 'VAR x = 0;']
+    for i in range(profundidad):
+        lineas.append(f'IF x < {i} THEN' if i % 2 else f'WHILE x < {i} DO')
+        lineas.extend(f'x = x + {j};' for j in range(por_nivel))
+    lineas.extend(['END'] * profundidad)
+    lineas.append('END')
+    return '\n'.join(lineas) + '\n'
+
+
+def cargar_referencia(revision):
+    codigo = subprocess.run(['git', 'show', f'{revision}:compilador/traductor.py'], cwd=raiz,
+                            check=True, capture_output=True, text=True).stdout
+    modulo = types.ModuleType('traductor_referencia')
+    exec(compile(codigo, f'{revision}:compilador/traductor.py', 'exec'), modulo.__dict__)
+    return modulo.ASTToCTranslator
+
+
+def medir(traductor, ast):
+    inicio = time.perf_counter()
+    salida = traductor(ast).translate()
+    return time.perf_counter() - inicio, len(salida)
+
+
+def medir_paralelo(ast, workers):
+    inicio = time.perf_counter()
+    salida = io.StringIO()
+    ASTToCTranslator(ast).translate_paralelo(salida, workers)
+    return time.perf_counter() - inicio, salida.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--referencia', help='revisión de git con la que comparar')
+    parser.add_argument('-j', type=int, nargs='*', default=[], help='procesos de translate_paralelo a medir')
+    args = parser.parse_args(argv)
+    sys.setrecursionlimit(20000)
+    traductores = [('actual', ASTToCTranslator)]
+    if args.referencia:
+        traductores.append((args.referencia, cargar_referencia(args.referencia)))
+    casos = [
+        ('largo 200k', programa_largo(100000)),
+        ('anidado 500x20', programa_anidado(500, 20)),
+        ('anidado 1000x20', programa_anidado(1000, 20)),
+    ]
+    for nombre, fuente in casos:
+        ast = Parser(TokenBuffer(fuente)).parse()
+        for etiqueta, traductor in traductores:
+            tiempo, tamano = medir(traductor, ast)
+            print(f'{nombre:16} {etiqueta:10} {tiempo:8.3f} s  {tamano / tiempo / 1e6:8.2f} MB/s')
+        if args.j:
+            secuencial = ASTToCTranslator(ast).translate()
+        for workers in args.j:
+            tiempo, salida = medir_paralelo(ast, workers)
+            print(f'{nombre:16} {f"-j {workers}":10} {tiempo:8.3f} s  {len(salida) / tiempo / 1e6:8.2f} MB/s  '
+                  f'{"igual" if salida == secuencial else "DISTINTO"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Compara un barrido de parámetros ejecutado instancia a instancia en la
+# máquina virtual con el mismo barrido en una sola ejecución vectorial
+# (compilador.vectorial, necesita NumPy). Muestra el tiempo por instancia de
+# cada modo y comprueba que la salida de las instancias medidas en la
+# máquina coincide con la de sus carriles.
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+import numpy as np
+
+from compilador.maquina import ejecutar
+from compilador.vectorial import ejecutar_vectorial
+
+
+def programa(x, tasa):
+    # Iteración de Collatz acotada y un interés compuesto: bucles cuyo
+    # número de vueltas depende de los valores iniciales
+    return f'''BEGIN
+VAR x = {x};
+VAR tasa = {tasa};
+VAR pasos = 0;
+WHILE x > 1 DO
+    IF x / 2 * 2 < x THEN
+        x = 3 * x + 1;
+    ELSE
+        x = x / 2;
+    END
+    pasos = pasos + 1;
+END
+VAR capital = 100.0;
+FOR anio = 1 TO 30 DO
+    capital = capital + capital * tasa;
+END
+PRINT pasos;
+PRINT capital;
+END
+'''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=100000, help='instancias del barrido vectorial')
+    parser.add_argument('-m', type=int, default=200, help='instancias ejecutadas en la máquina virtual')
+    args = parser.parse_args(argv)
+    equis = np.arange(1, args.n + 1, dtype=np.int32)
+    tasas = np.linspace(0.01, 0.1, args.n)
+
+    inicio = time.perf_counter()
+    resultado = ejecutar_vectorial(programa(1, 0.01), {'x': equis, 'tasa': tasas})
+    tiempo_vectorial = (time.perf_counter() - inicio) / args.n
+
+    iguales = True
+    inicio = time.perf_counter()
+    for carril in range(args.m):
+        salida = io.StringIO()
+        ejecutar(programa(int(equis[carril]), repr(float(tasas[carril]))), salida=salida)
+        iguales = iguales and salida.getvalue() == resultado.salida(carril)
+    tiempo_maquina = (time.perf_counter() - inicio) / args.m
+
+    print(f'máquina   {tiempo_maquina * 1e6:10.1f} us/instancia ({args.m} instancias)')
+    print(f'vectorial {tiempo_vectorial * 1e6:10.1f} us/instancia ({args.n} instancias)')
+    print(f'x{tiempo_maquina / tiempo_vectorial:.0f}   salida {"igual" if iguales else "DISTINTA"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+# Generador de programas sintéticos válidos (pasan el análisis semántico)
+# para los benchmarks. Se configura el número de instrucciones (contando las
+# anidadas), la profundidad máxima de anidamiento, el ancho de las
+# expresiones (operandos por expresión), las instrucciones por bloque y la
+# mezcla de instrucciones: un peso para cada producción de
+# Parser.instruccion. Los IF llevan ELSE la mitad de las veces y las
+# declaraciones sin valor inicial aparecen entre las VAR. Con la misma
+# semilla el programa es siempre el mismo.
+import random
+
+PRODUCCIONES = ('VAR', 'ASIGNACION', 'PRINT', 'CALL', 'IF', 'WHILE', 'FOR')
+BLOQUES = ('IF', 'WHILE', 'FOR')
+MEZCLA_POR_DEFECTO = {'VAR': 3, 'ASIGNACION': 4, 'PRINT': 2, 'CALL': 1, 'IF': 1, 'WHILE': 1, 'FOR': 1}
+OPERADORES = ('+', '-', '*', '/')
+RELACIONALES = ('<', '>', '<=', '>=', '!=')
+
+
+def leer_mezcla(texto):
+    # 'VAR=3,IF=1' -> pesos; las producciones que no aparecen pesan 0
+    mezcla = dict.fromkeys(PRODUCCIONES, 0)
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        nombre = nombre.strip().upper()
+        if nombre not in mezcla:
+            raise ValueError(f"Producción desconocida {nombre!r}: debe ser una de {', '.join(PRODUCCIONES)}")
+        mezcla[nombre] = float(peso)
+    return mezcla
+
+
+class GeneradorProgramas:
+    def __init__(self, profundidad=4, ancho=4, tamano_bloque=4, mezcla=None, semilla=0):
+        self.profundidad = profundidad
+        self.ancho = ancho
+        self.tamano_bloque = tamano_bloque
+        mezcla = MEZCLA_POR_DEFECTO if mezcla is None else mezcla
+        self.producciones = [nombre for nombre in PRODUCCIONES if mezcla.get(nombre, 0) > 0]
+        self.pesos = [mezcla[nombre] for nombre in self.producciones]
+        if not self.producciones:
+            raise ValueError("La mezcla no tiene ninguna producción con peso")
+        self.semilla = semilla
+
+    def generar(self, instrucciones):
+        # Texto de un programa con unas instrucciones instrucciones. Los
+        # bloques abiertos se llevan en una pila en lugar de con recursión,
+        # así que la profundidad no tiene límite
+        self.azar = random.Random(self.semilla)
+        self.contador = 0
+        # Variables visibles por ámbito: listas de nombres numéricos y de
+        # strings
+        self.numericas = [[]]
+        self.cadenas = [[]]
+        lineas = ['BEGIN']
+        # Cada bloque abierto: [instrucciones que le quedan, cierres
+        # pendientes (un ELSE y luego END, o solo END)]
+        pila = []
+        emitidas = 0
+        while emitidas < instrucciones or pila:
+            sangria = '    ' * (len(pila) + 1)
+            if pila and (pila[-1][0] == 0 or emitidas >= instrucciones):
+                bloque = pila[-1]
+                cierre = bloque[1].pop()
+                self.cerrar_ambito()
+                if cierre == 'ELSE':
+                    lineas.append(f'{sangria[4:]}ELSE')
+                    self.abrir_ambito()
+                    bloque[0] = self.azar.randint(1, self.tamano_bloque)
+                else:
+                    lineas.append(f'{sangria[4:]}END')
+                    pila.pop()
+                continue
+            if pila:
+                pila[-1][0] -= 1
+            emitidas += 1
+            produccion = self.azar.choices(self.producciones, self.pesos)[0]
+            if produccion in BLOQUES and len(pila) >= self.profundidad:
+                produccion = 'ASIGNACION' if self.numericas_visibles() else 'VAR'
+            if produccion in BLOQUES:
+                lineas.append(sangria + self.cabecera(produccion))
+                cierres = ['END', 'ELSE'] if produccion == 'IF' and self.azar.random() < 0.5 else ['END']
+                pila.append([self.azar.randint(1, self.tamano_bloque), cierres])
+            else:
+                lineas.append(sangria + self.simple(produccion))
+        lineas.append('END')
+        return '\n'.join(lineas) + '\n'
+
+    def abrir_ambito(self):
+        self.numericas.append([])
+        self.cadenas.append([])
+
+    def cerrar_ambito(self):
+        self.numericas.pop()
+        self.cadenas.pop()
+
+    def numericas_visibles(self):
+        return [nombre for ambito in self.numericas for nombre in ambito]
+
+    def cadenas_visibles(self):
+        return [nombre for ambito in self.cadenas for nombre in ambito]
+
+    def nombre(self, prefijo):
+        # Nombres únicos en todo el programa: el análisis no admite declarar
+        # una variable visible, y así ningún nombre cambia de tipo
+        self.contador += 1
+        return f'{prefijo}{self.contador}'
+
+    def operando(self, variables):
+        azar = self.azar.random()
+        if variables and azar < 0.5:
+            return self.azar.choice(variables)
+        if azar < 0.8:
+            return str(self.azar.randint(1, 99))
+        if azar < 0.95:
+            return f'{self.azar.randint(0, 99)}.{self.azar.randint(1, 9)}'
+        return f"'{self.azar.choice('abcxyz')}'"
+
+    def expresion(self, ancho=None):
+        # Expresión numérica de entre 1 y ancho operandos. Los divisores son
+        # literales distintos de cero o variables, así que el plegado de
+        # constantes nunca divide por cero
+        variables = self.numericas_visibles()
+        partes = [self.operando(variables)]
+        for _ in range(self.azar.randint(1, ancho or self.ancho) - 1):
+            operador = self.azar.choice(OPERADORES)
+            partes.append(operador)
+            partes.append(self.operando(variables))
+        return ' '.join(partes)
+
+    def condicion(self):
+        return f'{self.expresion()} {self.azar.choice(RELACIONALES)} {self.expresion()}'
+
+    def cadena(self):
+        cadenas = self.cadenas_visibles()
+        if cadenas and self.azar.random() < 0.5:
+            return self.azar.choice(cadenas)
+        return f'"texto {self.azar.randint(0, 999)}"'
+
+    def simple(self, produccion):
+        if produccion == 'VAR':
+            azar = self.azar.random()
+            if azar < 0.15:
+                nombre = self.nombre('s')
+                texto = f'VAR {nombre} = {self.cadena()};'
+                self.cadenas[-1].append(nombre)
+                return texto
+            nombre = self.nombre('v')
+            texto = f'VAR {nombre};' if azar < 0.25 else f'VAR {nombre} = {self.expresion()};'
+            self.numericas[-1].append(nombre)
+            return texto
+        if produccion == 'ASIGNACION':
+            numericas = self.numericas_visibles()
+            cadenas = self.cadenas_visibles()
+            if cadenas and (not numericas or self.azar.random() < 0.15):
+                return f'{self.azar.choice(cadenas)} = {self.cadena()};'
+            if not numericas:
+                return self.simple('VAR')
+            return f'{self.azar.choice(numericas)} = {self.expresion()};'
+        if produccion == 'PRINT':
+            if self.azar.random() < 0.2:
+                return f'PRINT {self.cadena()};'
+            return f'PRINT {self.expresion()};'
+        argumentos = [self.cadena() if self.azar.random() < 0.2 else self.expresion()
+                      for _ in range(self.azar.randint(0, 3))]
+        return f'CALL f{self.azar.randint(0, 9)}({", ".join(argumentos)});'
+
+    def cabecera(self, produccion):
+        # La cabecera se escribe con los ámbitos de fuera; el del cuerpo se
+        # abre después (en un FOR, con su variable)
+        if produccion == 'IF':
+            texto = f'IF {self.condicion()} THEN'
+        elif produccion == 'WHILE':
+            texto = f'WHILE {self.condicion()} DO'
+        else:
+            nombre = self.nombre('i')
+            texto = f'FOR {nombre} = {self.expresion(2)} TO {self.expresion(2)} DO'
+        self.abrir_ambito()
+        if produccion == 'FOR':
+            self.numericas[-1].append(nombre)
+        return texto
@@ -0,0 +1,172 @@
+# Suite de benchmarks de las etapas del compilador sobre un programa
+# sintético (benchmarks/generador.py): tokens/s de tokenize, nodos/s de
+# Parser.parse y SemanticAnalyzer.analyze, bytes/s de C de
+# ASTToCTranslator.translate y el pico de memoria de cada etapa. Con
+# --salida los resultados se guardan en JSON, y con --comparar se comparan
+# con los de una ejecución anterior: las etapas que pierden más de la
+# tolerancia en velocidad o en memoria se marcan como regresión y el código
+# de salida es 1.
+#
+#   python benchmarks/suite.py -n 200000 --salida base.json
+#   python benchmarks/suite.py -n 200000 --comparar base.json
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from generador import GeneradorProgramas, leer_mezcla
+
+from compilador.lexico import TokenBuffer, tokenize
+from compilador.nodos import Nodo
+from compilador.semantico import SemanticAnalyzer
+from compilador.sintactico import Parser
+from compilador.traductor import ASTToCTranslator
+
+TOLERANCIA = 0.10
+
+
+def contar_nodos(ast):
+    pila = [ast]
+    total = 0
+    while pila:
+        nodo = pila.pop()
+        total += 1
+        for campo in nodo.campos:
+            valor = getattr(nodo, campo)
+            if isinstance(valor, Nodo):
+                pila.append(valor)
+            elif isinstance(valor, list):
+                pila.extend(valor)
+    return total
+
+
+def etapas(fuente):
+    # (nombre, unidad, función que ejecuta la etapa, función que da la
+    # cantidad de unidades a partir de su resultado). Cada etapa parte de la
+    # salida de la anterior, que se prepara fuera de la medida
+    tokens = TokenBuffer(fuente)
+    ast = Parser(tokens).parse()
+    analizador = SemanticAnalyzer()
+    analizador.analyze(ast)
+    nodos = contar_nodos(ast)
+    return [
+        ('tokenize', 'tokens', lambda: tokenize(fuente), len),
+        ('parse', 'nodos', lambda: Parser(tokens).parse(), lambda _: nodos),
+        ('analyze', 'nodos', lambda: SemanticAnalyzer().analyze(ast), lambda _: nodos),
+        ('translate', 'bytes', lambda: ASTToCTranslator(ast, analizador.tipos).translate(),
+         lambda codigo: len(codigo.encode('utf-8'))),
+    ]
+
+
+def medir(funcion, repeticiones):
+    # Mejor tiempo de varias repeticiones y, en una ejecución aparte (porque
+    # tracemalloc la ralentiza), el pico de memoria sobre lo ya asignado
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempo = time.perf_counter() - inicio
+        if mejor is None or tiempo < mejor:
+            mejor = tiempo
+    del resultado
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    resultado = funcion()
+    pico = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return resultado, mejor, pico
+
+
+def ejecutar(args):
+    mezcla = leer_mezcla(args.mezcla) if args.mezcla else None
+    generador = GeneradorProgramas(args.profundidad, args.ancho, args.tamano_bloque, mezcla, args.semilla)
+    fuente = generador.generar(args.n)
+    resultados = {}
+    for nombre, unidad, funcion, cantidad in etapas(fuente):
+        resultado, tiempo, pico = medir(funcion, args.repeticiones)
+        unidades = cantidad(resultado)
+        resultados[nombre] = {
+            'unidad': unidad,
+            'cantidad': unidades,
+            'segundos': tiempo,
+            'por_segundo': unidades / tiempo,
+            'pico_memoria': pico,
+        }
+    return {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'maquina': platform.machine(),
+        'parametros': {
+            'n': args.n, 'profundidad': args.profundidad, 'ancho': args.ancho,
+            'tamano_bloque': args.tamano_bloque, 'mezcla': args.mezcla, 'semilla': args.semilla,
+            'bytes_fuente': len(fuente.encode('utf-8')),
+        },
+        'resultados': resultados,
+    }
+
+
+def comparar(actual, base, tolerancia):
+    # Devuelve las líneas del informe y si hay alguna regresión
+    lineas = []
+    regresion = False
+    if actual['parametros'] != base['parametros']:
+        lineas.append(f"aviso: parámetros distintos de la base ({base['parametros']})")
+    for nombre, medida in actual['resultados'].items():
+        anterior = base['resultados'].get(nombre)
+        if anterior is None:
+            lineas.append(f'{nombre:10} sin base')
+            continue
+        velocidad = medida['por_segundo'] / anterior['por_segundo'] - 1
+        memoria = medida['pico_memoria'] / anterior['pico_memoria'] - 1 if anterior['pico_memoria'] else 0.0
+        marcas = []
+        if velocidad < -tolerancia:
+            marcas.append('REGRESIÓN velocidad')
+        if memoria > tolerancia:
+            marcas.append('REGRESIÓN memoria')
+        regresion = regresion or bool(marcas)
+        lineas.append(f'{nombre:10} velocidad {velocidad:+7.1%}  memoria {memoria:+7.1%}  {"  ".join(marcas)}'.rstrip())
+    return lineas, regresion
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de las etapas del compilador.')
+    parser.add_argument('-n', type=int, default=100000, help='instrucciones del programa generado')
+    parser.add_argument('--profundidad', type=int, default=4, help='anidamiento máximo de bloques')
+    parser.add_argument('--ancho', type=int, default=4, help='operandos máximos por expresión')
+    parser.add_argument('--tamano-bloque', type=int, default=4, help='instrucciones máximas por bloque')
+    parser.add_argument('--mezcla', help="pesos de las instrucciones, p. ej. 'VAR=3,ASIGNACION=4,IF=1,PRINT=2'")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('-r', '--repeticiones', type=int, default=3, help='se toma el mejor tiempo')
+    parser.add_argument('--salida', metavar='JSON', help='archivo donde guardar los resultados')
+    parser.add_argument('--comparar', metavar='JSON', help='resultados base con los que comparar')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help=f'pérdida relativa admitida antes de marcar regresión (por defecto {TOLERANCIA})')
+    args = parser.parse_args(argv)
+
+    informe = ejecutar(args)
+    print(f"Fuente: {informe['parametros']['bytes_fuente']} bytes, {args.n} instrucciones")
+    for nombre, medida in informe['resultados'].items():
+        print(f"{nombre:10} {medida['cantidad']:10} {medida['unidad']:6} {medida['segundos']:8.3f} s  "
+              f"{medida['por_segundo']:12.0f} {medida['unidad']}/s  pico {medida['pico_memoria'] / 2 ** 20:8.1f} MB")
+    if args.salida:
+        with open(args.salida, 'w') as archivo:
+            json.dump(informe, archivo, indent=2)
+    if args.comparar:
+        with open(args.comparar) as archivo:
+            base = json.load(archivo)
+        lineas, regresion = comparar(informe, base, args.tolerancia)
+        print(f'Comparación con {args.comparar}:')
+        for linea in lineas:
+            print(linea)
+        return 1 if regresion else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# Compilador del lenguaje BEGIN ... END a C.
+# Importar el paquete no lee archivos ni imprime nada, y cada etapa se importa
+# solo cuando se usa por primera vez.
+
+ETAPAS = ('tokens', 'ast', 'c')
+# Etapas que mide un Perfil (compilador.perfil)
+ETAPAS_PERFIL = ('tokenize', 'parse', 'analyze', 'optimize', 'translate')
+
+# Nombre público -> módulo que lo define, para la importación perezosa
+_EXPORTADOS = {
+    'tokenize': 'lexico',
+    'tokenize_stream': 'lexico',
+    'TokenBuffer': 'lexico',
+    'Parser': 'sintactico',
+    'ParserPlano': 'plano',
+    'ASTPlano': 'plano',
+    'SemanticAnalyzer': 'semantico',
+    'SemanticError': 'semantico',
+    'Optimizer': 'optimizador',
+    'ASTToCTranslator': 'traductor',
+    'CompiladorBytecode': 'maquina',
+    'MaquinaVirtual': 'maquina',
+    'ErrorEjecucion': 'maquina',
+    'ejecutar': 'maquina',
+    'InterpreteVectorial': 'vectorial',
+    'ejecutar_vectorial': 'vectorial',
+    'CacheCompilacion': 'cache',
+    'CacheBinarios': 'nativo',
+    'EjecutorNativo': 'nativo',
+    'Perfil': 'perfil',
+}
+
+__all__ = ['compile', 'ETAPAS', 'ETAPAS_PERFIL', *_EXPORTADOS]
+
+
+def compile(source, emit='c', cache=None, plano=False, optimizar=True, perfil=None):
+    # Ejecuta las etapas necesarias sobre el texto fuente y devuelve la
+    # salida de la pedida: lista de tokens, AST o código C. Con una
+    # CacheCompilacion el resultado es el mismo, pero se recupera de la caché
+    # si ya se calculó antes. Con plano el AST es un
+    # ASTPlano, pensado para programas muy grandes (que no se optimiza). Con
+    # un Perfil (compilador.perfil) se miden las etapas ejecutadas
+    if emit not in ETAPAS:
+        raise ValueError(f"emit debe ser uno de {ETAPAS}, no {emit!r}")
+    if cache is not None and plano:
+        raise ValueError("la caché guarda el AST de objetos y no admite plano")
+    if cache is not None and perfil is not None:
+        raise ValueError("con caché las etapas no siempre se ejecutan y no se pueden perfilar")
+    if cache is not None:
+        return cache.compilar(source, emit, optimizar)
+    from .perfil import etapa
+    if emit == 'tokens':
+        from .lexico import tokenize
+        with etapa(perfil, 'tokenize'):
+            tokens = tokenize(source)
+        if perfil is not None:
+            perfil.contar_tokens(tokens)
+        return tokens
+    from .lexico import TokenBuffer
+    if plano:
+        from .plano import ParserPlano as Parser
+    else:
+        from .sintactico import Parser
+    with etapa(perfil, 'tokenize'):
+        tokens = TokenBuffer(source)
+    with etapa(perfil, 'parse'):
+        ast = Parser(tokens).parse()
+    if perfil is not None:
+        perfil.contar_tokens(tokens)
+        perfil.contar_ast(ast)
+    if emit == 'ast':
+        return ast
+    from .semantico import SemanticAnalyzer
+    from .traductor import ASTToCTranslator
+    analizador = SemanticAnalyzer()
+    with etapa(perfil, 'analyze'):
+        analizador.analyze(ast)
+    if perfil is not None:
+        perfil.contar_simbolos(analizador)
+    if optimizar and not plano:
+        from .optimizador import Optimizer
+        with etapa(perfil, 'optimize'):
+            ast = Optimizer(analizador.tipos).optimize(ast)
+    with etapa(perfil, 'translate'):
+        return ASTToCTranslator(ast, analizador.tipos).translate()
+
+
+def __getattr__(nombre):
+    modulo = _EXPORTADOS.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    from importlib import import_module
+    valor = getattr(import_module(f'.{modulo}', __name__), nombre)
+    globals()[nombre] = valor
+    return valor
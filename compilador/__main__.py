@@ -0,0 +1,186 @@
+import argparse
+import sys
+
+from . import ETAPAS, ETAPAS_PERFIL
+
+
+def crear_parser_argumentos():
+    parser = argparse.ArgumentParser(prog='python -m compilador', description='Compila programas BEGIN ... END a C.')
+    parser.add_argument('archivo', nargs='?', help='archivo fuente (por defecto, la entrada estándar)')
+    parser.add_argument('--emit', choices=ETAPAS, default='c', help='etapa cuya salida se imprime (por defecto: c)')
+    parser.add_argument('-o', '--output', help='archivo de salida (por defecto, la salida estándar)')
+    parser.add_argument('--cache', metavar='DIRECTORIO', help='caché en disco de compilaciones')
+    parser.add_argument('--sin-optimizar', dest='optimizar', action='store_false',
+                        help='no plegar constantes ni eliminar ramas muertas')
+    parser.add_argument('--plano', action='store_true', help='usar el AST plano (menos memoria en programas enormes)')
+    parser.add_argument('--mmap', action='store_true',
+                        help='tokenizar el archivo proyectado en memoria, sin leerlo entero (columnas en bytes)')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='procesos para traducir a C las instrucciones de nivel superior (0: uno por núcleo)')
+    parser.add_argument('--ejecutar', action='store_true',
+                        help='ejecutar el programa en la máquina virtual en lugar de traducirlo')
+    parser.add_argument('--nativo', action='store_true',
+                        help='compilar el C generado con cc (con caché de binarios) y ejecutarlo')
+    parser.add_argument('--cc', help='compilador de C para --nativo (por defecto, cc)')
+    parser.add_argument('--opciones-cc', default='-O2', metavar='OPCIONES',
+                        help="opciones del compilador de C para --nativo (por defecto: '-O2')")
+    parser.add_argument('--tiempos', action='store_true',
+                        help='con --nativo, escribir en stderr los tiempos de traducción, compilación y ejecución')
+    parser.add_argument('--profile', nargs='?', const='texto', choices=('texto', 'json'),
+                        help='escribir en stderr el tiempo de cada etapa y los tamaños de tokens, AST y tabla de '
+                             'símbolos, como texto (por defecto) o JSON')
+    parser.add_argument('--profile-memoria', action='store_true',
+                        help='con --profile, medir también el pico de memoria de cada etapa (más lento)')
+    parser.add_argument('--profile-etapa', choices=ETAPAS_PERFIL, metavar='ETAPA',
+                        help=f"con --profile, ejecutar la etapa bajo cProfile ({', '.join(ETAPAS_PERFIL)})")
+    return parser
+
+
+def escribir_tokens(entrada, salida):
+    # Los tokens se leen y se escriben por bloques, sin cargar el fuente entero
+    from .lexico import tokenize_stream
+    for token in tokenize_stream(entrada):
+        salida.write(f'{token!r}\n')
+
+
+def escribir_c(fuente, salida, plano=False, optimizar=True, workers=1, perfil=None):
+    # El código C se escribe directamente en la salida según se genera. fuente
+    # es el texto del programa o un TokenBuffer ya construido
+    from .lexico import TokenBuffer
+    from .perfil import etapa
+    from .semantico import SemanticAnalyzer
+    from .traductor import ASTToCTranslator
+    if plano:
+        from .plano import ParserPlano as Parser
+    else:
+        from .sintactico import Parser
+    if not isinstance(fuente, TokenBuffer):
+        with etapa(perfil, 'tokenize'):
+            fuente = TokenBuffer(fuente)
+    with etapa(perfil, 'parse'):
+        ast = Parser(fuente).parse()
+    analizador = SemanticAnalyzer()
+    with etapa(perfil, 'analyze'):
+        analizador.analyze(ast)
+    if perfil is not None:
+        perfil.contar_tokens(fuente)
+        perfil.contar_ast(ast)
+        perfil.contar_simbolos(analizador)
+    if optimizar and not plano:
+        from .optimizador import Optimizer
+        with etapa(perfil, 'optimize'):
+            ast = Optimizer(analizador.tipos).optimize(ast)
+    traductor = ASTToCTranslator(ast, analizador.tipos)
+    with etapa(perfil, 'translate'):
+        if workers != 1 and not plano:
+            traductor.translate_paralelo(salida, workers or None)
+        else:
+            traductor.translate_to(salida)
+
+
+def escribir_mapeado(ruta, salida, args):
+    # --mmap: tokens o C del archivo proyectado en memoria
+    from .lexico import TokenBufferMapeado
+    with TokenBufferMapeado(ruta) as tokens:
+        if args.emit == 'tokens':
+            for token in tokens:
+                salida.write(f'{token!r}\n')
+        else:
+            escribir_c(tokens, salida, args.plano, args.optimizar, args.workers)
+
+
+def ejecutar_nativo(fuente, salida, args):
+    # Devuelve el código de salida del programa, o 1 si lo terminó una señal
+    from .nativo import EjecutorNativo
+    cache = None
+    if args.cache:
+        from .cache import CacheCompilacion
+        cache = CacheCompilacion(args.cache)
+    resultado = EjecutorNativo(args.cc, args.opciones_cc).ejecutar(fuente, args.optimizar, cache)
+    salida.write(resultado.salida)
+    if args.tiempos:
+        compilacion = 'en caché' if resultado.en_cache else f'{resultado.tiempo_compilacion * 1000:.1f} ms'
+        print(f'traducción {resultado.tiempo_traduccion * 1000:.1f} ms, compilación {compilacion}, '
+              f'ejecución {resultado.tiempo_ejecucion * 1000:.1f} ms', file=sys.stderr)
+    if resultado.codigo < 0:
+        print(f'error: el programa terminó por la señal {-resultado.codigo}', file=sys.stderr)
+        return 1
+    return resultado.codigo
+
+
+def main(argv=None):
+    parser = crear_parser_argumentos()
+    args = parser.parse_args(argv)
+    if args.plano and args.cache:
+        parser.error('--plano no se puede combinar con --cache')
+    if args.ejecutar and (args.plano or args.cache or args.emit != 'c'):
+        parser.error('--ejecutar no se puede combinar con --plano, --cache ni --emit')
+    if args.nativo and (args.ejecutar or args.plano or args.emit != 'c'):
+        parser.error('--nativo no se puede combinar con --ejecutar, --plano ni --emit')
+    if args.mmap and (not args.archivo or args.cache or args.ejecutar or args.nativo or args.emit == 'ast'):
+        parser.error('--mmap necesita un archivo y solo se combina con --emit tokens o c, sin --cache')
+    if (args.profile_memoria or args.profile_etapa) and not args.profile:
+        parser.error('--profile-memoria y --profile-etapa necesitan --profile')
+    if args.profile and (args.cache or args.mmap or args.ejecutar or args.nativo):
+        parser.error('--profile no se puede combinar con --cache, --mmap, --ejecutar ni --nativo')
+    perfil = None
+    if args.profile:
+        from .perfil import Perfil
+        perfil = Perfil(args.profile_memoria, args.profile_etapa)
+    entrada = open(args.archivo) if args.archivo and not args.mmap else sys.stdin
+    salida = open(args.output, 'w') if args.output else sys.stdout
+    # Errores del programa, que se informan sin traza: cada rama añade los de
+    # los módulos que usa, que solo se importan en esa rama
+    errores = (SyntaxError,)
+    try:
+        if args.mmap:
+            if args.emit == 'c':
+                from .semantico import SemanticError
+                errores = (SyntaxError, SemanticError)
+            escribir_mapeado(args.archivo, salida, args)
+        elif args.ejecutar:
+            from .maquina import ErrorEjecucion, ejecutar
+            from .semantico import SemanticError
+            errores = (SyntaxError, SemanticError, ErrorEjecucion)
+            ejecutar(entrada.read(), salida=salida, optimizar=args.optimizar)
+        elif args.nativo:
+            from .nativo import ErrorCompilacionC
+            from .semantico import SemanticError
+            errores = (SyntaxError, SemanticError, ErrorCompilacionC)
+            return ejecutar_nativo(entrada.read(), salida, args)
+        elif args.emit == 'tokens' and not args.cache and perfil is None:
+            escribir_tokens(entrada, salida)
+        elif args.emit == 'c' and not args.cache:
+            from .semantico import SemanticError
+            errores = (SyntaxError, SemanticError)
+            escribir_c(entrada.read(), salida, args.plano, args.optimizar, args.workers, perfil)
+        else:
+            # Los tokens y el AST no pasan por el análisis semántico
+            from . import compile
+            if args.emit == 'c':
+                from .semantico import SemanticError
+                errores = (SyntaxError, SemanticError)
+            cache = None
+            if args.cache:
+                from .cache import CacheCompilacion
+                cache = CacheCompilacion(args.cache)
+            resultado = compile(entrada.read(), emit=args.emit, cache=cache, plano=args.plano, optimizar=args.optimizar,
+                                perfil=perfil)
+            if args.emit == 'tokens':
+                resultado = ''.join(f'{token!r}\n' for token in resultado)
+            salida.write(f'{resultado}\n' if args.emit == 'ast' else resultado)
+        if perfil is not None:
+            print(perfil.json() if args.profile == 'json' else perfil.texto(), file=sys.stderr)
+    except errores as error:
+        print(f'error: {error}', file=sys.stderr)
+        return 1
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not sys.stdout:
+            salida.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,260 @@
+import string
+
+# Generación de un autómata finito determinista (AFD) a partir de una lista de
+# tokens (nombre, expresión regular), como token_specification. Se admite el
+# subconjunto de expresiones que usa el léxico: literales y escapes, ., \d,
+# \w, clases [...] y [^...], grupos (...), alternativas | y los cuantificadores
+# *, + y ?. La expresión de cada token se convierte en un AFN (Thompson) y el
+# conjunto en un AFD por construcción de subconjuntos.
+#
+# El AFD reproduce la alternancia de re: gana el primer token de la lista que
+# reconozca algún prefijo, con su coincidencia más larga. Por eso, en cuanto
+# un estado acepta un token, se descartan los estados de los tokens
+# posteriores (ya no pueden ganar) y el escáner se queda con la última
+# aceptación, como en el emparejamiento más largo.
+#
+# El alfabeto son los 128 caracteres ASCII y tres categorías para el resto
+# de Unicode, que es lo único que distinguen \d y \w fuera de ASCII.
+
+NO_ASCII_DIGITO = 128   # \d y \w (dígitos decimales de otras escrituras)
+NO_ASCII_PALABRA = 129  # \w pero no \d (letras de otras escrituras)
+NO_ASCII_OTRO = 130     # Ni \d ni \w
+UNIVERSO = frozenset(range(131))
+
+DIGITOS = frozenset(map(ord, string.digits)) | {NO_ASCII_DIGITO}
+PALABRA = frozenset(map(ord, string.ascii_letters + string.digits + '_')) | {NO_ASCII_DIGITO, NO_ASCII_PALABRA}
+ESCAPES = {'d': DIGITOS, 'w': PALABRA}
+ESCAPES.update((letra, frozenset({ord(caracter)})) for letra, caracter in zip('ntrfv', '\n\t\r\f\v'))
+
+
+def simbolo(caracter):
+    # Símbolo del alfabeto de un carácter
+    codigo = ord(caracter)
+    if codigo < 128:
+        return codigo
+    if caracter.isdecimal():
+        return NO_ASCII_DIGITO
+    if caracter.isalnum():
+        return NO_ASCII_PALABRA
+    return NO_ASCII_OTRO
+
+
+class AFN:
+    def __init__(self):
+        self.transiciones = []  # Por estado: lista de (conjunto de símbolos, destino)
+        self.vacias = []        # Por estado: destinos sin consumir símbolo
+        self.duenos = []        # Por estado: índice del token al que pertenece
+        self.aceptacion = {}    # Estado final -> índice del token
+
+    def estado(self, dueno):
+        self.transiciones.append([])
+        self.vacias.append([])
+        self.duenos.append(dueno)
+        return len(self.duenos) - 1
+
+    def agregar(self, patron, indice):
+        # Añade el autómata de un token y devuelve su estado inicial
+        analizador = _Analizador(self, patron, indice)
+        inicio, fin = analizador.alternativa()
+        if analizador.pos != len(patron):
+            raise ValueError(f"Expresión no admitida en {patron!r}, posición {analizador.pos}")
+        self.aceptacion[fin] = indice
+        return inicio
+
+    def clausura(self, estados):
+        pendientes = list(estados)
+        vistos = set(estados)
+        while pendientes:
+            for destino in self.vacias[pendientes.pop()]:
+                if destino not in vistos:
+                    vistos.add(destino)
+                    pendientes.append(destino)
+        return vistos
+
+
+class _Analizador:
+    # Analizador descendente de una expresión, que va creando los fragmentos
+    # (inicio, fin) del AFN
+    def __init__(self, afn, patron, indice):
+        self.afn = afn
+        self.patron = patron
+        self.indice = indice
+        self.pos = 0
+
+    def estado(self):
+        return self.afn.estado(self.indice)
+
+    def alternativa(self):
+        fragmentos = [self.secuencia()]
+        while self.pos < len(self.patron) and self.patron[self.pos] == '|':
+            self.pos += 1
+            fragmentos.append(self.secuencia())
+        if len(fragmentos) == 1:
+            return fragmentos[0]
+        inicio, fin = self.estado(), self.estado()
+        for entrada, salida in fragmentos:
+            self.afn.vacias[inicio].append(entrada)
+            self.afn.vacias[salida].append(fin)
+        return inicio, fin
+
+    def secuencia(self):
+        inicio = fin = self.estado()
+        while self.pos < len(self.patron) and self.patron[self.pos] not in '|)':
+            entrada, salida = self.repeticion()
+            self.afn.vacias[fin].append(entrada)
+            fin = salida
+        return inicio, fin
+
+    def repeticion(self):
+        entrada, salida = self.atomo()
+        if self.pos < len(self.patron) and self.patron[self.pos] in '*+?':
+            cuantificador = self.patron[self.pos]
+            self.pos += 1
+            inicio, fin = self.estado(), self.estado()
+            self.afn.vacias[inicio].append(entrada)
+            self.afn.vacias[salida].append(fin)
+            if cuantificador != '+':
+                self.afn.vacias[inicio].append(fin)
+            if cuantificador != '?':
+                self.afn.vacias[salida].append(entrada)
+            return inicio, fin
+        return entrada, salida
+
+    def atomo(self):
+        caracter = self.patron[self.pos]
+        self.pos += 1
+        if caracter == '(':
+            fragmento = self.alternativa()
+            if self.pos >= len(self.patron) or self.patron[self.pos] != ')':
+                raise ValueError(f"Falta ')' en {self.patron!r}")
+            self.pos += 1
+            return fragmento
+        if caracter == '[':
+            simbolos = self.clase()
+        elif caracter == '.':
+            simbolos = UNIVERSO - {ord('\n')}
+        elif caracter == '\\':
+            simbolos = self.escape()
+        elif caracter in '*+?':
+            raise ValueError(f"Cuantificador sin operando en {self.patron!r}")
+        else:
+            simbolos = frozenset({simbolo(caracter)})
+        inicio, fin = self.estado(), self.estado()
+        self.afn.transiciones[inicio].append((simbolos, fin))
+        return inicio, fin
+
+    def escape(self):
+        caracter = self.patron[self.pos]
+        self.pos += 1
+        return ESCAPES.get(caracter) or frozenset({simbolo(caracter)})
+
+    def clase(self):
+        negada = self.patron[self.pos] == '^'
+        if negada:
+            self.pos += 1
+        simbolos = set()
+        primero = True
+        while True:
+            if self.pos >= len(self.patron):
+                raise ValueError(f"Falta ']' en {self.patron!r}")
+            caracter = self.patron[self.pos]
+            self.pos += 1
+            if caracter == ']' and not primero:
+                break
+            primero = False
+            if caracter == '\\':
+                simbolos |= self.escape()
+            elif self.pos + 1 < len(self.patron) and self.patron[self.pos] == '-' and self.patron[self.pos + 1] != ']':
+                hasta = self.patron[self.pos + 1]
+                self.pos += 2
+                simbolos.update(range(ord(caracter), ord(hasta) + 1))
+            else:
+                simbolos.add(simbolo(caracter))
+        return UNIVERSO - simbolos if negada else frozenset(simbolos)
+
+
+class AFD:
+    # Tablas del autómata: clases[símbolo] es la clase de equivalencia de cada
+    # símbolo, filas[estado][clase] el estado siguiente (0 es el estado
+    # muerto, 1 el inicial) y aceptacion[estado] el código del token que
+    # reconoce (0 si ninguno)
+    def __init__(self, clases, filas, aceptacion):
+        self.clases = clases
+        self.filas = filas
+        self.aceptacion = aceptacion
+
+    def __repr__(self):
+        return f'AFD({len(self.filas) - 1} estados, {max(self.clases) + 1} clases)'
+
+
+def generar(especificacion, codigos):
+    # especificacion: lista de (nombre, patrón); codigos: nombre -> código
+    # que aparece en aceptacion (los tokens que no estén se omiten)
+    afn = AFN()
+    tokens = [(codigos[nombre], patron) for nombre, patron in especificacion if nombre in codigos]
+    inicial = afn.estado(None)
+    for indice, (_, patron) in enumerate(tokens):
+        afn.vacias[inicial].append(afn.agregar(patron, indice))
+
+    # Clases de equivalencia: símbolos que ningún conjunto del AFN distingue
+    firmas = {}
+    clases = []
+    conjuntos = sorted({simbolos for salientes in afn.transiciones for simbolos, _ in salientes}, key=sorted)
+    for simbolo_ in range(len(UNIVERSO)):
+        firma = tuple(simbolo_ in simbolos for simbolos in conjuntos)
+        clases.append(firmas.setdefault(firma, len(firmas)))
+    representantes = {}
+    for simbolo_, clase in enumerate(clases):
+        representantes.setdefault(clase, simbolo_)
+
+    def podar(estados):
+        # Quita los estados de los tokens posteriores al primero que acepta
+        aceptados = [afn.aceptacion[estado] for estado in estados if estado in afn.aceptacion]
+        if not aceptados:
+            return frozenset(estados), 0
+        primero = min(aceptados)
+        return frozenset(e for e in estados if afn.duenos[e] is None or afn.duenos[e] <= primero), \
+            tokens[primero][0]
+
+    inicio, _ = podar(afn.clausura([inicial]))
+    numeros = {inicio: 1}
+    filas = [bytes(len(representantes))]
+    aceptacion = [0, 0]
+    pendientes = [inicio]
+    while pendientes:
+        actual = pendientes.pop()
+        fila = []
+        for clase in range(len(representantes)):
+            representante = representantes[clase]
+            destinos = [destino for estado in actual for simbolos, destino in afn.transiciones[estado]
+                        if representante in simbolos]
+            if not destinos:
+                fila.append(0)
+                continue
+            siguiente, codigo = podar(afn.clausura(destinos))
+            if siguiente not in numeros:
+                numeros[siguiente] = len(numeros) + 1
+                aceptacion.append(codigo)
+                pendientes.append(siguiente)
+            fila.append(numeros[siguiente])
+        while len(filas) <= numeros[actual]:
+            filas.append(None)
+        filas[numeros[actual]] = fila
+    if len(filas) > 256:
+        raise ValueError("El autómata tiene más de 255 estados")
+    return AFD(clases, [bytes(fila) for fila in filas], aceptacion)
+
+
+def hash_perfecto(palabras):
+    # Busca una función h(p) = (ord(p[0]) * a + ord(p[-1]) + len(p)) % m sin
+    # colisiones entre las palabras, con la tabla m más pequeña posible.
+    # Devuelve (a, m, tabla), con la palabra de cada posición o None
+    for m in range(len(palabras), 8 * len(palabras) + 1):
+        for a in range(1, m + 1):
+            posiciones = {(ord(p[0]) * a + ord(p[-1]) + len(p)) % m for p in palabras}
+            if len(posiciones) == len(palabras):
+                tabla = [None] * m
+                for p in palabras:
+                    tabla[(ord(p[0]) * a + ord(p[-1]) + len(p)) % m] = p
+                return a, m, tabla
+    raise ValueError("No se encontró un hash perfecto para las palabras")
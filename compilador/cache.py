@@ -0,0 +1,154 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+# Caché en disco de compilaciones, direccionada por el contenido: la clave es
+# un hash del texto fuente, de la versión del compilador, de la etapa pedida
+# (tokens, AST o C) y, para el C, de si se optimiza. Cada entrada guarda
+# exactamente lo que devolvería compile() sin caché para esa etapa, y un
+# fallo solo ejecuta las etapas hasta la pedida. Pensada para compartirse
+# entre procesos del mismo equipo: las escrituras son atómicas (archivo
+# temporal + os.replace) y la expulsión tolera que otro proceso borre
+# entradas a la vez.
+
+TAMANO_MAXIMO = 512 * 1024 * 1024
+# Cada cuántas escrituras se recorre el directorio para expulsar entradas,
+# además de en la primera de cada instancia; entre dos recorridos el límite
+# puede superarse ligeramente
+INTERVALO_EXPULSION = 32
+
+_ETAPAS = ('__init__.py', 'automata.py', 'lexico.py', 'nodos.py', 'sintactico.py', 'semantico.py', 'optimizador.py', 'traductor.py')
+_version = None
+
+
+def version_compilador():
+    # Huella de las fuentes de las etapas: cualquier cambio en el compilador
+    # invalida las entradas anteriores sin tener que subir un número a mano
+    global _version
+    if _version is None:
+        huella = hashlib.sha256()
+        directorio = os.path.dirname(__file__)
+        for nombre in _ETAPAS:
+            with open(os.path.join(directorio, nombre), 'rb') as archivo:
+                huella.update(archivo.read())
+        _version = huella.hexdigest()[:16]
+    return _version
+
+
+class CacheCompilacion:
+    extension = '.pkl'
+
+    def __init__(self, directorio, tamano_maximo=TAMANO_MAXIMO, intervalo_expulsion=INTERVALO_EXPULSION):
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        self.intervalo_expulsion = intervalo_expulsion
+        self.aciertos = 0
+        self.fallos = 0
+        self.escrituras = 0
+        self.expulsiones = 0
+        os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, fuente, emit='c', optimizar=True):
+        # Los tokens y el AST no dependen de optimizar
+        huella = hashlib.sha256(version_compilador().encode())
+        huella.update(f'\0{emit}\0'.encode())
+        huella.update(b'O\0' if optimizar or emit != 'c' else b'-\0')
+        huella.update(fuente.encode('utf-8'))
+        return huella.hexdigest()
+
+    def ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], clave[2:] + self.extension)
+
+    def obtener(self, fuente, emit='c', optimizar=True):
+        # Devuelve la salida guardada de la etapa, o None si no está
+        ruta = self.ruta(self.clave(fuente, emit, optimizar))
+        try:
+            with open(ruta, 'rb') as archivo:
+                entrada = pickle.load(archivo)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.fallos += 1
+            return None
+        try:
+            # La fecha de modificación marca el último uso para la expulsión LRU
+            os.utime(ruta)
+        except FileNotFoundError:
+            pass
+        self.aciertos += 1
+        return entrada
+
+    def guardar(self, fuente, entrada, emit='c', optimizar=True):
+        ruta = self.ruta(self.clave(fuente, emit, optimizar))
+        directorio = os.path.dirname(ruta)
+        os.makedirs(directorio, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as archivo:
+                pickle.dump(entrada, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, ruta)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+        self.anotar_escritura()
+
+    def anotar_escritura(self):
+        # La primera escritura de cada instancia también expulsa: la línea de
+        # comandos y los trabajadores de un pool viven poco y muchas veces no
+        # llegan a intervalo_expulsion escrituras
+        self.escrituras += 1
+        if (self.escrituras - 1) % self.intervalo_expulsion == 0:
+            self.expulsar()
+
+    def compilar(self, fuente, emit='c', optimizar=True):
+        # Lo mismo que compile(fuente, emit, optimizar=optimizar), pero
+        # consultando antes la caché. Los programas con errores no se
+        # guardan: el error se propaga
+        entrada = self.obtener(fuente, emit, optimizar)
+        if entrada is None:
+            from . import compile
+            entrada = compile(fuente, emit, optimizar=optimizar)
+            self.guardar(fuente, entrada, emit, optimizar)
+        return entrada
+
+    def entradas(self):
+        # Lista (mtime, tamaño, ruta) de las entradas presentes
+        entradas = []
+        for subdirectorio in os.scandir(self.directorio):
+            if not subdirectorio.is_dir():
+                continue
+            for archivo in os.scandir(subdirectorio.path):
+                if not archivo.name.endswith(self.extension):
+                    continue
+                try:
+                    estado = archivo.stat()
+                except FileNotFoundError:
+                    continue
+                entradas.append((estado.st_mtime, estado.st_size, archivo.path))
+        return entradas
+
+    def expulsar(self):
+        # Borra las entradas usadas hace más tiempo hasta caber en el límite
+        entradas = self.entradas()
+        total = sum(tamano for _, tamano, _ in entradas)
+        if total <= self.tamano_maximo:
+            return
+        entradas.sort()
+        for _, tamano, ruta in entradas:
+            if total <= self.tamano_maximo:
+                break
+            try:
+                os.unlink(ruta)
+                self.expulsiones += 1
+            except FileNotFoundError:
+                pass
+            total -= tamano
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            'escrituras': self.escrituras,
+            'expulsiones': self.expulsiones,
+        }
@@ -0,0 +1,275 @@
+from bisect import bisect_left, bisect_right
+
+from .lexico import tokenize
+from .nodos import BucleFor, BucleWhile, Condicional, Nodo
+from .sintactico import Parser
+
+# Análisis incremental para editores y modo vigilancia: tras editar un rango
+# de líneas solo se vuelven a tokenizar esas líneas y solo se vuelve a
+# analizar el tramo de instrucciones afectado dentro del bloque IF/WHILE/FOR
+# más interno que contiene la edición. El resto del AST se reutiliza; si la
+# edición cambia el número de líneas, se corrige la línea de los tokens y de
+# los nodos reutilizados que vienen detrás, para que los errores se sigan
+# señalando en su sitio.
+
+
+class Bloque:
+    # Rango de tokens de una lista de instrucciones del AST. inicio y fin son
+    # relativos al comienzo de la instrucción que contiene la lista (la lista
+    # del programa usa posiciones absolutas); inicios[k] y fines[k] son
+    # relativos al comienzo de la lista, y cuerpos[k] guarda los bloques de
+    # las listas anidadas en la instrucción k. Al ser todo relativo, una
+    # edición solo desplaza a los hermanos posteriores de cada nivel.
+    __slots__ = ('inicio', 'fin', 'inicios', 'fines', 'cuerpos')
+
+    def __init__(self, inicio, fin):
+        self.inicio = inicio
+        self.fin = fin
+        self.inicios = []
+        self.fines = []
+        self.cuerpos = []
+
+
+class _ParserMarcado(Parser):
+    # Parser que además registra el Bloque de cada lista de instrucciones a
+    # través de los ganchos de Parser.analizar_bloques
+    marcado = True
+
+    def __init__(self, tokens, pos=0):
+        super().__init__(tokens)
+        if pos:
+            self.pos = pos
+            self.cargar_actual()
+        self.cuerpos = [[]]      # Bloques de la instrucción en curso, por nivel
+        self.listas = []         # Bloques de las listas abiertas
+        self.inicios_pila = []   # Inicio de cada instrucción abierta
+
+    def abrir_lista(self):
+        bloque = Bloque(self.pos, self.pos)
+        self.cuerpos[-1].append(bloque)
+        self.listas.append(bloque)
+
+    def cerrar_lista(self):
+        self.listas.pop().fin = self.pos
+
+    def abrir_instruccion(self):
+        self.inicios_pila.append(self.pos)
+        self.cuerpos.append([])
+
+    def cerrar_instruccion(self):
+        # Mientras se analiza su lista, bloque.inicio todavía es absoluto
+        inicio = self.inicios_pila.pop()
+        cuerpos = self.cuerpos.pop()
+        for cuerpo in cuerpos:
+            cuerpo.inicio -= inicio
+            cuerpo.fin -= inicio
+        bloque = self.listas[-1]
+        bloque.inicios.append(inicio - bloque.inicio)
+        bloque.fines.append(self.pos - bloque.inicio)
+        bloque.cuerpos.append(cuerpos)
+
+    def instruccion_marcada(self, bloque):
+        self.listas.append(bloque)
+        try:
+            return self.instruccion()
+        finally:
+            self.listas.pop()
+
+
+def _dividir_lineas(texto):
+    # Como splitlines(keepends=True) pero solo corta en '\n', igual que el lexer
+    partes = texto.split('\n')
+    lineas = [parte + '\n' for parte in partes[:-1]]
+    if partes[-1]:
+        lineas.append(partes[-1])
+    return lineas
+
+
+def _tokenizar(lineas, primera):
+    # Tokeniza un tramo de líneas que empieza en la línea primera (base 0).
+    # Devuelve los tokens con su línea absoluta y, para cada línea del tramo,
+    # el índice de su primer token (o del siguiente si la línea no tiene)
+    tokens = []
+    primer_token = []
+    extra = primera
+    for token in tokenize(''.join(lineas)):
+        kind, value, line, column = token
+        linea = line + extra
+        if linea != line:
+            token = (kind, value, linea, column)
+        while len(primer_token) < linea - primera:
+            primer_token.append(len(tokens))
+        tokens.append(token)
+        if (kind == 'STRING' or kind == 'CHAR') and '\n' in value:
+            # tokenize no cuenta los saltos dentro de un literal
+            extra += value.count('\n')
+    while len(primer_token) < len(lineas):
+        primer_token.append(len(tokens))
+    return tokens, primer_token
+
+
+def _tiene_comillas(lineas):
+    return any('"' in linea or "'" in linea for linea in lineas)
+
+
+def _desplazar_lineas(nodos, lineas):
+    # Suma lineas a la línea de los nodos y de todos sus descendientes
+    pila = list(nodos)
+    while pila:
+        nodo = pila.pop()
+        nodo.linea += lineas
+        for campo in nodo.campos:
+            valor = getattr(nodo, campo)
+            if isinstance(valor, Nodo):
+                pila.append(valor)
+            elif isinstance(valor, list):
+                pila.extend(valor)
+
+
+def _listas_de(nodo):
+    if isinstance(nodo, Condicional):
+        return [nodo.instrucciones_then, nodo.instrucciones_else]
+    elif isinstance(nodo, (BucleWhile, BucleFor)):
+        return [nodo.instrucciones]
+    return []
+
+
+class DocumentoIncremental:
+    def __init__(self, texto):
+        self.lineas = _dividir_lineas(texto)
+        self.analizar_todo()
+
+    @property
+    def texto(self):
+        return ''.join(self.lineas)
+
+    def analizar_todo(self):
+        self.tokens, primer_token = _tokenizar(self.lineas, 0)
+        self.primer_token = primer_token + [len(self.tokens)]
+        self.reparsear_todo()
+
+    def reparsear_todo(self):
+        # Si el programa no es válido el error se propaga y la próxima
+        # edición vuelve a analizar todo
+        self.ast = self.bloque = None
+        parser = _ParserMarcado(self.tokens)
+        ast = parser.parse()
+        self.ast, self.bloque = ast, parser.cuerpos[0][0]
+
+    def linea_token(self, i):
+        # Línea (base 1) del token i, la misma que guarda su tupla
+        return bisect_right(self.primer_token, i)
+
+    def editar(self, inicio, fin, texto):
+        # Sustituye las líneas [inicio, fin) (base 0) por texto
+        nuevas = _dividir_lineas(texto)
+        if nuevas and not nuevas[-1].endswith('\n') and fin < len(self.lineas):
+            raise ValueError("el texto debe terminar en salto de línea salvo al final del documento")
+        viejas = self.lineas[inicio:fin]
+        vecinas = self.lineas[max(inicio - 1, 0):inicio] + self.lineas[fin:fin + 1]
+        if _tiene_comillas(viejas + nuevas + vecinas) or self.cruza_literal(inicio):
+            # Una comilla puede cambiar el emparejamiento de cadenas en todo
+            # el resto del fuente: se analiza todo de nuevo
+            self.lineas[inicio:fin] = nuevas
+            self.analizar_todo()
+            return
+        a, b = self.primer_token[inicio], self.primer_token[fin]
+        tokens_nuevos, primer_token = _tokenizar(nuevas, inicio)
+        self.lineas[inicio:fin] = nuevas
+        self.tokens[a:b] = tokens_nuevos
+        delta = len(tokens_nuevos) - (b - a)
+        lineas = len(nuevas) - (fin - inicio)
+        if lineas:
+            siguiente = a + len(tokens_nuevos)
+            self.tokens[siguiente:] = [(kind, value, line + lineas, column)
+                                       for kind, value, line, column in self.tokens[siguiente:]]
+        self.primer_token[inicio:fin] = [a + i for i in primer_token]
+        if delta:
+            desde = inicio + len(nuevas)
+            self.primer_token[desde:] = [i + delta for i in self.primer_token[desde:]]
+        if self.bloque is None or not self.reparar(self.bloque, 0, self.ast.instrucciones, a, b, delta, lineas):
+            self.reparsear_todo()
+
+    def cruza_literal(self, linea):
+        # Indica si el último token antes de la línea es un literal que
+        # continúa dentro de ella
+        i = self.primer_token[linea] - 1
+        if i < 0:
+            return False
+        kind, value = self.tokens[i][:2]
+        return (kind == 'STRING' or kind == 'CHAR') and self.linea_token(i) + value.count('\n') > linea
+
+    def reparar(self, bloque, base, lista, a, b, delta, lineas):
+        # Intenta rehacer el AST de la lista de bloque para la edición que
+        # sustituyó los tokens [a, b) (posiciones anteriores a la edición)
+        # por otros delta tokens más, y lineas líneas más. Devuelve False si
+        # la edición no cabe en la lista, y entonces la instrucción que la
+        # contiene se rehace entera en el nivel superior. Lo nuevo se analiza
+        # con los tokens ya desplazados; a lo reutilizado que sigue a la
+        # edición se le suman las líneas al desplazar sus posiciones.
+        inicio = base + bloque.inicio
+        if a < inicio or b > base + bloque.fin:
+            return False
+        ra, rb = a - inicio, b - inicio
+        inicios, fines = bloque.inicios, bloque.fines
+        i = bisect_right(fines, ra)        # Primera instrucción que acaba tras ra
+        j = bisect_left(inicios, rb) - 1   # Última instrucción que empieza antes de rb
+        if i == j and inicios[i] < ra and rb < fines[i]:
+            # La edición cae dentro de una sola instrucción: primero se
+            # intenta con el bloque anidado que la contiene
+            base_nodo = inicio + inicios[i]
+            cuerpos = bloque.cuerpos[i]
+            for k, (cuerpo, sublista) in enumerate(zip(cuerpos, _listas_de(lista[i]))):
+                if base_nodo + cuerpo.inicio <= a and b <= base_nodo + cuerpo.fin:
+                    if self.reparar(cuerpo, base_nodo, sublista, a, b, delta, lineas):
+                        for siguiente in cuerpos[k + 1:]:
+                            siguiente.inicio += delta
+                            siguiente.fin += delta
+                        if lineas:
+                            # Las listas posteriores de la instrucción (el ELSE)
+                            for otra in _listas_de(lista[i])[k + 1:]:
+                                _desplazar_lineas(otra, lineas)
+                        fines[i] += delta
+                        self.desplazar(bloque, lista, i + 1, delta, lineas)
+                        return True
+                    break
+        s = min(ra, inicios[i]) if i <= j else ra
+        e = max(rb, fines[j]) if i <= j else rb
+        parser = _ParserMarcado(self.tokens, inicio + s)
+        temporal = Bloque(inicio + s, inicio + s)
+        objetivo = inicio + e + delta
+        nuevas = []
+        try:
+            while parser.pos < objetivo:
+                if parser.actual in {'END', 'ELSE', None}:
+                    return False
+                nuevas.append(parser.instruccion_marcada(temporal))
+        except SyntaxError:
+            return False
+        if parser.pos != objetivo:
+            return False
+        lista[i:j + 1] = nuevas
+        inicios[i:j + 1] = [s + x for x in temporal.inicios]
+        fines[i:j + 1] = [s + x for x in temporal.fines]
+        bloque.cuerpos[i:j + 1] = temporal.cuerpos
+        self.desplazar(bloque, lista, i + len(nuevas), delta, lineas)
+        return True
+
+    def desplazar(self, bloque, lista, desde, delta, lineas):
+        # Mueve las instrucciones de la lista a partir de desde
+        if delta:
+            bloque.inicios[desde:] = [x + delta for x in bloque.inicios[desde:]]
+            bloque.fines[desde:] = [x + delta for x in bloque.fines[desde:]]
+            bloque.fin += delta
+        if lineas:
+            _desplazar_lineas(lista[desde:], lineas)
+
+    def traducir(self):
+        # El análisis semántico y la traducción se hacen sobre el AST completo
+        # (el optimizador no modifica el AST, que sigue sirviendo para editar)
+        from .optimizador import Optimizer
+        from .semantico import SemanticAnalyzer
+        from .traductor import ASTToCTranslator
+        analizador = SemanticAnalyzer()
+        analizador.analyze(self.ast)
+        return ASTToCTranslator(Optimizer(analizador.tipos).optimize(self.ast), analizador.tipos).translate()
@@ -0,0 +1,414 @@
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_right
+
+from .automata import NO_ASCII_OTRO, generar, hash_perfecto, simbolo
+
+# Definimos los tipos de tokens
+token_specification = [
+    ('NUMBER_FLOAT',   r'\d+\.\d+'),    # Números decimales
+    ('NUMBER_INT',     r'\d+'),         # Números enteros
+    ('STRING',         r'"[^"]*"'),     # Cadenas de texto
+    ('CHAR',           r"'[^']'"),      # Caracteres
+    ('ASSIGN',         r'='),           # Asignación
+    ('STMT_END',       r';'),           # Fin de una instrucción
+    ('ID',             r'[A-Za-z_]\w*'),# Identificadores
+    ('OP',             r'[+\-*/]'),     # Operadores aritméticos
+    ('OP_REL',         r'[<>!=]=?|=='), # Operadores relacionales
+    ('NEWLINE',        r'\n'),          # Líneas nuevas
+    ('SKIP',           r'[ \t\r]+'),   # Espacios, tabulaciones y retornos de carro
+    ('COMMENT',        r'//.*'),        # Comentarios
+    ('BEGIN',          r'BEGIN'),       # Palabras clave
+    ('END',            r'END'),
+    ('IF',             r'IF'),
+    ('THEN',           r'THEN'),
+    ('ELSE',           r'ELSE'),
+    ('WHILE',          r'WHILE'),
+    ('DO',             r'DO'),
+    ('FOR',            r'FOR'),
+    ('TO',             r'TO'),
+    ('VAR',            r'VAR'),
+    ('PRINT',          r'PRINT'),
+    ('CALL',           r'CALL'),
+    ('LPAREN',         r'\('),          # Paréntesis de apertura
+    ('RPAREN',         r'\)'),          # Paréntesis de cierre
+    ('COMMA',          r','),           # Coma
+    ('ERROR',          r'.'),           # Cualquier otro carácter
+]
+
+PALABRAS_CLAVE = ('BEGIN', 'END', 'IF', 'THEN', 'ELSE', 'WHILE', 'DO', 'FOR', 'TO', 'VAR', 'PRINT', 'CALL')
+
+# Expresión regular equivalente al escáner (la usan los benchmarks)
+token_re = re.compile('|'.join(f'(?P<{pair[0]}>{pair[1]})' for pair in token_specification))
+
+# Códigos numéricos de los tipos de token: el número del grupo con nombre que
+# los reconoce en token_re (mo.lastindex), por eso el código 0 queda libre
+TIPOS = (None,) + tuple(pair[0] for pair in token_specification)
+CODIGOS = {tipo: codigo for codigo, tipo in enumerate(TIPOS) if tipo is not None}
+CODIGOS_CLAVE = {clave: CODIGOS[clave] for clave in PALABRAS_CLAVE}
+# Tipos cuyo texto siempre es el mismo: su valor no necesita cortar el fuente
+VALORES_FIJOS = {'ASSIGN': '=', 'STMT_END': ';', 'LPAREN': '(', 'RPAREN': ')', 'COMMA': ','}
+VALORES_FIJOS.update((clave, clave) for clave in CODIGOS_CLAVE)
+VALOR_FIJO = tuple(VALORES_FIJOS.get(tipo) for tipo in TIPOS)
+
+# Escáner generado a partir de token_specification: un AFD con la misma
+# prioridad entre tokens que la alternancia de token_re, incluido ERROR para
+# los caracteres que no empiezan ningún token. Las palabras clave no entran
+# en el autómata (ID ya las reconoce): se buscan en una tabla con hash
+# perfecto del primer y el último carácter y la longitud, sin cortar el
+# fuente.
+AUTOMATA = generar(token_specification,
+                   {tipo: codigo for tipo, codigo in CODIGOS.items() if tipo not in CODIGOS_CLAVE})
+CLAVE_FACTOR, CLAVE_MODULO, _palabras = hash_perfecto(PALABRAS_CLAVE)
+TABLA_CLAVES = tuple(None if palabra is None else (palabra, CODIGOS[palabra]) for palabra in _palabras)
+
+
+class _TablaClases(dict):
+    # Tabla de str.translate: carácter -> clase del autómata (como carácter,
+    # para codificar el resultado en latin-1). Los no ASCII se calculan la
+    # primera vez que aparecen
+    def __missing__(self, codigo):
+        clase = self[codigo] = chr(AUTOMATA.clases[simbolo(chr(codigo))])
+        return clase
+
+
+_CLASES = _TablaClases((codigo, chr(AUTOMATA.clases[codigo])) for codigo in range(128))
+
+
+# Filas del autómata indexadas directamente por byte, para escanear bytes sin
+# traducirlos antes a clases. Los bytes no ASCII llevan al estado muerto y el
+# token se rehace entonces carácter a carácter
+FILAS_BYTES = tuple(bytes(fila[AUTOMATA.clases[byte]] if byte < 128 else 0 for byte in range(256))
+                    for fila in AUTOMATA.filas)
+TABLA_CLAVES_BYTES = tuple(None if clave is None else (clave[0].encode('ascii'), clave[1]) for clave in TABLA_CLAVES)
+# Longitud de la secuencia UTF-8 según su primer byte (1 si no es válido)
+LARGO_UTF8 = bytes(2 if 0xC2 <= byte <= 0xDF else 3 if 0xE0 <= byte <= 0xEF else 4 if 0xF0 <= byte <= 0xF4 else 1
+                   for byte in range(256))
+
+
+def escanear(contenido, final=True):
+    # Produce (código, inicio, fin) de cada token, incluidos espacios, saltos
+    # de línea y comentarios, con las palabras clave ya distinguidas de ID.
+    # Con final=False el contenido puede continuar: se para antes del primer
+    # token con el que el autómata llega al final sin haber terminado.
+    # contenido es un str (posiciones en caracteres) o bytes UTF-8, como un
+    # mmap (posiciones en bytes)
+    if isinstance(contenido, str):
+        # El autómata recorre las clases de los caracteres, que son menos de
+        # 128; el hash de palabras clave, los bytes del fuente (lo que no es
+        # latin-1 pasa a '?', que no está en ninguna)
+        entrada = contenido.translate(_CLASES).encode('latin-1')
+        octetos = contenido.encode('latin-1', 'replace')
+        filas = AUTOMATA.filas
+    else:
+        entrada = octetos = contenido
+        filas = FILAS_BYTES
+    aceptacion = AUTOMATA.aceptacion
+    id_ = CODIGOS['ID']
+    n = len(entrada)
+    i = 0
+    while i < n:
+        estado = 1
+        tipo = 0
+        j = fin = i
+        while j < n:
+            estado = filas[estado][entrada[j]]
+            if not estado:
+                break
+            j += 1
+            if aceptacion[estado]:
+                tipo = aceptacion[estado]
+                fin = j
+        else:
+            if not final:
+                return
+        if not estado and entrada[j] > 127:
+            # Solo con bytes: el token tiene caracteres no ASCII
+            tipo, fin = token_unicode(contenido, i)
+        if tipo == id_:
+            clave = TABLA_CLAVES_BYTES[(octetos[i] * CLAVE_FACTOR + octetos[fin - 1] + fin - i) % CLAVE_MODULO]
+            if clave is not None and len(clave[0]) == fin - i and octetos.find(clave[0], i, fin) == i:
+                tipo = clave[1]
+        yield tipo, i, fin
+        i = fin
+
+
+def token_unicode(octetos, i):
+    # Tipo y fin del token que empieza en i recorriéndolo por caracteres
+    # UTF-8, para los que contienen bytes no ASCII. Una secuencia no válida
+    # cuenta como un carácter de un byte que no es letra ni dígito
+    filas, aceptacion, clases = AUTOMATA.filas, AUTOMATA.aceptacion, AUTOMATA.clases
+    n = len(octetos)
+    estado = 1
+    tipo = 0
+    j = fin = i
+    while j < n:
+        byte = octetos[j]
+        largo = 1
+        if byte < 128:
+            clase = clases[byte]
+        else:
+            try:
+                clase = clases[simbolo(octetos[j:j + LARGO_UTF8[byte]].decode('utf-8'))]
+                largo = LARGO_UTF8[byte]
+            except UnicodeDecodeError:
+                clase = clases[NO_ASCII_OTRO]
+        estado = filas[estado][clase]
+        if not estado:
+            break
+        j += largo
+        if aceptacion[estado]:
+            tipo = aceptacion[estado]
+            fin = j
+    return tipo, fin
+
+
+def tokenize(contenido, workers=1):
+    # Con workers > 1 (None: uno por núcleo) y un contenido de al menos
+    # UMBRAL_PARALELO caracteres, los trozos se tokenizan en un pool de
+    # procesos; el resultado es el mismo que el secuencial
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(contenido) >= UMBRAL_PARALELO:
+        return tokenize_paralelo(contenido, workers)
+    return _tokenizar(contenido, 1)
+
+
+def _tokenizar(contenido, line_num):
+    # tokenize de un trozo cuya primera línea es line_num
+    line_start = 0
+    tokens = []
+    number_float, number_int = CODIGOS['NUMBER_FLOAT'], CODIGOS['NUMBER_INT']
+    newline, skip, comment = CODIGOS['NEWLINE'], CODIGOS['SKIP'], CODIGOS['COMMENT']
+    for tipo, start, end in escanear(contenido):
+        if tipo == newline:
+            line_start = end
+            line_num += 1
+            continue
+        elif tipo == skip or tipo == comment:
+            continue
+        value = VALOR_FIJO[tipo]
+        if value is None:
+            value = contenido[start:end]
+            if tipo == number_float:
+                value = float(value)
+            elif tipo == number_int:
+                value = int(value)
+        tokens.append((TIPOS[tipo], value, line_num, start - line_start))
+    return tokens
+
+
+# Tamaño (en caracteres) a partir del cual tokenize reparte entre procesos
+UMBRAL_PARALELO = 1 << 23
+
+# Los literales STRING y CHAR son los únicos tokens que pueden contener un
+# salto de línea o una comilla: cada comilla que no está dentro de uno empieza
+# un token, así que buscarlos con finditer da los mismos que el escáner
+_literales_re = re.compile('|'.join(patron for tipo, patron in token_specification if tipo in ('STRING', 'CHAR')))
+
+
+def cortes_seguros(contenido, partes):
+    # Divide el contenido en hasta partes trozos de tamaño parecido. Cada
+    # corte va justo después de un salto de línea que no está dentro de un
+    # literal, donde el escáner siempre empieza un token nuevo. Devuelve los
+    # inicios de los trozos y el número de línea de cada uno (los saltos
+    # dentro de literales no cuentan, igual que en tokenize)
+    n = len(contenido)
+    multilinea = [mo.span() for mo in _literales_re.finditer(contenido)
+                  if contenido.find('\n', mo.start(), mo.end()) != -1]
+    inicios = [0]
+    lineas = [1]
+    k = 0
+    linea = 1
+    for parte in range(1, partes):
+        salto = contenido.find('\n', max(n * parte // partes, inicios[-1]))
+        while salto != -1:
+            # Los literales que acaban antes del salto quedan en este trozo
+            while k < len(multilinea) and multilinea[k][1] <= salto:
+                linea -= contenido.count('\n', *multilinea[k])
+                k += 1
+            if k < len(multilinea) and multilinea[k][0] < salto:
+                salto = contenido.find('\n', multilinea[k][1])
+            else:
+                break
+        if salto == -1 or salto + 1 >= n:
+            break
+        linea += contenido.count('\n', inicios[-1], salto + 1)
+        inicios.append(salto + 1)
+        lineas.append(linea)
+    return inicios, lineas
+
+
+def _tokenizar_trozo(trozo):
+    return _tokenizar(*trozo)
+
+
+def tokenize_paralelo(contenido, workers=None, partes=None):
+    # Tokeniza los trozos de cortes_seguros en un pool de procesos y une las
+    # listas. Cada trozo empieza una línea, así que las columnas no cambian,
+    # y recibe su número de línea inicial, así que no hay que corregir nada
+    from concurrent.futures import ProcessPoolExecutor
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if partes is None:
+        # Varios trozos por trabajador equilibran la carga
+        partes = workers * 4
+    inicios, lineas = cortes_seguros(contenido, partes)
+    fines = inicios[1:] + [len(contenido)]
+    trozos = ((contenido[inicio:fin], linea) for inicio, fin, linea in zip(inicios, fines, lineas))
+    tokens = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for parte in pool.map(_tokenizar_trozo, trozos):
+            tokens.extend(parte)
+    return tokens
+
+# Tamaño de lectura por defecto del tokenizador por bloques
+TAMANO_BLOQUE = 1 << 16
+
+def tokenize_stream(archivo, tamano_bloque=TAMANO_BLOQUE):
+    # Igual que tokenize, pero lee el archivo por bloques y produce los tokens
+    # de forma perezosa. Un token solo se emite si el autómata terminó con él
+    # antes del final del buffer (así "12" no se corta antes de ".5" ni una
+    # cadena "..." que sigue en el bloque siguiente). Lo no emitido se arrastra.
+    line_num = 1
+    line_start = 0   # Desplazamiento absoluto del inicio de la línea actual
+    base = 0         # Desplazamiento absoluto de buffer[0]
+    buffer = ''
+    fin = False
+    number_float, number_int = CODIGOS['NUMBER_FLOAT'], CODIGOS['NUMBER_INT']
+    newline, skip, comment = CODIGOS['NEWLINE'], CODIGOS['SKIP'], CODIGOS['COMMENT']
+    while not fin:
+        # Si el arrastre es grande (cadena muy larga) se lee en proporción
+        # para que el reescaneo del buffer siga siendo lineal
+        bloque = archivo.read(max(tamano_bloque, len(buffer)))
+        fin = not bloque
+        buffer += bloque
+        pos = 0
+        for tipo, start, pos in escanear(buffer, fin):
+            if tipo == newline:
+                line_start = base + pos
+                line_num += 1
+                continue
+            elif tipo == skip or tipo == comment:
+                continue
+            value = VALOR_FIJO[tipo]
+            if value is None:
+                value = buffer[start:pos]
+                if tipo == number_float:
+                    value = float(value)
+                elif tipo == number_int:
+                    value = int(value)
+            yield (TIPOS[tipo], value, line_num, base + start - line_start)
+        buffer = buffer[pos:]
+        base += pos
+
+class TokenBuffer:
+    # Almacén columnar de tokens: el tipo como entero pequeño, los
+    # desplazamientos de inicio y fin en el fuente y un índice con el inicio
+    # de cada línea. Valor, línea y columna se calculan solo al pedirlos
+    # (la línea por bisección), en lugar de guardar una tupla por token.
+    def __init__(self, contenido):
+        self.contenido = contenido
+        self.guardar(contenido)
+
+    def guardar(self, contenido):
+        # Llena las columnas con los tokens de escanear, sin espacios ni
+        # comentarios; los saltos de línea solo marcan el inicio de la
+        # siguiente
+        tipo_offset = 'I' if len(contenido) < 2 ** 32 else 'Q'
+        self.tipos = array('B')
+        self.inicios = array(tipo_offset)
+        self.fines = array(tipo_offset)
+        self.lineas = array(tipo_offset, [0])
+        agregar_tipo = self.tipos.append
+        agregar_inicio = self.inicios.append
+        agregar_fin = self.fines.append
+        agregar_linea = self.lineas.append
+        newline, skip, comment = CODIGOS['NEWLINE'], CODIGOS['SKIP'], CODIGOS['COMMENT']
+        for tipo, inicio, fin in escanear(contenido):
+            if tipo == skip or tipo == comment:
+                pass
+            elif tipo == newline:
+                agregar_linea(fin)
+            else:
+                agregar_tipo(tipo)
+                agregar_inicio(inicio)
+                agregar_fin(fin)
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def __getitem__(self, i):
+        # Reconstruye la tupla (kind, value, line_num, column) de tokenize
+        linea = self.linea(i)
+        return (TIPOS[self.tipos[i]], self.valor(i), linea, self.inicios[i] - self.lineas[linea - 1])
+
+    def __iter__(self):
+        for i in range(len(self.tipos)):
+            yield self[i]
+
+    def tipo(self, i):
+        return TIPOS[self.tipos[i]]
+
+    def valor(self, i):
+        tipo = self.tipos[i]
+        fijo = VALOR_FIJO[tipo]
+        if fijo is not None:
+            return fijo
+        texto = self.contenido[self.inicios[i]:self.fines[i]]
+        if tipo == CODIGOS['NUMBER_FLOAT']:
+            return float(texto)
+        elif tipo == CODIGOS['NUMBER_INT']:
+            return int(texto)
+        return texto
+
+    def linea(self, i):
+        return bisect_right(self.lineas, self.inicios[i])
+
+    def columna(self, i):
+        return self.inicios[i] - self.lineas[self.linea(i) - 1]
+
+    def rango_linea(self, offset):
+        # Número (base 1), inicio y fin de la línea que contiene offset
+        linea = bisect_right(self.lineas, offset)
+        fin = self.lineas[linea] if linea < len(self.lineas) else len(self.contenido) + 1
+        return linea, self.lineas[linea - 1], fin
+
+
+class TokenBufferMapeado(TokenBuffer):
+    # TokenBuffer sobre un archivo UTF-8 proyectado en memoria (mmap): el
+    # fuente no se copia ni se decodifica entero, los tokens son
+    # desplazamientos en bytes dentro del mapa (también las columnas) y el
+    # texto de un token solo se decodifica y convierte al pedir su valor. El
+    # mapa queda abierto hasta cerrar() o el final de un bloque with.
+    def __init__(self, ruta):
+        with open(ruta, 'rb') as archivo:
+            # mmap no admite archivos vacíos
+            vacio = os.fstat(archivo.fileno()).st_size == 0
+            self.mapa = b'' if vacio else mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self.contenido = self.mapa
+        self.guardar(self.mapa)
+
+    def valor(self, i):
+        tipo = self.tipos[i]
+        fijo = VALOR_FIJO[tipo]
+        if fijo is not None:
+            return fijo
+        texto = self.mapa[self.inicios[i]:self.fines[i]].decode('utf-8', 'replace')
+        if tipo == CODIGOS['NUMBER_FLOAT']:
+            return float(texto)
+        elif tipo == CODIGOS['NUMBER_INT']:
+            return int(texto)
+        return texto
+
+    def cerrar(self):
+        if isinstance(self.mapa, mmap.mmap):
+            self.mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
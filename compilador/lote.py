@@ -0,0 +1,162 @@
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .cache import CacheCompilacion
+from .lexico import TokenBuffer
+from .optimizador import Optimizer
+from .semantico import SemanticAnalyzer, SemanticError
+from .sintactico import Parser
+from .traductor import ASTToCTranslator
+
+# Resultado de compilar un archivo: el código C (None si se escribió en disco
+# o si hubo error), el mensaje de error, el tiempo de compilación en segundos
+# y, si se usa caché, si la compilación salió de ella
+Resultado = namedtuple('Resultado', ['ruta', 'codigo', 'error', 'tiempo', 'acierto'], defaults=(None,))
+
+Resumen = namedtuple('Resumen', ['archivos', 'correctos', 'errores', 'tiempo_cpu', 'tiempo_total', 'aciertos'],
+                     defaults=(0,))
+
+# Una caché por directorio y proceso, para que sus contadores sobrevivan
+# entre archivos del mismo trabajador
+_caches = {}
+
+
+def recolectar_archivos(rutas, extension='.txt'):
+    # Expande los directorios en los archivos fuente que contienen, en orden.
+    # Devuelve pares (archivo, ruta relativa): la del archivo dentro del
+    # directorio dado, o su nombre si se dio el archivo directamente. El .c
+    # se escribe en esa ruta relativa dentro del destino
+    archivos = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            for raiz, directorios, nombres in os.walk(ruta):
+                directorios.sort()
+                archivos.extend((os.path.join(raiz, nombre), os.path.relpath(os.path.join(raiz, nombre), ruta))
+                                for nombre in sorted(nombres) if nombre.endswith(extension))
+        else:
+            archivos.append((ruta, os.path.basename(ruta)))
+    return archivos
+
+
+def nombre_salida(relativa):
+    return os.path.splitext(relativa)[0] + '.c'
+
+
+def comprobar_salidas(archivos):
+    # Dos entradas con la misma ruta relativa (el mismo nombre en dos
+    # directorios dados, por ejemplo) se pisarían en el destino
+    vistos = {}
+    for ruta, relativa in archivos:
+        salida = nombre_salida(relativa)
+        if salida in vistos:
+            raise ValueError(f"{vistos[salida]} y {ruta} se escribirían en el mismo archivo {salida}")
+        vistos[salida] = ruta
+
+
+def _cache(directorio):
+    cache = _caches.get(directorio)
+    if cache is None:
+        cache = _caches[directorio] = CacheCompilacion(directorio)
+    return cache
+
+
+def compilar_archivo(ruta, destino=None, cache=None, relativa=None):
+    # Ejecuta todo el pipeline sobre un archivo. Los errores del programa (y
+    # los de lectura, como un archivo que no es UTF-8) se devuelven en el
+    # resultado para no detener el resto del lote. El .c se escribe en
+    # destino/relativa (por defecto, el nombre del archivo)
+    inicio = time.perf_counter()
+    acierto = None
+    try:
+        with open(ruta) as archivo:
+            contenido = archivo.read()
+        if cache is not None:
+            cache = _cache(cache)
+            aciertos = cache.aciertos
+            codigo = cache.compilar(contenido)
+            acierto = cache.aciertos > aciertos
+        else:
+            ast = Parser(TokenBuffer(contenido)).parse()
+            analizador = SemanticAnalyzer()
+            analizador.analyze(ast)
+            codigo = ASTToCTranslator(Optimizer(analizador.tipos).optimize(ast), analizador.tipos).translate()
+        if destino is not None:
+            # Se escribe desde el proceso trabajador para no devolver el
+            # código C entero por la tubería al proceso principal
+            nombre = os.path.join(destino, nombre_salida(relativa or os.path.basename(ruta)))
+            os.makedirs(os.path.dirname(nombre), exist_ok=True)
+            with open(nombre, 'w') as salida:
+                salida.write(codigo)
+            codigo = None
+    except (SyntaxError, SemanticError, OSError, UnicodeDecodeError) as error:
+        return Resultado(ruta, None, f'{type(error).__name__}: {error}', time.perf_counter() - inicio, acierto)
+    return Resultado(ruta, codigo, None, time.perf_counter() - inicio, acierto)
+
+
+def _compilar_par(par, destino, cache):
+    ruta, relativa = par
+    return compilar_archivo(ruta, destino, cache, relativa)
+
+
+def compilar_lote(rutas, workers=None, chunksize=None, destino=None, cache=None):
+    # Reparte los archivos entre un pool de procesos y devuelve los
+    # resultados en el mismo orden que los archivos, junto con el resumen.
+    # Si dos archivos escribirían el mismo .c en destino, ValueError antes
+    # de compilar nada
+    archivos = recolectar_archivos(rutas)
+    if destino is not None:
+        comprobar_salidas(archivos)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        # Unos cuatro grupos por trabajador equilibran la carga sin pagar
+        # una ida y vuelta entre procesos por cada archivo
+        chunksize = max(1, len(archivos) // (workers * 4))
+    if destino is not None:
+        os.makedirs(destino, exist_ok=True)
+    inicio = time.perf_counter()
+    compilar = partial(_compilar_par, destino=destino, cache=cache)
+    if workers == 1 or len(archivos) <= chunksize:
+        resultados = [compilar(par) for par in archivos]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultados = list(pool.map(compilar, archivos, chunksize=chunksize))
+    tiempo_total = time.perf_counter() - inicio
+    errores = sum(1 for resultado in resultados if resultado.error is not None)
+    resumen = Resumen(len(resultados), len(resultados) - errores, errores,
+                      sum(resultado.tiempo for resultado in resultados), tiempo_total,
+                      sum(1 for resultado in resultados if resultado.acierto))
+    return resultados, resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m compilador.lote', description='Compila muchos programas en paralelo.')
+    parser.add_argument('rutas', nargs='+', help='archivos fuente o directorios con archivos .txt')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='procesos trabajadores (por defecto, uno por núcleo)')
+    parser.add_argument('--chunksize', type=int, default=None, help='archivos por envío a cada trabajador')
+    parser.add_argument('-d', '--destino', default='.', help='directorio donde se escriben los .c')
+    parser.add_argument('--cache', metavar='DIRECTORIO', help='caché en disco de compilaciones')
+    args = parser.parse_args(argv)
+    try:
+        resultados, resumen = compilar_lote(args.rutas, args.workers, args.chunksize, args.destino, args.cache)
+    except ValueError as error:
+        print(f'error: {error}', file=sys.stderr)
+        return 2
+    for resultado in resultados:
+        estado = 'ok' if resultado.error is None else resultado.error
+        print(f'{resultado.ruta}\t{resultado.tiempo * 1000:.2f} ms\t{estado}')
+    print(f'{resumen.archivos} archivos, {resumen.correctos} correctos, {resumen.errores} con errores; '
+          f'{resumen.tiempo_cpu:.3f} s de compilación en {resumen.tiempo_total:.3f} s '
+          f'(x{resumen.tiempo_cpu / resumen.tiempo_total if resumen.tiempo_total else 0:.2f})')
+    if args.cache:
+        print(f'caché: {resumen.aciertos} aciertos de {resumen.archivos}')
+    return 1 if resumen.errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
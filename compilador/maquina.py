@@ -0,0 +1,590 @@
+import codecs
+import math
+import operator
+import sys
+from array import array
+from itertools import chain
+
+from .nodos import Cadena, Caracter, Identificador, Operacion, tabla_despacho
+from .semantico import CADENA, CARACTER, DECIMAL, ENTERO, SemanticError, tipo_hoja, tipo_operacion
+
+# Ejecución de programas sin compilador de C: CompiladorBytecode traduce el
+# AST a un Bytecode y MaquinaVirtual lo ejecuta con la misma semántica que el
+# C que genera ASTToCTranslator (enteros de 32 bits con desbordamiento
+# circular, división entera truncada, double de IEEE, ámbitos de bloque y la
+# variable del FOR local al bucle) y la misma salida que su entorno de PRINT.
+#
+# Es una máquina de pila con la cima en una variable aparte (tope), porque
+# las expresiones se anidan por la izquierda y casi nunca hace falta más de
+# un valor. Las variables, los literales y los temporales ocupan posiciones
+# numeradas de un mismo array de valores, así que los operandos de cada
+# instrucción son índices: "x + 1" es CARGAR x, SUMAR_ENTEROS <1>. Las
+# comparaciones de IF, WHILE y FOR van unidas a su salto y el FOR con límite
+# simple cierra cada vuelta con una sola instrucción (SIGUIENTE). Antes de
+# ejecutar, una tabla de despacho indexada por código de operación convierte
+# cada instrucción en una función con sus operandos ya leídos (código
+# enhebrado), y el bucle de ejecución solo llama a la de la posición actual.
+#
+# Formato del código (array de enteros, con los operandos tras el código de
+# operación):
+#   CARGAR v            tope = valores[v]
+#   GUARDAR v           valores[v] = tope
+#   GUARDAR_DECIMAL v   valores[v] = float(tope)
+#   EMPUJAR, SACAR      apila tope / lo recupera de la pila
+#   <operación> v       tope = tope <op> valores[v] (enteros o decimales)
+#   SI_<rel> v d        salta a d si tope <rel> valores[v] (SI_NO_<rel>: si no)
+#   SALTAR d
+#   INCREMENTAR v       valores[v] += 1
+#   SIGUIENTE v f d     valores[v] += 1 y salta a d si valores[v] <= valores[f]
+#   IMPRIMIR_<tipo>     escribe tope y un salto de línea
+#   LLAMAR f n          llama a la función f con los n valores de la pila
+#   FIN
+
+(FIN, CARGAR, GUARDAR, GUARDAR_DECIMAL, EMPUJAR, SACAR,
+ SUMAR_ENTEROS, RESTAR_ENTEROS, MULTIPLICAR_ENTEROS, DIVIDIR_ENTEROS,
+ SUMAR_DECIMALES, RESTAR_DECIMALES, MULTIPLICAR_DECIMALES, DIVIDIR_DECIMALES,
+ SI_MENOR, SI_MAYOR, SI_MENOR_IGUAL, SI_MAYOR_IGUAL, SI_DISTINTO,
+ SI_NO_MENOR, SI_NO_MAYOR, SI_NO_MENOR_IGUAL, SI_NO_MAYOR_IGUAL, SI_NO_DISTINTO,
+ SALTAR, INCREMENTAR, SIGUIENTE,
+ IMPRIMIR_ENTERO, IMPRIMIR_DECIMAL, IMPRIMIR_CARACTER, IMPRIMIR_CADENA, LLAMAR) = range(32)
+
+# Número de operandos de cada código de operación
+OPERANDOS = [1] * (LLAMAR + 1)
+OPERANDOS[FIN] = OPERANDOS[EMPUJAR] = OPERANDOS[SACAR] = 0
+OPERANDOS[IMPRIMIR_ENTERO:IMPRIMIR_CADENA + 1] = [0] * 4
+OPERANDOS[SI_MENOR:SI_NO_DISTINTO + 1] = [2] * 10
+OPERANDOS[LLAMAR] = 2
+OPERANDOS[SIGUIENTE] = 3
+
+OPERACIONES_ENTERAS = {'+': SUMAR_ENTEROS, '-': RESTAR_ENTEROS, '*': MULTIPLICAR_ENTEROS, '/': DIVIDIR_ENTEROS}
+OPERACIONES_DECIMALES = {'+': SUMAR_DECIMALES, '-': RESTAR_DECIMALES, '*': MULTIPLICAR_DECIMALES,
+                         '/': DIVIDIR_DECIMALES}
+SALTOS_SI = {'<': SI_MENOR, '>': SI_MAYOR, '<=': SI_MENOR_IGUAL, '>=': SI_MAYOR_IGUAL, '!=': SI_DISTINTO}
+SALTOS_SI_NO = {'<': SI_NO_MENOR, '>': SI_NO_MAYOR, '<=': SI_NO_MENOR_IGUAL, '>=': SI_NO_MAYOR_IGUAL,
+                '!=': SI_NO_DISTINTO}
+IMPRESIONES = {ENTERO: IMPRIMIR_ENTERO, DECIMAL: IMPRIMIR_DECIMAL, CARACTER: IMPRIMIR_CARACTER,
+               CADENA: IMPRIMIR_CADENA}
+
+# Valor de una variable declarada sin valor inicial (en C es indeterminado)
+INICIALES = {ENTERO: 0, DECIMAL: 0.0, CARACTER: 0, CADENA: ''}
+
+# Líneas de salida que se acumulan antes de escribirlas
+TAMANO_BUFFER = 4096
+
+
+class Bytecode:
+    def __init__(self, codigo, iniciales, funciones, posiciones):
+        self.codigo = codigo            # array('i') con instrucciones y operandos
+        self.iniciales = iniciales      # Valor inicial de cada posición de valores
+        self.funciones = funciones      # Nombres de las funciones de CALL, por índice
+        self.posiciones = posiciones    # Posición de código -> (línea, columna) en el fuente
+
+    def __repr__(self):
+        return f'Bytecode({len(self.codigo)} palabras, {len(self.iniciales)} valores, {len(self.funciones)} funciones)'
+
+
+class CompiladorBytecode:
+    def __init__(self, tipos):
+        # tipos es el de SemanticAnalyzer (con los temporales del Optimizer
+        # si el AST está optimizado)
+        self.tipos = tipos
+        self.despacho = tabla_despacho(self, 'compilar_')
+
+    def compilar(self, programa):
+        self.codigo = array('i')
+        self.iniciales = []
+        self.constantes = {}
+        self.funciones = {}
+        self.posiciones = {}
+        # Posición de valores de cada ranura de variable. Los ámbitos ya los
+        # ha resuelto el análisis semántico: cada uso de una variable lleva
+        # la ranura de su declaración
+        if programa.ranuras is None:
+            raise ValueError("El AST no tiene ranuras de variables: analízalo antes con SemanticAnalyzer")
+        self.variables = [None] * programa.ranuras
+        # Igual que en la traducción a C, las instrucciones con cuerpo
+        # devuelven lo que queda por compilar: sus instrucciones y funciones
+        # que cierran el bloque (parchear saltos)
+        despacho = self.despacho
+        pila = [iter(programa.instrucciones)]
+        while pila:
+            for elemento in pila[-1]:
+                if callable(elemento):
+                    elemento()
+                    continue
+                resto = despacho[type(elemento)](elemento)
+                if resto is not None:
+                    pila.append(iter(resto))
+                    break
+            else:
+                pila.pop()
+        self.codigo.append(FIN)
+        funciones = sorted(self.funciones, key=self.funciones.get)
+        return Bytecode(self.codigo, self.iniciales, funciones, self.posiciones)
+
+    def emitir(self, *palabras):
+        # Añade una instrucción y devuelve la posición de su último operando
+        self.codigo.extend(palabras)
+        return len(self.codigo) - 1
+
+    def parchear(self, hueco):
+        # El salto cuyo destino está en hueco va a la siguiente instrucción
+        self.codigo[hueco] = len(self.codigo)
+
+    def posicion_nueva(self, inicial):
+        self.iniciales.append(inicial)
+        return len(self.iniciales) - 1
+
+    def bloque(self, instrucciones, al_cerrar):
+        return chain(instrucciones, (al_cerrar,))
+
+    def declarar(self, nodo):
+        # Posición nueva para la variable de una declaración o un FOR
+        posicion = self.posicion_nueva(INICIALES[self.tipos.get(nodo.ranura, ENTERO)])
+        self.variables[nodo.ranura] = posicion
+        return posicion
+
+    def operando(self, hoja):
+        # Posición de valores con el valor de una hoja
+        clase = type(hoja)
+        if clase is Identificador:
+            return self.variables[hoja.ranura]
+        valor = hoja.valor
+        if clase is Cadena:
+            valor = valor[1:-1]
+            if '\\' in valor:
+                valor = codecs.decode(valor, 'unicode_escape')
+        elif clase is Caracter:
+            valor = ord(valor[1])
+        # Con repr, 0 y 0.0 (o 0.0 y -0.0) no comparten posición
+        clave = (clase, repr(valor))
+        posicion = self.constantes.get(clave)
+        if posicion is None:
+            posicion = self.constantes[clave] = self.posicion_nueva(valor)
+        return posicion
+
+    def expresion(self, nodo):
+        # Deja el valor de la expresión en tope y devuelve su tipo
+        rama = []
+        while isinstance(nodo, Operacion):
+            rama.append(nodo)
+            nodo = nodo.izquierda
+        self.emitir(CARGAR, self.operando(nodo))
+        tipo = tipo_hoja(nodo, self.tipos)
+        for operacion in reversed(rama):
+            derecha = operacion.derecha
+            if isinstance(derecha, Operacion):
+                self.emitir(EMPUJAR)
+                tipo_derecha = self.expresion(derecha)
+                posicion = self.posicion_nueva(0)
+                self.emitir(GUARDAR, posicion, SACAR)
+            else:
+                tipo_derecha = tipo_hoja(derecha, self.tipos)
+                posicion = self.operando(derecha)
+            tipo = tipo_operacion(tipo, operacion.operador, tipo_derecha, False, operacion.linea, operacion.columna)
+            operaciones = OPERACIONES_DECIMALES if tipo == DECIMAL else OPERACIONES_ENTERAS
+            if operaciones[operacion.operador] == DIVIDIR_ENTEROS:
+                self.posiciones[len(self.codigo)] = (operacion.linea, operacion.columna)
+            self.emitir(operaciones[operacion.operador], posicion)
+        return tipo
+
+    def condicion(self, condicion, si, destino=0):
+        # Emite el salto a destino si la condición se cumple (o si no se
+        # cumple, con si False) y devuelve la posición de su destino
+        saltos = SALTOS_SI if si else SALTOS_SI_NO
+        if condicion.operador not in saltos:
+            raise SemanticError(f"Operador '{condicion.operador}' no válido.", condicion.linea, condicion.columna)
+        derecha = condicion.derecha
+        if isinstance(derecha, Operacion):
+            self.expresion(derecha)
+            posicion = self.posicion_nueva(0)
+            self.emitir(GUARDAR, posicion)
+        else:
+            posicion = self.operando(derecha)
+        self.expresion(condicion.izquierda)
+        return self.emitir(saltos[condicion.operador], posicion, destino)
+
+    def guardar(self, ranura, posicion, tipo):
+        # Como en C, lo que se guarda en una variable double se convierte
+        if self.tipos.get(ranura) == DECIMAL and tipo != DECIMAL:
+            self.emitir(GUARDAR_DECIMAL, posicion)
+        else:
+            self.emitir(GUARDAR, posicion)
+
+    def compilar_declaracion(self, nodo):
+        if nodo.expresion is not None:
+            tipo = self.expresion(nodo.expresion)
+            self.guardar(nodo.ranura, self.declarar(nodo), tipo)
+        else:
+            self.declarar(nodo)
+
+    def compilar_asignacion(self, nodo):
+        tipo = self.expresion(nodo.expresion)
+        self.guardar(nodo.ranura, self.variables[nodo.ranura], tipo)
+
+    def compilar_impresion(self, nodo):
+        tipo = self.expresion(nodo.expresion)
+        self.emitir(IMPRESIONES[tipo or ENTERO])
+
+    def compilar_llamada_funcion(self, nodo):
+        for argumento in nodo.argumentos:
+            self.expresion(argumento)
+            self.emitir(EMPUJAR)
+        funcion = self.funciones.setdefault(nodo.id, len(self.funciones))
+        self.posiciones[len(self.codigo)] = (nodo.linea, nodo.columna)
+        self.emitir(LLAMAR, funcion, len(nodo.argumentos))
+
+    def compilar_condicional(self, nodo):
+        hueco = self.condicion(nodo.condicion, False)
+        if not nodo.instrucciones_else:
+            return self.bloque(nodo.instrucciones_then, lambda: self.parchear(hueco))
+        salto_fin = []
+
+        def entre_ramas():
+            salto_fin.append(self.emitir(SALTAR, 0))
+            self.parchear(hueco)
+        return chain(self.bloque(nodo.instrucciones_then, entre_ramas),
+                     self.bloque(nodo.instrucciones_else, lambda: self.parchear(salto_fin[0])))
+
+    def compilar_bucle_while(self, nodo):
+        # La condición va al final del cuerpo: una vuelta es un solo salto
+        hueco = self.emitir(SALTAR, 0)
+        cuerpo = len(self.codigo)
+
+        def cerrar():
+            self.parchear(hueco)
+            self.condicion(nodo.condicion, True, cuerpo)
+        return self.bloque(nodo.instrucciones, cerrar)
+
+    def compilar_bucle_for(self, nodo):
+        # for (T id = inicio; id <= fin; id++): la variable es local al bucle
+        # y el límite se evalúa en cada vuelta
+        tipo = self.expresion(nodo.inicio)
+        variable = self.declarar(nodo)
+        self.guardar(nodo.ranura, variable, tipo)
+        fin = nodo.fin
+        if not isinstance(fin, Operacion):
+            limite = self.operando(fin)
+            self.emitir(CARGAR, variable)
+            hueco = self.emitir(SI_NO_MENOR_IGUAL, limite, 0)
+            cuerpo = len(self.codigo)
+
+            def cerrar():
+                self.emitir(SIGUIENTE, variable, limite, cuerpo)
+                self.parchear(hueco)
+        else:
+            hueco = self.emitir(SALTAR, 0)
+            cuerpo = len(self.codigo)
+
+            def cerrar():
+                self.emitir(INCREMENTAR, variable)
+                self.parchear(hueco)
+                self.expresion(fin)
+                limite = self.posicion_nueva(0)
+                self.emitir(GUARDAR, limite, CARGAR, variable, SI_MENOR_IGUAL, limite, cuerpo)
+        return self.bloque(nodo.instrucciones, cerrar)
+
+
+class ErrorEjecucion(Exception):
+    def __init__(self, mensaje, linea=None, columna=None):
+        self.linea = linea
+        self.columna = columna
+        if linea:
+            mensaje = f"{mensaje.rstrip('.')} (línea {linea}, columna {columna})."
+        super().__init__(mensaje)
+
+
+def _envolver(valor):
+    # Resultado entero de C con desbordamiento circular de 32 bits
+    return ((valor + 2 ** 31) & 0xFFFFFFFF) - 2 ** 31
+
+
+# NaN que produce el procesador para 0.0 / 0.0 (en x86, con el signo negativo)
+_NAN = math.inf - math.inf
+
+
+def _dividir_decimales(izquierda, derecha):
+    if derecha:
+        return izquierda / derecha
+    # División por cero de IEEE, como en C
+    if izquierda != izquierda:
+        return izquierda
+    if izquierda == 0:
+        return _NAN
+    return math.copysign(math.inf, izquierda) * math.copysign(1.0, derecha)
+
+
+def _formatear_decimal(valor):
+    # Como %g de printf, que a diferencia de Python escribe el signo de NaN
+    if valor != valor:
+        return '-nan\n' if math.copysign(1.0, valor) < 0 else 'nan\n'
+    return '%g\n' % valor
+
+
+class MaquinaVirtual:
+    def __init__(self, funciones=None):
+        # funciones: nombre -> función de Python a la que llaman los CALL
+        # del programa, con sus argumentos (los char, como su código)
+        self.funciones = dict(funciones or {})
+
+    def ejecutar(self, bytecode, salida=None):
+        salida = sys.stdout if salida is None else salida
+        destinos = []
+        for nombre in bytecode.funciones:
+            if nombre not in self.funciones:
+                raise ErrorEjecucion(f"Función '{nombre}' no definida.")
+            destinos.append(self.funciones[nombre])
+        partes = []
+        hilo = self.enlazar(bytecode, partes, salida, destinos)
+        # Cada manejador ejecuta su instrucción y devuelve la posición de la
+        # siguiente (None tras FIN)
+        pc = 0
+        try:
+            while pc is not None:
+                pc = hilo[pc]()
+        finally:
+            # Lo impreso antes de un error también se escribe
+            salida.write(''.join(partes))
+
+    def enlazar(self, bytecode, partes, salida, destinos):
+        # Devuelve una lista con el manejador de cada instrucción en la
+        # posición de su código de operación. Los manejadores llevan sus
+        # operandos ya leídos y comparten los valores, la pila y la cima, así
+        # que ejecutar una instrucción es una llamada y un salto es devolver
+        # otra posición, sin volver a decodificar el código
+        valores = list(bytecode.iniciales)
+        pila = []
+        tope = None
+
+        def fin(pc):
+            return lambda: None
+
+        def cargar(pc, posicion):
+            def manejador():
+                nonlocal tope
+                tope = valores[posicion]
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def guardar(pc, posicion):
+            def manejador():
+                valores[posicion] = tope
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def guardar_decimal(pc, posicion):
+            def manejador():
+                valores[posicion] = float(tope)
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def empujar(pc):
+            def manejador():
+                pila.append(tope)
+                return siguiente
+            siguiente = pc + 1
+            return manejador
+
+        def sacar(pc):
+            def manejador():
+                nonlocal tope
+                tope = pila.pop()
+                return siguiente
+            siguiente = pc + 1
+            return manejador
+
+        def sumar_enteros(pc, posicion):
+            def manejador():
+                nonlocal tope
+                tope += valores[posicion]
+                if not -2147483648 <= tope <= 2147483647:
+                    tope = _envolver(tope)
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def restar_enteros(pc, posicion):
+            def manejador():
+                nonlocal tope
+                tope -= valores[posicion]
+                if not -2147483648 <= tope <= 2147483647:
+                    tope = _envolver(tope)
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def multiplicar_enteros(pc, posicion):
+            def manejador():
+                nonlocal tope
+                tope *= valores[posicion]
+                if not -2147483648 <= tope <= 2147483647:
+                    tope = _envolver(tope)
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def dividir_enteros(pc, posicion):
+            def manejador():
+                nonlocal tope
+                divisor = valores[posicion]
+                if divisor == 0:
+                    raise ErrorEjecucion("División entera por cero.", *bytecode.posiciones.get(pc, ()))
+                cociente = abs(tope) // abs(divisor)
+                tope = -cociente if (tope < 0) != (divisor < 0) else cociente
+                if tope == 2147483648:
+                    tope = -2147483648
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def sumar_decimales(pc, posicion):
+            def manejador():
+                nonlocal tope
+                tope += valores[posicion]
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def restar_decimales(pc, posicion):
+            def manejador():
+                nonlocal tope
+                tope -= valores[posicion]
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def multiplicar_decimales(pc, posicion):
+            def manejador():
+                nonlocal tope
+                tope *= valores[posicion]
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def dividir_decimales(pc, posicion):
+            def manejador():
+                nonlocal tope
+                tope = _dividir_decimales(tope, valores[posicion])
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def saltar_si(relacion, cumplida):
+            # SI_<rel> salta si la relación se cumple y SI_NO_<rel> si no se
+            # cumple (que con NaN no es la relación contraria)
+            def enlazar_salto(pc, posicion, destino):
+                def manejador():
+                    return si if relacion(tope, valores[posicion]) else no
+                si, no = (destino, pc + 3) if cumplida else (pc + 3, destino)
+                return manejador
+            return enlazar_salto
+
+        def saltar(pc, destino):
+            return lambda: destino
+
+        def incrementar(pc, variable):
+            def manejador():
+                valor = valores[variable] + 1
+                if valor == 2147483648 and type(valor) is int:
+                    valor = -2147483648
+                valores[variable] = valor
+                return siguiente
+            siguiente = pc + 2
+            return manejador
+
+        def siguiente_vuelta(pc, variable, limite, cuerpo):
+            def manejador():
+                valor = valores[variable] + 1
+                if valor == 2147483648 and type(valor) is int:
+                    valor = -2147483648
+                valores[variable] = valor
+                return cuerpo if valor <= valores[limite] else siguiente
+            siguiente = pc + 4
+            return manejador
+
+        def imprimir(formatear):
+            def enlazar_impresion(pc):
+                def manejador():
+                    partes.append(formatear(tope))
+                    if len(partes) >= TAMANO_BUFFER:
+                        salida.write(''.join(partes))
+                        partes.clear()
+                    return siguiente
+                siguiente = pc + 1
+                return manejador
+            return enlazar_impresion
+
+        def llamar(pc, funcion, cantidad):
+            def manejador():
+                argumentos = pila[len(pila) - cantidad:]
+                del pila[len(pila) - cantidad:]
+                salida.write(''.join(partes))
+                partes.clear()
+                destino(*argumentos)
+                return siguiente
+            destino = destinos[funcion]
+            siguiente = pc + 3
+            return manejador
+
+        # Tabla de despacho: el enlazador de cada código de operación, que
+        # recibe la posición de la instrucción y sus operandos
+        enlazadores = [None] * (LLAMAR + 1)
+        enlazadores[FIN] = fin
+        enlazadores[CARGAR] = cargar
+        enlazadores[GUARDAR] = guardar
+        enlazadores[GUARDAR_DECIMAL] = guardar_decimal
+        enlazadores[EMPUJAR] = empujar
+        enlazadores[SACAR] = sacar
+        enlazadores[SUMAR_ENTEROS] = sumar_enteros
+        enlazadores[RESTAR_ENTEROS] = restar_enteros
+        enlazadores[MULTIPLICAR_ENTEROS] = multiplicar_enteros
+        enlazadores[DIVIDIR_ENTEROS] = dividir_enteros
+        enlazadores[SUMAR_DECIMALES] = sumar_decimales
+        enlazadores[RESTAR_DECIMALES] = restar_decimales
+        enlazadores[MULTIPLICAR_DECIMALES] = multiplicar_decimales
+        enlazadores[DIVIDIR_DECIMALES] = dividir_decimales
+        for codigo_si, codigo_si_no, relacion in ((SI_MENOR, SI_NO_MENOR, operator.lt),
+                                                  (SI_MAYOR, SI_NO_MAYOR, operator.gt),
+                                                  (SI_MENOR_IGUAL, SI_NO_MENOR_IGUAL, operator.le),
+                                                  (SI_MAYOR_IGUAL, SI_NO_MAYOR_IGUAL, operator.ge),
+                                                  (SI_DISTINTO, SI_NO_DISTINTO, operator.ne)):
+            enlazadores[codigo_si] = saltar_si(relacion, True)
+            enlazadores[codigo_si_no] = saltar_si(relacion, False)
+        enlazadores[SALTAR] = saltar
+        enlazadores[INCREMENTAR] = incrementar
+        enlazadores[SIGUIENTE] = siguiente_vuelta
+        enlazadores[IMPRIMIR_ENTERO] = imprimir(lambda valor: f'{valor}\n')
+        enlazadores[IMPRIMIR_DECIMAL] = imprimir(_formatear_decimal)
+        enlazadores[IMPRIMIR_CARACTER] = imprimir(lambda valor: f'{chr(valor)}\n')
+        enlazadores[IMPRIMIR_CADENA] = imprimir(lambda valor: f'{valor}\n')
+        enlazadores[LLAMAR] = llamar
+
+        codigo = bytecode.codigo.tolist()
+        hilo = [None] * len(codigo)
+        pc = 0
+        while pc < len(codigo):
+            op = codigo[pc]
+            if not 0 <= op < len(enlazadores):
+                raise ErrorEjecucion(f"Instrucción desconocida {op} en {pc}.")
+            proxima = pc + 1 + OPERANDOS[op]
+            hilo[pc] = enlazadores[op](pc, *codigo[pc + 1:proxima])
+            pc = proxima
+        return hilo
+
+
+def ejecutar(fuente, funciones=None, salida=None, optimizar=True):
+    # Analiza, compila a bytecode y ejecuta el programa fuente
+    from .lexico import TokenBuffer
+    from .sintactico import Parser
+    from .semantico import SemanticAnalyzer
+    ast = Parser(TokenBuffer(fuente)).parse()
+    analizador = SemanticAnalyzer()
+    analizador.analyze(ast)
+    if optimizar:
+        from .optimizador import Optimizer
+        ast = Optimizer(analizador.tipos).optimize(ast)
+    bytecode = CompiladorBytecode(analizador.tipos).compilar(ast)
+    MaquinaVirtual(funciones).ejecutar(bytecode, salida)
@@ -0,0 +1,166 @@
+import hashlib
+import itertools
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+from .cache import CacheCompilacion
+
+# Compilación y ejecución del C generado con el compilador de C del sistema.
+# Los binarios se guardan en una caché en disco cuya clave es un hash del
+# compilador de C, de sus opciones y del código C, así que volver a ejecutar
+# un programa sin cambios no vuelve a llamar a cc. La caché comparte con
+# CacheCompilacion la expulsión LRU por tamaño y las escrituras atómicas.
+# Mientras un binario se ejecuta se tiene un enlace duro propio a él (.run,
+# que la expulsión no cuenta ni borra), así que otro proceso puede expulsar
+# la entrada sin que la ejecución en curso se quede sin archivo.
+
+OPCIONES_POR_DEFECTO = ('-O2',)
+# Sufijos únicos de los enlaces de ejecución de este proceso
+_reservas = itertools.count()
+TAMANO_MAXIMO_BINARIOS = 256 * 1024 * 1024
+
+
+def directorio_por_defecto():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'compilador', 'binarios')
+
+
+def buscar_cc():
+    return shutil.which('cc') or shutil.which('gcc') or shutil.which('clang')
+
+
+class ErrorCompilacionC(Exception):
+    def __init__(self, mensaje, errores=''):
+        self.errores = errores
+        super().__init__(f'{mensaje}\n{errores}'.rstrip())
+
+
+class CacheBinarios(CacheCompilacion):
+    extension = '.bin'
+
+    def __init__(self, directorio=None, tamano_maximo=TAMANO_MAXIMO_BINARIOS, **opciones):
+        super().__init__(directorio or directorio_por_defecto(), tamano_maximo, **opciones)
+
+    def clave(self, codigo, cc, opciones):
+        # El compilador entra por ruta, tamaño y fecha: actualizarlo invalida
+        # sus binarios
+        estado = os.stat(cc)
+        huella = hashlib.sha256(f'{cc}\0{estado.st_size}\0{estado.st_mtime_ns}\0'.encode())
+        huella.update('\0'.join(opciones).encode())
+        huella.update(b'\0')
+        huella.update(codigo.encode('utf-8'))
+        return huella.hexdigest()
+
+    @contextmanager
+    def reservar(self, codigo, cc, opciones):
+        # Da (ruta, en_cache) de un binario del código C, compilándolo solo si
+        # no está. La ruta es un enlace duro propio que dura lo que el with:
+        # aunque otro proceso expulse la entrada, el binario sigue existiendo
+        ruta = self.ruta(self.clave(codigo, cc, opciones))
+        reserva = f'{ruta[:-len(self.extension)]}.{os.getpid()}.{next(_reservas)}.run'
+        try:
+            try:
+                os.link(ruta, reserva)
+            except FileNotFoundError:
+                self.fallos += 1
+                self.compilar_binario(codigo, cc, opciones, ruta, reserva)
+                en_cache = False
+            else:
+                self.aciertos += 1
+                en_cache = True
+                try:
+                    # La fecha de modificación marca el último uso para la
+                    # expulsión LRU
+                    os.utime(ruta)
+                except FileNotFoundError:
+                    pass
+            yield reserva, en_cache
+        finally:
+            try:
+                os.unlink(reserva)
+            except FileNotFoundError:
+                pass
+
+    def compilar_binario(self, codigo, cc, opciones, ruta, reserva=None):
+        # Con reserva, el binario se enlaza también ahí antes de publicarlo,
+        # por si la expulsión que sigue a la escritura lo borra
+        directorio = os.path.dirname(ruta)
+        os.makedirs(directorio, exist_ok=True)
+        # El C y el binario se escriben en temporales y el binario se mueve a
+        # su sitio al terminar, para que otro proceso nunca vea uno a medias
+        descriptor, fuente = tempfile.mkstemp(dir=directorio, suffix='.c')
+        temporal = fuente[:-2] + '.tmp'
+        try:
+            with os.fdopen(descriptor, 'w') as archivo:
+                archivo.write(codigo)
+            proceso = subprocess.run([cc, *opciones, '-o', temporal, fuente], capture_output=True, text=True)
+            if proceso.returncode != 0:
+                raise ErrorCompilacionC(f'{cc} terminó con código {proceso.returncode}.', proceso.stderr)
+            if reserva is not None:
+                os.link(temporal, reserva)
+            os.replace(temporal, ruta)
+        finally:
+            for resto in (fuente, temporal):
+                try:
+                    os.unlink(resto)
+                except FileNotFoundError:
+                    pass
+        self.anotar_escritura()
+
+
+class ResultadoNativo:
+    def __init__(self, salida, codigo, en_cache, tiempo_traduccion, tiempo_compilacion, tiempo_ejecucion):
+        self.salida = salida
+        self.codigo = codigo        # Código de salida del programa (negativo si lo terminó una señal)
+        self.en_cache = en_cache    # Si el binario ya estaba compilado
+        self.tiempo_traduccion = tiempo_traduccion
+        self.tiempo_compilacion = tiempo_compilacion
+        self.tiempo_ejecucion = tiempo_ejecucion
+
+    def __repr__(self):
+        return (f'ResultadoNativo(codigo={self.codigo}, en_cache={self.en_cache}, '
+                f'traduccion={self.tiempo_traduccion:.4f}s, compilacion={self.tiempo_compilacion:.4f}s, '
+                f'ejecucion={self.tiempo_ejecucion:.4f}s)')
+
+
+class EjecutorNativo:
+    def __init__(self, cc=None, opciones=OPCIONES_POR_DEFECTO, cache=None):
+        # opciones: lista de opciones de cc, o un texto que se separa como
+        # en la shell ('-O3 -march=native')
+        cc = cc or buscar_cc()
+        if cc is None:
+            raise ErrorCompilacionC('No se encontró un compilador de C (cc, gcc o clang).')
+        ruta = shutil.which(cc)
+        if ruta is None:
+            raise ErrorCompilacionC(f"No se encontró el compilador de C '{cc}'.")
+        self.cc = os.path.realpath(ruta)
+        self.opciones = tuple(shlex.split(opciones) if isinstance(opciones, str) else opciones)
+        self.cache = cache if cache is not None else CacheBinarios()
+
+    def reservar(self, codigo):
+        # with: (ruta del binario del código C, si ya estaba en la caché)
+        return self.cache.reservar(codigo, self.cc, self.opciones)
+
+    def ejecutar_c(self, codigo, entrada=None, timeout=None):
+        inicio = time.perf_counter()
+        with self.reservar(codigo) as (ruta, en_cache):
+            compilado = time.perf_counter()
+            proceso = subprocess.run([ruta], input=entrada, capture_output=True, text=True, timeout=timeout)
+            fin = time.perf_counter()
+        return ResultadoNativo(proceso.stdout, proceso.returncode, en_cache, 0.0, compilado - inicio, fin - compilado)
+
+    def ejecutar(self, fuente, optimizar=True, cache=None, entrada=None, timeout=None):
+        # Traduce el programa fuente (con una CacheCompilacion, si se da) y
+        # ejecuta su binario
+        from . import compile
+        inicio = time.perf_counter()
+        codigo = compile(fuente, cache=cache, optimizar=optimizar)
+        resultado = self.ejecutar_c(codigo, entrada, timeout)
+        resultado.tiempo_traduccion = time.perf_counter() - inicio - resultado.tiempo_compilacion - \
+            resultado.tiempo_ejecucion
+        return resultado
@@ -0,0 +1,201 @@
+# Nodos del AST. Cada clase declara __slots__ con sus campos más la línea y
+# la columna del token con que empieza, así que no hay un dict por nodo y las
+# posiciones quedan disponibles para los mensajes de error sin otra pasada.
+# El atributo tipo da el nombre del método que procesa la clase en cada
+# recorrido (visit_<tipo>, translate_<tipo>, ...), que tabla_despacho
+# resuelve una sola vez por recorrido en lugar de una vez por nodo.
+#
+# El análisis semántico numera las variables declaradas (una ranura por
+# declaración, de 0 en adelante) y anota la ranura en las declaraciones, las
+# asignaciones, los FOR y cada Identificador que usa una variable, además del
+# total en el Programa. Las ranuras no forman parte de campos: son del
+# análisis, no de la sintaxis, y valen None hasta que se analiza el AST.
+
+
+class Nodo:
+    __slots__ = ('linea', 'columna')
+    tipo = None
+    campos = ()
+
+    def __repr__(self):
+        valores = ', '.join(repr(getattr(self, campo)) for campo in self.campos)
+        return f'{type(self).__name__}({valores})'
+
+
+class Programa(Nodo):
+    __slots__ = ('instrucciones', 'ranuras')
+    tipo = 'programa'
+    campos = ('instrucciones',)
+
+    def __init__(self, instrucciones, linea=0, columna=0, ranuras=None):
+        self.instrucciones = instrucciones
+        self.ranuras = ranuras
+        self.linea = linea
+        self.columna = columna
+
+
+class Declaracion(Nodo):
+    # expresion es None si la variable se declara sin valor inicial
+    __slots__ = ('id', 'expresion', 'ranura')
+    tipo = 'declaracion'
+    campos = ('id', 'expresion')
+
+    def __init__(self, id, expresion=None, linea=0, columna=0, ranura=None):
+        self.id = id
+        self.expresion = expresion
+        self.ranura = ranura
+        self.linea = linea
+        self.columna = columna
+
+
+class Asignacion(Nodo):
+    __slots__ = ('id', 'expresion', 'ranura')
+    tipo = 'asignacion'
+    campos = ('id', 'expresion')
+
+    def __init__(self, id, expresion, linea=0, columna=0, ranura=None):
+        self.id = id
+        self.expresion = expresion
+        self.ranura = ranura
+        self.linea = linea
+        self.columna = columna
+
+
+class Condicional(Nodo):
+    # instrucciones_else es una lista vacía si no hay ELSE
+    __slots__ = ('condicion', 'instrucciones_then', 'instrucciones_else')
+    tipo = 'condicional'
+    campos = __slots__
+
+    def __init__(self, condicion, instrucciones_then, instrucciones_else, linea=0, columna=0):
+        self.condicion = condicion
+        self.instrucciones_then = instrucciones_then
+        self.instrucciones_else = instrucciones_else
+        self.linea = linea
+        self.columna = columna
+
+
+class BucleWhile(Nodo):
+    __slots__ = ('condicion', 'instrucciones')
+    tipo = 'bucle_while'
+    campos = __slots__
+
+    def __init__(self, condicion, instrucciones, linea=0, columna=0):
+        self.condicion = condicion
+        self.instrucciones = instrucciones
+        self.linea = linea
+        self.columna = columna
+
+
+class BucleFor(Nodo):
+    __slots__ = ('id', 'inicio', 'fin', 'instrucciones', 'ranura')
+    tipo = 'bucle_for'
+    campos = ('id', 'inicio', 'fin', 'instrucciones')
+
+    def __init__(self, id, inicio, fin, instrucciones, linea=0, columna=0, ranura=None):
+        self.id = id
+        self.inicio = inicio
+        self.fin = fin
+        self.instrucciones = instrucciones
+        self.ranura = ranura
+        self.linea = linea
+        self.columna = columna
+
+
+class Impresion(Nodo):
+    __slots__ = ('expresion',)
+    tipo = 'impresion'
+    campos = __slots__
+
+    def __init__(self, expresion, linea=0, columna=0):
+        self.expresion = expresion
+        self.linea = linea
+        self.columna = columna
+
+
+class LlamadaFuncion(Nodo):
+    __slots__ = ('id', 'argumentos')
+    tipo = 'llamada_funcion'
+    campos = __slots__
+
+    def __init__(self, id, argumentos, linea=0, columna=0):
+        self.id = id
+        self.argumentos = argumentos
+        self.linea = linea
+        self.columna = columna
+
+
+class Operacion(Nodo):
+    # Operación binaria; su posición es la de su operando izquierdo
+    __slots__ = ('izquierda', 'operador', 'derecha')
+    campos = __slots__
+
+    def __init__(self, izquierda, operador, derecha, linea=0, columna=0):
+        self.izquierda = izquierda
+        self.operador = operador
+        self.derecha = derecha
+        self.linea = linea
+        self.columna = columna
+
+
+class Expresion(Operacion):
+    __slots__ = ()
+    tipo = 'expresion'
+
+
+class Condicion(Operacion):
+    __slots__ = ()
+    tipo = 'condicion'
+
+
+class Hoja(Nodo):
+    # Operando simple: valor es el nombre de un identificador, el int o float
+    # de un número o el texto de un literal tal como aparece en el fuente
+    __slots__ = ('valor',)
+    campos = __slots__
+
+    def __init__(self, valor, linea=0, columna=0):
+        self.valor = valor
+        self.linea = linea
+        self.columna = columna
+
+
+class Identificador(Hoja):
+    __slots__ = ('ranura',)
+    tipo = 'identificador'
+
+    def __init__(self, valor, linea=0, columna=0, ranura=None):
+        self.valor = valor
+        self.ranura = ranura
+        self.linea = linea
+        self.columna = columna
+
+
+class Numero(Hoja):
+    __slots__ = ()
+    tipo = 'numero'
+
+
+class Cadena(Hoja):
+    __slots__ = ()
+    tipo = 'cadena'
+
+
+class Caracter(Hoja):
+    __slots__ = ()
+    tipo = 'caracter'
+
+
+CLASES = (Programa, Declaracion, Asignacion, Condicional, BucleWhile, BucleFor, Impresion,
+          LlamadaFuncion, Expresion, Condicion, Identificador, Numero, Cadena, Caracter)
+
+
+def tabla_despacho(objeto, prefijo, defecto=None):
+    # Diccionario clase -> método prefijo + tipo de objeto. Las clases sin
+    # método usan defecto, o se omiten si es None
+    tabla = {}
+    for clase in CLASES:
+        metodo = getattr(objeto, prefijo + clase.tipo, defecto)
+        if metodo is not None:
+            tabla[clase] = metodo
+    return tabla
@@ -0,0 +1,470 @@
+from itertools import chain
+
+from .nodos import (BucleFor, BucleWhile, Condicion, Condicional, Declaracion, Asignacion, Expresion, Identificador,
+                    Impresion, LlamadaFuncion, Numero, Operacion, Programa)
+from .semantico import CARACTER, ENTERO, tipo_expresion, tipo_hoja, variables_expresion
+
+# Optimización entre el análisis semántico y la traducción: pliega la
+# aritmética entre literales numéricos y elimina las ramas de IF con
+# condición constante, los WHILE que nunca se ejecutan, los FOR con límites
+# literales que no dan ninguna vuelta y los IF que quedan vacíos. Los
+# resultados respetan la semántica de C del código que se habría generado:
+# división entera truncada, enteros de 32 bits y aritmética double en
+# cuanto interviene un decimal; si un cálculo no es representable igual
+# (desbordamiento, división por cero, infinito) se deja sin plegar.
+#
+# El AST original no se modifica: los nodos que no cambian se comparten con
+# el resultado, así que el mismo AST puede volver a traducirse (por ejemplo
+# desde compilador.incremental).
+#
+# Con los tipos del análisis semántico, además, optimiza los bucles: las
+# subexpresiones invariantes (sin variables que se asignen en el cuerpo) y
+# el límite de los FOR se calculan una vez antes del bucle en variables
+# temporales, y en los FOR las multiplicaciones de la variable del bucle
+# por un entero invariante se sustituyen por un temporal al que se suma el
+# factor al final de cada vuelta. Solo se sacan del bucle expresiones que no
+# pueden fallar (sin divisiones salvo por un literal distinto de cero), ya
+# que se calculan aunque el bucle no dé ninguna vuelta. Cada bucle solo
+# extrae las expresiones de su propio nivel: las de un bucle interior se
+# sacan delante de ese bucle, dentro del cuerpo del exterior.
+
+INT_MIN = -2 ** 31 + 1  # -2**31 no se puede escribir como literal int en C
+INT_MAX = 2 ** 31 - 1
+
+
+def _numero(nodo):
+    # Valor del nodo si es un literal numérico representable como en C
+    if type(nodo) is Numero:
+        valor = nodo.valor
+        if type(valor) is float or INT_MIN <= valor <= INT_MAX:
+            return valor
+    return None
+
+
+def calcular(izquierda, operador, derecha):
+    # Resultado de C para izquierda operador derecha, o None si no se pliega
+    if type(izquierda) is int and type(derecha) is int:
+        if operador == '+':
+            resultado = izquierda + derecha
+        elif operador == '-':
+            resultado = izquierda - derecha
+        elif operador == '*':
+            resultado = izquierda * derecha
+        elif operador == '/' and derecha != 0:
+            resultado = abs(izquierda) // abs(derecha)
+            if (izquierda < 0) != (derecha < 0):
+                resultado = -resultado
+        else:
+            return None
+        return resultado if INT_MIN <= resultado <= INT_MAX else None
+    izquierda, derecha = float(izquierda), float(derecha)
+    if operador == '+':
+        resultado = izquierda + derecha
+    elif operador == '-':
+        resultado = izquierda - derecha
+    elif operador == '*':
+        resultado = izquierda * derecha
+    elif operador == '/' and derecha != 0:
+        resultado = izquierda / derecha
+    else:
+        return None
+    return resultado if abs(resultado) != float('inf') else None
+
+
+def comparar(izquierda, operador, derecha):
+    if operador == '<':
+        return izquierda < derecha
+    elif operador == '>':
+        return izquierda > derecha
+    elif operador == '<=':
+        return izquierda <= derecha
+    elif operador == '>=':
+        return izquierda >= derecha
+    elif operador == '!=':
+        return izquierda != derecha
+    return None
+
+
+def recorrer_bucles(programa):
+    # Una pasada por el programa que devuelve las variables que se asignan o
+    # declaran en el cuerpo de cada bucle (por id del nodo, incluidas las de
+    # sus bucles interiores) y todos los nombres que usa el programa
+    asignadas = {}
+    nombres = set()
+    pila = [(iter(programa.instrucciones), None)]
+    while pila:
+        iterador, conjunto = pila[-1]
+        for nodo in iterador:
+            clase = type(nodo)
+            if clase is Condicional:
+                nombres.update(variables_expresion(nodo.condicion))
+                pila.append((chain(nodo.instrucciones_then, nodo.instrucciones_else), conjunto))
+                break
+            elif clase is BucleWhile or clase is BucleFor:
+                if clase is BucleWhile:
+                    nombres.update(variables_expresion(nodo.condicion))
+                else:
+                    nombres.add(nodo.id)
+                    nombres.update(variables_expresion(nodo.inicio))
+                    nombres.update(variables_expresion(nodo.fin))
+                    if conjunto is not None:
+                        conjunto.add(nodo.id)
+                asignadas[id(nodo)] = set()
+                pila.append((iter(nodo.instrucciones), asignadas[id(nodo)]))
+                break
+            elif clase is Declaracion or clase is Asignacion:
+                nombres.add(nodo.id)
+                if conjunto is not None:
+                    conjunto.add(nodo.id)
+                if nodo.expresion is not None:
+                    nombres.update(variables_expresion(nodo.expresion))
+            elif clase is Impresion:
+                nombres.update(variables_expresion(nodo.expresion))
+            elif clase is LlamadaFuncion:
+                nombres.add(nodo.id)
+                for argumento in nodo.argumentos:
+                    nombres.update(variables_expresion(argumento))
+        else:
+            pila.pop()
+            # Lo asignado en un bucle también se asigna en el que lo contiene
+            if pila and conjunto is not None and pila[-1][1] is not None and pila[-1][1] is not conjunto:
+                pila[-1][1].update(conjunto)
+    return asignadas, nombres
+
+
+class Bucle:
+    # Estado de la optimización de un bucle mientras se recorre su cuerpo
+    def __init__(self, variables, induccion=None, inicio=None):
+        self.variables = variables      # Variables que cambian dentro del bucle
+        self.induccion = induccion      # Variable del FOR si se puede reducir, o None
+        self.inicio = inicio            # Valor inicial de induccion
+        self.temporales = {}            # Expresión extraída -> (nombre, ranura) del temporal
+        self.reducciones = {}           # Factor -> temporal (nombre, ranura) con induccion * factor
+        self.declaraciones = []         # Temporales que se declaran antes del bucle
+        self.incrementos = []           # Asignaciones al final del cuerpo
+
+
+class Optimizer:
+    def __init__(self, tipos=None):
+        # tipos es el de SemanticAnalyzer: sin él no se optimizan los bucles.
+        # Los temporales que se crean se añaden a tipos para la traducción
+        self.tipos = tipos
+        self.plegadas = 0      # Operaciones sustituidas por su resultado
+        self.eliminadas = 0    # Instrucciones con cuerpo eliminadas o aplanadas
+        self.extraidas = 0     # Expresiones sacadas de un bucle
+        self.reducidas = 0     # Multiplicaciones sustituidas por sumas
+
+    def optimize(self, ast):
+        # Devuelve el Programa optimizado. Las listas de instrucciones se
+        # recorren con una pila explícita, como en el resto de etapas. Cada
+        # marco es [constructor, listas originales, listas nuevas, iterador]:
+        # al agotar la última lista, constructor(*listas nuevas) da el nodo
+        # que sustituye al bloque en la lista de su padre. Un marco con
+        # constructor None vuelca las instrucciones directamente en la lista
+        # del padre (la rama que sobrevive de un IF constante)
+        if self.tipos is not None:
+            self.asignadas, self.nombres = recorrer_bucles(ast)
+        self.bucles = []
+        self.creados = 0
+        # Nombres de los temporales de reducción: cambian en cada vuelta de
+        # su bucle, así que nunca son un factor invariante
+        self.reductores = set()
+        # Ranuras de variables del AST analizado; los temporales toman las
+        # siguientes
+        self.ranuras = ast.ranuras
+        pila = []
+        self.abrir(pila, lambda instrucciones: Programa(instrucciones, ast.linea, ast.columna, self.ranuras),
+                   [ast.instrucciones], None)
+        resultado = None
+        while pila:
+            marco = pila[-1]
+            destino = marco[2][-1]
+            for instruccion in marco[3]:
+                if isinstance(instruccion, (Condicional, BucleWhile, BucleFor)):
+                    if self.bloque(pila, instruccion, destino):
+                        break
+                else:
+                    destino.append(self.instruccion_simple(instruccion))
+            else:
+                constructor, originales, nuevas, _ = pila.pop()
+                if len(nuevas) < len(originales):
+                    # Queda otra lista del mismo bloque (el ELSE)
+                    nuevas.append([])
+                    marco[3] = iter(originales[len(nuevas) - 1])
+                    pila.append(marco)
+                elif constructor is not None:
+                    nodo = constructor(*nuevas)
+                    if not pila:
+                        resultado = nodo
+                    elif nodo is not None:
+                        pila[-1][2][-1].append(nodo)
+        return resultado
+
+    def abrir(self, pila, constructor, listas, destino):
+        nuevas = [destino] if constructor is None else [[]]
+        pila.append([constructor, listas, nuevas, iter(listas[0])])
+
+    def bloque(self, pila, nodo, destino):
+        # Decide qué hacer con una instrucción con cuerpo. Devuelve True si
+        # ha abierto un marco para recorrer su cuerpo
+        if type(nodo) is Condicional:
+            condicion = self.plegar(nodo.condicion)
+            valor = self.constante(condicion)
+            if valor is not None:
+                self.eliminadas += 1
+                rama = nodo.instrucciones_then if valor else nodo.instrucciones_else
+                if not rama:
+                    return False
+                if not any(type(instruccion) is Declaracion for instruccion in rama):
+                    self.abrir(pila, None, [rama], destino)
+                    return True
+                # Las variables de la rama son locales a su bloque y su nombre
+                # puede volver a declararse después: se deja el IF con la
+                # rama muerta vacía
+                linea, columna = nodo.linea, nodo.columna
+                self.abrir(pila, lambda instrucciones_then, instrucciones_else: Condicional(
+                    condicion, instrucciones_then, instrucciones_else, linea, columna),
+                    [rama, []] if valor else [[], rama], None)
+                return True
+            if self.bucles:
+                condicion = self.extraer(condicion)
+            linea, columna = nodo.linea, nodo.columna
+
+            def constructor(instrucciones_then, instrucciones_else):
+                # Sin instrucciones en ninguna rama el IF no hace nada: las
+                # condiciones no tienen efectos
+                if not instrucciones_then and not instrucciones_else:
+                    self.eliminadas += 1
+                    return None
+                return Condicional(condicion, instrucciones_then, instrucciones_else, linea, columna)
+            self.abrir(pila, constructor, [nodo.instrucciones_then, nodo.instrucciones_else], None)
+        elif type(nodo) is BucleWhile:
+            condicion = self.plegar(nodo.condicion)
+            if self.constante(condicion) is False:
+                self.eliminadas += 1
+                return False
+            bucle = self.abrir_bucle(nodo, None)
+            if bucle is not None:
+                condicion = self.extraer(condicion)
+
+            def constructor(instrucciones):
+                self.cerrar_bucle(bucle, destino, instrucciones)
+                return BucleWhile(condicion, instrucciones, nodo.linea, nodo.columna)
+            self.abrir(pila, constructor, [nodo.instrucciones], None)
+        else:
+            inicio, fin = self.plegar(nodo.inicio), self.plegar(nodo.fin)
+            valor_inicio, valor_fin = _numero(inicio), _numero(fin)
+            if valor_inicio is not None and valor_fin is not None and valor_inicio > valor_fin:
+                self.eliminadas += 1
+                return False
+            # El inicio se calcula una vez, en el bucle que contiene a este, y
+            # el límite en cada vuelta de este
+            if self.bucles:
+                inicio = self.extraer(inicio)
+            bucle = self.abrir_bucle(nodo, inicio)
+            if bucle is not None:
+                fin = self.extraer(fin)
+
+            def constructor(instrucciones):
+                self.cerrar_bucle(bucle, destino, instrucciones)
+                return BucleFor(nodo.id, inicio, fin, instrucciones, nodo.linea, nodo.columna, nodo.ranura)
+            self.abrir(pila, constructor, [nodo.instrucciones], None)
+        return True
+
+    def abrir_bucle(self, nodo, inicio):
+        # Empieza a optimizar el bucle nodo (inicio es el de un FOR). Devuelve
+        # su Bucle, o None si no se optimizan los bucles
+        if self.tipos is None:
+            return None
+        asignadas = self.asignadas[id(nodo)]
+        if type(nodo) is BucleFor:
+            variables = asignadas | {nodo.id}
+            induccion = None
+            if nodo.id not in asignadas and self.tipos.get(nodo.ranura) == ENTERO:
+                induccion = nodo.id
+            bucle = Bucle(variables, induccion, inicio)
+        else:
+            bucle = Bucle(asignadas)
+        self.bucles.append(bucle)
+        return bucle
+
+    def cerrar_bucle(self, bucle, destino, instrucciones):
+        # Al terminar el cuerpo: los temporales se declaran delante del bucle
+        # en la lista que lo contiene y los incrementos cierran el cuerpo
+        if bucle is None:
+            return
+        self.bucles.pop()
+        destino.extend(bucle.declaraciones)
+        instrucciones.extend(bucle.incrementos)
+
+    def instruccion_simple(self, nodo):
+        # La misma instrucción si sus expresiones no cambian, o una nueva
+        tipo = type(nodo)
+        if tipo is Asignacion:
+            expresion = self.expresion(nodo.expresion)
+            if expresion is not nodo.expresion:
+                return Asignacion(nodo.id, expresion, nodo.linea, nodo.columna, nodo.ranura)
+        elif tipo is Impresion:
+            expresion = self.expresion(nodo.expresion)
+            if expresion is not nodo.expresion:
+                return Impresion(expresion, nodo.linea, nodo.columna)
+        elif tipo is Declaracion:
+            if nodo.expresion is not None:
+                expresion = self.expresion(nodo.expresion)
+                if expresion is not nodo.expresion:
+                    return Declaracion(nodo.id, expresion, nodo.linea, nodo.columna, nodo.ranura)
+        elif tipo is LlamadaFuncion:
+            argumentos = [self.expresion(argumento) for argumento in nodo.argumentos]
+            if any(nuevo is not viejo for nuevo, viejo in zip(argumentos, nodo.argumentos)):
+                return LlamadaFuncion(nodo.id, argumentos, nodo.linea, nodo.columna)
+        return nodo
+
+    def expresion(self, nodo):
+        nodo = self.plegar(nodo)
+        if self.bucles:
+            nodo = self.extraer(nodo)
+        return nodo
+
+    def plegar(self, nodo):
+        # Pliega las operaciones entre literales de una expresión o condición.
+        # Las expresiones se anidan por la izquierda, así que se baja por esa
+        # rama y se reconstruye de abajo arriba sin recursión; el operando
+        # derecho es siempre una hoja salvo en las condiciones
+        if not isinstance(nodo, Operacion):
+            return nodo
+        rama = []
+        while isinstance(nodo, Operacion):
+            rama.append(nodo)
+            nodo = nodo.izquierda
+        izquierda = nodo
+        for operacion in reversed(rama):
+            derecha = self.plegar(operacion.derecha)
+            if type(operacion) is Expresion:
+                valor_izquierda, valor_derecha = _numero(izquierda), _numero(derecha)
+                if valor_izquierda is not None and valor_derecha is not None:
+                    valor = calcular(valor_izquierda, operacion.operador, valor_derecha)
+                    if valor is not None:
+                        self.plegadas += 1
+                        izquierda = Numero(valor, operacion.linea, operacion.columna)
+                        continue
+            if izquierda is operacion.izquierda and derecha is operacion.derecha:
+                izquierda = operacion
+            else:
+                izquierda = type(operacion)(izquierda, operacion.operador, derecha, operacion.linea, operacion.columna)
+        return izquierda
+
+    def constante(self, condicion):
+        # True o False si la condición (ya plegada) compara dos literales
+        if type(condicion) is not Condicion:
+            return None
+        izquierda, derecha = _numero(condicion.izquierda), _numero(condicion.derecha)
+        if izquierda is None or derecha is None:
+            return None
+        return comparar(izquierda, condicion.operador, derecha)
+
+    def extraer(self, nodo):
+        # Sustituye en la expresión o condición (ya plegada) las partes
+        # invariantes del bucle actual y las multiplicaciones por su variable.
+        # Una condición entera no se sustituye: el traductor escribe los
+        # paréntesis de if y while con los de la condición
+        if type(nodo) is Condicion:
+            izquierda = self.extraer(nodo.izquierda)
+            derecha = self.extraer(nodo.derecha)
+            if izquierda is nodo.izquierda and derecha is nodo.derecha:
+                return nodo
+            return Condicion(izquierda, nodo.operador, derecha, nodo.linea, nodo.columna)
+        if not isinstance(nodo, Operacion):
+            return nodo
+        bucle = self.bucles[-1]
+        rama = []
+        while isinstance(nodo, Operacion):
+            rama.append(nodo)
+            nodo = nodo.izquierda
+        # Como en plegar se sube por la rama izquierda. Mientras todo lo
+        # recorrido es invariante se deja igual y el nodo entero se extrae al
+        # encontrar la primera operación que no lo es (o al final)
+        izquierda = nodo
+        invariante = self.invariante(nodo, bucle)
+        con_variables = type(nodo) is Identificador
+        for operacion in reversed(rama):
+            derecha = operacion.derecha
+            if invariante:
+                if self.invariante(derecha, bucle) and (operacion.operador != '/' or (
+                        type(derecha) is Numero and derecha.valor != 0)):
+                    con_variables = con_variables or type(derecha) is Identificador
+                    izquierda = operacion
+                    continue
+                invariante = False
+                if con_variables and isinstance(izquierda, Operacion):
+                    izquierda = self.temporal(izquierda, bucle)
+            reducida = self.reducir(izquierda, operacion, derecha, bucle)
+            if reducida is not None:
+                izquierda = reducida
+            elif izquierda is not operacion.izquierda:
+                izquierda = type(operacion)(izquierda, operacion.operador, derecha, operacion.linea, operacion.columna)
+            else:
+                izquierda = operacion
+        if invariante and con_variables:
+            izquierda = self.temporal(izquierda, bucle)
+        return izquierda
+
+    def invariante(self, hoja, bucle):
+        return type(hoja) is not Identificador or hoja.valor not in bucle.variables
+
+    def temporal(self, expresion, bucle):
+        # Identificador del temporal con el valor de la expresión invariante,
+        # compartido por todas las apariciones de la misma expresión
+        clave = repr(expresion)
+        temporal = bucle.temporales.get(clave)
+        if temporal is None:
+            temporal = bucle.temporales[clave] = self.nombre_nuevo()
+            nombre, ranura = temporal
+            self.tipos[ranura] = tipo_expresion(expresion, self.tipos) or ENTERO
+            bucle.declaraciones.append(Declaracion(nombre, expresion, expresion.linea, expresion.columna, ranura))
+            self.extraidas += 1
+        nombre, ranura = temporal
+        return Identificador(nombre, expresion.linea, expresion.columna, ranura)
+
+    def reducir(self, izquierda, operacion, derecha, bucle):
+        # Si operacion multiplica la variable del FOR por un entero
+        # invariante, el temporal que lleva ese producto; si no, None
+        induccion = bucle.induccion
+        if induccion is None or operacion.operador != '*':
+            return None
+        if type(izquierda) is Identificador and izquierda.valor == induccion:
+            factor = derecha
+        elif type(derecha) is Identificador and derecha.valor == induccion:
+            factor = izquierda
+        else:
+            return None
+        if isinstance(factor, Operacion) or not self.invariante(factor, bucle) or \
+                tipo_hoja(factor, self.tipos) not in (ENTERO, CARACTER) or \
+                (type(factor) is Identificador and factor.valor in self.reductores):
+            return None
+        clave = repr(factor)
+        temporal = bucle.reducciones.get(clave)
+        if temporal is None:
+            temporal = bucle.reducciones[clave] = self.nombre_nuevo()
+            nombre, ranura = temporal
+            self.reductores.add(nombre)
+            linea, columna = operacion.linea, operacion.columna
+            self.tipos[ranura] = ENTERO
+            bucle.declaraciones.append(Declaracion(nombre, Expresion(bucle.inicio, '*', factor, linea, columna),
+                                                   linea, columna, ranura))
+            bucle.incrementos.append(Asignacion(nombre, Expresion(Identificador(nombre, linea, columna, ranura), '+',
+                                                                  factor, linea, columna), linea, columna, ranura))
+            self.reducidas += 1
+        nombre, ranura = temporal
+        return Identificador(nombre, operacion.linea, operacion.columna, ranura)
+
+    def nombre_nuevo(self):
+        # Nombre de temporal que no coincide con ninguno del programa, y su
+        # ranura (None si el AST no trae ranuras)
+        while f'_t{self.creados}' in self.nombres:
+            self.creados += 1
+        self.creados += 1
+        ranura = None
+        if self.ranuras is not None:
+            ranura = self.ranuras
+            self.ranuras += 1
+        return f'_t{self.creados - 1}', ranura
@@ -0,0 +1,212 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+from . import ETAPAS_PERFIL
+from .nodos import CLASES, Nodo
+
+# Instrumentación de una compilación: tiempo de cada etapa y, fuera de la
+# medida, cuántos tokens (por tipo) produjo el léxico, cuántos nodos (por
+# clase) tiene el AST, su profundidad, el anidamiento máximo de bloques y el
+# tamaño de la tabla de símbolos. Opcionalmente, el pico de memoria de cada
+# etapa (tracemalloc) y la salida de cProfile de una de ellas.
+#
+# Las etapas no saben nada del perfil: compile() y la línea de comandos
+# envuelven cada llamada con etapa(perfil, nombre), que sin perfil devuelve
+# un contexto vacío, así que desactivado solo cuesta una llamada por etapa.
+
+BLOQUES = ('condicional', 'bucle_while', 'bucle_for')
+
+# Líneas de cProfile que se guardan (ordenadas por tiempo acumulado)
+LINEAS_CPROFILE = 30
+
+_SIN_PERFIL = nullcontext()
+
+
+def etapa(perfil, nombre):
+    return _SIN_PERFIL if perfil is None else perfil.etapa(nombre)
+
+
+class Perfil:
+    def __init__(self, memoria=False, cprofile=None):
+        # memoria: medir el pico de cada etapa con tracemalloc (que las
+        # ralentiza, así que los tiempos ya no son comparables); cprofile:
+        # nombre de la etapa que se ejecuta bajo cProfile
+        if cprofile is not None and cprofile not in ETAPAS_PERFIL:
+            raise ValueError(f"cprofile debe ser una de {ETAPAS_PERFIL}, no {cprofile!r}")
+        self.memoria = memoria
+        self.cprofile = cprofile
+        self.etapas = {}
+        self.tokens = None
+        self.nodos = None
+        self.simbolos = None
+        self.salida_cprofile = None
+
+    @contextmanager
+    def etapa(self, nombre):
+        medida = self.etapas[nombre] = {}
+        perfilador = None
+        if self.memoria:
+            import tracemalloc
+            # Si ya se estaba trazando (desde fuera) no se detiene al final
+            ya_trazando = tracemalloc.is_tracing()
+            if ya_trazando:
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+            base = tracemalloc.get_traced_memory()[0]
+        if nombre == self.cprofile:
+            import cProfile
+            perfilador = cProfile.Profile()
+            perfilador.enable()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            medida['segundos'] = time.perf_counter() - inicio
+            if perfilador is not None:
+                perfilador.disable()
+                self.salida_cprofile = texto_cprofile(perfilador)
+            if self.memoria:
+                medida['pico_memoria'] = tracemalloc.get_traced_memory()[1] - base
+                if not ya_trazando:
+                    tracemalloc.stop()
+
+    def contar_tokens(self, tokens):
+        # tokens: TokenBuffer o lista de tuplas de tokenize
+        if hasattr(tokens, 'tipos'):
+            from .lexico import TIPOS
+            por_tipo = Counter({TIPOS[codigo]: cantidad for codigo, cantidad in Counter(tokens.tipos).items()})
+        else:
+            por_tipo = Counter(token[0] for token in tokens)
+        self.tokens = {'total': len(tokens), 'por_tipo': dict(por_tipo.most_common())}
+
+    def contar_ast(self, ast):
+        from .plano import ASTPlano
+        por_clase, profundidad, anidamiento = (recorrer_plano if isinstance(ast, ASTPlano) else recorrer_ast)(ast)
+        self.nodos = {
+            'total': sum(por_clase.values()),
+            'por_clase': dict(por_clase.most_common()),
+            'profundidad': profundidad,
+            'anidamiento_bloques': anidamiento,
+        }
+
+    def contar_simbolos(self, analizador):
+        # Ranuras: declaraciones numeradas; variables: nombres distintos
+        self.simbolos = {'ranuras': len(analizador.symbol_table), 'variables': len(set(analizador.symbol_table.nombres))}
+
+    def informe(self):
+        informe = {
+            'etapas': self.etapas,
+            'segundos': sum(medida['segundos'] for medida in self.etapas.values()),
+        }
+        for clave in ('tokens', 'nodos', 'simbolos'):
+            if getattr(self, clave) is not None:
+                informe[clave] = getattr(self, clave)
+        if self.salida_cprofile is not None:
+            informe['cprofile'] = {'etapa': self.cprofile, 'salida': self.salida_cprofile}
+        return informe
+
+    def json(self):
+        return json.dumps(self.informe(), indent=2)
+
+    def texto(self):
+        lineas = []
+        for nombre, medida in self.etapas.items():
+            linea = f'{nombre:10} {medida["segundos"] * 1000:10.2f} ms'
+            if 'pico_memoria' in medida:
+                linea += f'  pico {medida["pico_memoria"] / 2 ** 20:8.2f} MB'
+            lineas.append(linea)
+        lineas.append(f'{"total":10} {sum(m["segundos"] for m in self.etapas.values()) * 1000:10.2f} ms')
+        if self.tokens is not None:
+            lineas.append(f'tokens: {self.tokens["total"]} ({resumen(self.tokens["por_tipo"])})')
+        if self.nodos is not None:
+            lineas.append(f'nodos: {self.nodos["total"]} ({resumen(self.nodos["por_clase"])})')
+            lineas.append(f'profundidad del AST: {self.nodos["profundidad"]}, '
+                          f'anidamiento de bloques: {self.nodos["anidamiento_bloques"]}')
+        if self.simbolos is not None:
+            lineas.append(f'tabla de símbolos: {self.simbolos["ranuras"]} ranuras, '
+                          f'{self.simbolos["variables"]} variables')
+        if self.salida_cprofile is not None:
+            lineas.append(f'cProfile de {self.cprofile}:')
+            lineas.append(self.salida_cprofile.rstrip())
+        return '\n'.join(lineas)
+
+
+def resumen(cantidades):
+    return ', '.join(f'{nombre} {cantidad}' for nombre, cantidad in cantidades.items())
+
+
+def texto_cprofile(perfilador):
+    import io
+    import pstats
+    salida = io.StringIO()
+    pstats.Stats(perfilador, stream=salida).sort_stats('cumulative').print_stats(LINEAS_CPROFILE)
+    return salida.getvalue()
+
+
+def recorrer_ast(ast):
+    # Devuelve (nodos por clase, profundidad, anidamiento de bloques) con un
+    # recorrido iterativo, para no depender del límite de recursión
+    por_clase = Counter()
+    profundidad = anidamiento = 0
+    pila = [(ast, 1, 0)]
+    while pila:
+        nodo, nivel, bloques = pila.pop()
+        por_clase[type(nodo).__name__] += 1
+        if nivel > profundidad:
+            profundidad = nivel
+        if nodo.tipo in BLOQUES:
+            bloques += 1
+            if bloques > anidamiento:
+                anidamiento = bloques
+        nivel += 1
+        for campo in nodo.campos:
+            valor = getattr(nodo, campo)
+            if isinstance(valor, Nodo):
+                pila.append((valor, nivel, bloques))
+            elif isinstance(valor, list):
+                pila.extend((hijo, nivel, bloques) for hijo in valor)
+    return por_clase, profundidad, anidamiento
+
+
+def recorrer_plano(ast):
+    # Lo mismo sobre un ASTPlano, con los campos de cada tipo de nodo
+    from .plano import (ASIGNACION, BUCLE_FOR, BUCLE_WHILE, CONDICIONAL, DECLARACION, IMPRESION,
+                        LLAMADA_FUNCION, NINGUNO, PRIMERA_HOJA, PROGRAMA)
+    por_tipo = Counter(ast.tipos)
+    profundidad = anidamiento = 0
+    pila = [(ast.raiz, 1, 0)] if ast.raiz != NINGUNO else []
+    while pila:
+        nodo, nivel, bloques = pila.pop()
+        if nivel > profundidad:
+            profundidad = nivel
+        tipo = ast.tipos[nodo]
+        if tipo >= PRIMERA_HOJA:
+            continue
+        campo1, campo2, campo3, campo4 = ast.campo1[nodo], ast.campo2[nodo], ast.campo3[nodo], ast.campo4[nodo]
+        if tipo == PROGRAMA:
+            hijos = ast.lista(campo1)
+        elif tipo == DECLARACION or tipo == ASIGNACION:
+            hijos = () if campo2 == NINGUNO else (campo2,)
+        elif tipo == CONDICIONAL:
+            hijos = [campo1, *ast.lista(campo2), *ast.lista(campo3)]
+        elif tipo == BUCLE_WHILE:
+            hijos = [campo1, *ast.lista(campo2)]
+        elif tipo == BUCLE_FOR:
+            hijos = [campo2, campo3, *ast.lista(campo4)]
+        elif tipo == LLAMADA_FUNCION:
+            hijos = ast.lista(campo2)
+        elif tipo == IMPRESION:
+            hijos = (campo1,)
+        else:
+            # Expresión o condición
+            hijos = (campo1, campo2)
+        if tipo == CONDICIONAL or tipo == BUCLE_WHILE or tipo == BUCLE_FOR:
+            bloques += 1
+            if bloques > anidamiento:
+                anidamiento = bloques
+        nivel += 1
+        pila.extend((hijo, nivel, bloques) for hijo in hijos)
+    return Counter({CLASES[tipo].__name__: cantidad for tipo, cantidad in por_tipo.items()}), profundidad, anidamiento
@@ -0,0 +1,203 @@
+from array import array
+
+from .nodos import CLASES
+from .sintactico import Parser
+
+# AST plano para programas muy grandes: en lugar de un objeto por nodo, cada
+# nodo es un índice en columnas de array (tipo, cuatro campos, línea y
+# columna). Los nombres, operadores y literales se guardan una sola vez en
+# valores y los campos los referencian por índice; las listas de
+# instrucciones y de argumentos son tramos de elementos. ParserPlano lo
+# construye con la misma gramática que Parser, y SemanticAnalyzer y
+# ASTToCTranslator lo recorren directamente.
+#
+# Campos de cada tipo de nodo (v: índice en valores, l: lista, n: nodo):
+#   programa         campo1 = l instrucciones
+#   declaracion      campo1 = v id, campo2 = n expresión o NINGUNO
+#   asignacion       campo1 = v id, campo2 = n expresión
+#   condicional      campo1 = n condición, campo2 = l then, campo3 = l else
+#   bucle_while      campo1 = n condición, campo2 = l instrucciones
+#   bucle_for        campo1 = v id, campo2 = n inicio, campo3 = n fin, campo4 = l instrucciones
+#   impresion        campo1 = n expresión
+#   llamada_funcion  campo1 = v id, campo2 = l argumentos
+#   expresion        campo1 = n izquierda, campo2 = n derecha, campo3 = v operador
+#   condicion        igual que expresion
+#   hojas            campo1 = v valor
+
+# Código de tipo de cada clase de nodo: su posición en nodos.CLASES
+(PROGRAMA, DECLARACION, ASIGNACION, CONDICIONAL, BUCLE_WHILE, BUCLE_FOR, IMPRESION, LLAMADA_FUNCION,
+ EXPRESION, CONDICION, IDENTIFICADOR, NUMERO, CADENA, CARACTER) = range(len(CLASES))
+
+# Las hojas son las últimas clases de nodos.CLASES
+PRIMERA_HOJA = IDENTIFICADOR
+
+NINGUNO = -1
+
+
+class ASTPlano:
+    def __init__(self):
+        self.tipos = array('B')
+        self.campo1 = array('i')
+        self.campo2 = array('i')
+        self.campo3 = array('i')
+        self.campo4 = array('i')
+        self.lineas = array('I')
+        self.columnas = array('I')
+        self.valores = []
+        self.inicios_lista = array('I')
+        self.longitudes_lista = array('I')
+        self.elementos = array('i')
+        self.raiz = NINGUNO
+        # Ranura de la variable de cada declaración, FOR e identificador
+        # (NINGUNO en los demás nodos); la anota SemanticAnalyzer
+        self.ranuras = None
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def __repr__(self):
+        return f'ASTPlano({len(self)} nodos, {len(self.inicios_lista)} listas, {len(self.valores)} valores)'
+
+    def agregar(self, tipo, campo1, campo2, campo3, campo4, linea, columna):
+        nodo = len(self.tipos)
+        self.tipos.append(tipo)
+        self.campo1.append(campo1)
+        self.campo2.append(campo2)
+        self.campo3.append(campo3)
+        self.campo4.append(campo4)
+        self.lineas.append(linea)
+        self.columnas.append(columna)
+        return nodo
+
+    def guardar_lista(self, nodos):
+        lista = len(self.inicios_lista)
+        self.inicios_lista.append(len(self.elementos))
+        self.longitudes_lista.append(len(nodos))
+        self.elementos.extend(nodos)
+        return lista
+
+    def lista(self, lista):
+        inicio = self.inicios_lista[lista]
+        return self.elementos[inicio:inicio + self.longitudes_lista[lista]]
+
+    def tipo(self, nodo):
+        return CLASES[self.tipos[nodo]].tipo
+
+    def memoria(self):
+        # Bytes de las columnas (sin contar valores, que se comparten con el
+        # fuente y suelen ser pocos distintos)
+        columnas = [self.tipos, self.campo1, self.campo2, self.campo3, self.campo4, self.lineas,
+                    self.columnas, self.inicios_lista, self.longitudes_lista, self.elementos]
+        if self.ranuras is not None:
+            columnas.append(self.ranuras)
+        return sum(columna.itemsize * len(columna) for columna in columnas)
+
+
+class ParserPlano(Parser):
+    # Parser que construye un ASTPlano: los constructores de nodos de Parser
+    # se sustituyen por métodos que añaden filas a las columnas y devuelven
+    # el índice del nodo
+    def __init__(self, tokens):
+        super().__init__(tokens)
+        self.ast = ASTPlano()
+        self.indices = {}       # Valor -> índice en ast.valores
+        self.pendientes = {}    # Nodo de bloque abierto -> sus listas
+        self.hojas = {
+            'ID': self.Identificador,
+            'NUMBER_INT': self.Numero,
+            'NUMBER_FLOAT': self.Numero,
+            'STRING': self.Cadena,
+            'CHAR': self.Caracter,
+        }
+
+    def parse(self):
+        self.ast.raiz = self.programa()
+        self.indices = {}
+        return self.ast
+
+    def valor(self, valor):
+        # El tipo forma parte de la clave para no confundir 1 con 1.0
+        clave = valor if type(valor) is str else (type(valor), valor)
+        indice = self.indices.get(clave)
+        if indice is None:
+            indice = self.indices[clave] = len(self.ast.valores)
+            self.ast.valores.append(valor)
+        return indice
+
+    def nueva_lista(self):
+        return array('i')
+
+    def abrir_else(self, nodo):
+        listas = self.pendientes[nodo]
+        if self.ast.tipos[nodo] == CONDICIONAL and listas[1] is None:
+            listas[1] = array('i')
+            return listas[1]
+        return None
+
+    def cerrar_bloque(self, nodo):
+        # Las listas de un bloque solo se copian a elementos al cerrarlo, ya
+        # con todas sus instrucciones
+        ast = self.ast
+        listas = self.pendientes.pop(nodo)
+        tipo = ast.tipos[nodo]
+        if tipo == CONDICIONAL:
+            ast.campo2[nodo] = ast.guardar_lista(listas[0])
+            ast.campo3[nodo] = ast.guardar_lista(listas[1] if listas[1] is not None else ())
+        elif tipo == BUCLE_WHILE:
+            ast.campo2[nodo] = ast.guardar_lista(listas[0])
+        else:
+            ast.campo4[nodo] = ast.guardar_lista(listas[0])
+
+    def posicion_nodo(self, nodo):
+        return self.ast.lineas[nodo], self.ast.columnas[nodo]
+
+    def Programa(self, instrucciones, linea=0, columna=0):
+        return self.ast.agregar(PROGRAMA, self.ast.guardar_lista(instrucciones), NINGUNO, NINGUNO, NINGUNO,
+                                linea, columna)
+
+    def Declaracion(self, id, expresion=None, linea=0, columna=0):
+        return self.ast.agregar(DECLARACION, self.valor(id), NINGUNO if expresion is None else expresion,
+                                NINGUNO, NINGUNO, linea, columna)
+
+    def Asignacion(self, id, expresion, linea=0, columna=0):
+        return self.ast.agregar(ASIGNACION, self.valor(id), expresion, NINGUNO, NINGUNO, linea, columna)
+
+    def Condicional(self, condicion, instrucciones_then, instrucciones_else, linea=0, columna=0):
+        nodo = self.ast.agregar(CONDICIONAL, condicion, NINGUNO, NINGUNO, NINGUNO, linea, columna)
+        self.pendientes[nodo] = [instrucciones_then, instrucciones_else]
+        return nodo
+
+    def BucleWhile(self, condicion, instrucciones, linea=0, columna=0):
+        nodo = self.ast.agregar(BUCLE_WHILE, condicion, NINGUNO, NINGUNO, NINGUNO, linea, columna)
+        self.pendientes[nodo] = [instrucciones]
+        return nodo
+
+    def BucleFor(self, id, inicio, fin, instrucciones, linea=0, columna=0):
+        nodo = self.ast.agregar(BUCLE_FOR, self.valor(id), inicio, fin, NINGUNO, linea, columna)
+        self.pendientes[nodo] = [instrucciones]
+        return nodo
+
+    def Impresion(self, expresion, linea=0, columna=0):
+        return self.ast.agregar(IMPRESION, expresion, NINGUNO, NINGUNO, NINGUNO, linea, columna)
+
+    def LlamadaFuncion(self, id, argumentos, linea=0, columna=0):
+        return self.ast.agregar(LLAMADA_FUNCION, self.valor(id), self.ast.guardar_lista(argumentos),
+                                NINGUNO, NINGUNO, linea, columna)
+
+    def Expresion(self, izquierda, operador, derecha, linea=0, columna=0):
+        return self.ast.agregar(EXPRESION, izquierda, derecha, self.valor(operador), NINGUNO, linea, columna)
+
+    def Condicion(self, izquierda, operador, derecha, linea=0, columna=0):
+        return self.ast.agregar(CONDICION, izquierda, derecha, self.valor(operador), NINGUNO, linea, columna)
+
+    def Identificador(self, valor, linea=0, columna=0):
+        return self.ast.agregar(IDENTIFICADOR, self.valor(valor), NINGUNO, NINGUNO, NINGUNO, linea, columna)
+
+    def Numero(self, valor, linea=0, columna=0):
+        return self.ast.agregar(NUMERO, self.valor(valor), NINGUNO, NINGUNO, NINGUNO, linea, columna)
+
+    def Cadena(self, valor, linea=0, columna=0):
+        return self.ast.agregar(CADENA, self.valor(valor), NINGUNO, NINGUNO, NINGUNO, linea, columna)
+
+    def Caracter(self, valor, linea=0, columna=0):
+        return self.ast.agregar(CARACTER, self.valor(valor), NINGUNO, NINGUNO, NINGUNO, linea, columna)
@@ -0,0 +1,475 @@
+from array import array
+from itertools import chain
+
+from . import plano
+from .nodos import Condicion, Expresion, Identificador, Numero, Cadena, Operacion, tabla_despacho
+from .plano import ASIGNACION, BUCLE_FOR, BUCLE_WHILE, CONDICIONAL, DECLARACION, NINGUNO, ASTPlano
+
+# Tipos que se infieren para variables y expresiones
+ENTERO = 'int'
+DECIMAL = 'double'
+CARACTER = 'char'
+CADENA = 'string'
+
+# Tipos numéricos de menor a mayor: una variable que recibe valores de
+# varios de ellos toma el mayor
+_RANGO = {CARACTER: 0, ENTERO: 1, DECIMAL: 2}
+
+
+def combinar(tipo, otro):
+    # Tipo de una variable que recibe valores de tipo y de otro, o None si
+    # son incompatibles (string con un número). None como argumento es un
+    # tipo todavía desconocido
+    if tipo is None or tipo == otro:
+        return otro
+    if otro is None:
+        return tipo
+    if tipo in _RANGO and otro in _RANGO:
+        return tipo if _RANGO[tipo] > _RANGO[otro] else otro
+    return None
+
+
+def tipo_operacion(izquierda, operador, derecha, relacional, linea=None, columna=None):
+    # Tipo del resultado como en C: las comparaciones dan int y la aritmética
+    # promociona char a int, o a double si interviene un double. Con un
+    # operando de tipo desconocido y el otro también, el resultado lo es
+    if izquierda == CADENA or derecha == CADENA:
+        raise SemanticError(f"Operación '{operador}' no válida con string.", linea, columna)
+    if relacional:
+        return ENTERO
+    if izquierda == DECIMAL or derecha == DECIMAL:
+        return DECIMAL
+    if izquierda is None and derecha is None:
+        return None
+    return ENTERO
+
+
+def tipo_hoja(nodo, tipos):
+    clase = type(nodo)
+    if clase is Identificador:
+        return tipos.get(nodo.ranura)
+    elif clase is Numero:
+        return DECIMAL if type(nodo.valor) is float else ENTERO
+    elif clase is Cadena:
+        return CADENA
+    return CARACTER
+
+
+def tipo_expresion(nodo, tipos):
+    # Tipo de una expresión, condición u operando con los tipos de variables
+    # de tipos (por ranura). Las expresiones se anidan por la izquierda, así que se baja
+    # por esa rama y se combina de abajo arriba sin recursión
+    rama = []
+    while isinstance(nodo, Operacion):
+        rama.append(nodo)
+        nodo = nodo.izquierda
+    tipo = tipo_hoja(nodo, tipos)
+    for operacion in reversed(rama):
+        derecha = operacion.derecha
+        if isinstance(derecha, Operacion):
+            tipo_derecha = tipo_expresion(derecha, tipos)
+        else:
+            tipo_derecha = tipo_hoja(derecha, tipos)
+        tipo = tipo_operacion(tipo, operacion.operador, tipo_derecha, type(operacion) is Condicion,
+                              operacion.linea, operacion.columna)
+    return tipo
+
+
+def variables_expresion(nodo):
+    # Nombres de las variables que aparecen en una expresión
+    nombres = []
+    pila = [nodo]
+    while pila:
+        nodo = pila.pop()
+        if isinstance(nodo, Operacion):
+            pila.append(nodo.izquierda)
+            pila.append(nodo.derecha)
+        elif type(nodo) is Identificador:
+            nombres.append(nodo.valor)
+    return nombres
+
+
+def tipo_expresion_plana(ast, nodo, tipos):
+    # Igual que tipo_expresion para un nodo de un ASTPlano
+    clases, campo1 = ast.tipos, ast.campo1
+    rama = []
+    while clases[nodo] < plano.PRIMERA_HOJA:
+        rama.append(nodo)
+        nodo = campo1[nodo]
+    tipo = _tipo_hoja_plana(ast, nodo, tipos)
+    for operacion in reversed(rama):
+        derecha = ast.campo2[operacion]
+        if clases[derecha] < plano.PRIMERA_HOJA:
+            tipo_derecha = tipo_expresion_plana(ast, derecha, tipos)
+        else:
+            tipo_derecha = _tipo_hoja_plana(ast, derecha, tipos)
+        tipo = tipo_operacion(tipo, ast.valores[ast.campo3[operacion]], tipo_derecha,
+                              clases[operacion] == plano.CONDICION, ast.lineas[operacion], ast.columnas[operacion])
+    return tipo
+
+
+def _tipo_hoja_plana(ast, nodo, tipos):
+    clase = ast.tipos[nodo]
+    if clase == plano.IDENTIFICADOR:
+        return tipos.get(ast.ranuras[nodo])
+    valor = ast.valores[ast.campo1[nodo]]
+    if clase == plano.NUMERO:
+        return DECIMAL if type(valor) is float else ENTERO
+    elif clase == plano.CADENA:
+        return CADENA
+    return CARACTER
+
+
+def anotar_uso(usos, ranura, indice):
+    # Una variable que aparece muchas veces en la misma expresión se anota
+    # una sola vez: si no, cada cambio de su tipo volvería a evaluar la
+    # asignación tantas veces como apariciones (coste cuadrático). Los usos
+    # de una asignación se anotan seguidos, así que basta mirar el último
+    lista = usos.get(ranura)
+    if lista is None:
+        usos[ranura] = [indice]
+    elif lista[-1] != indice:
+        lista.append(indice)
+
+
+class TablaSimbolos:
+    # Variables visibles en cada punto del recorrido, con ámbitos de bloque:
+    # cada declaración recibe una ranura (el número de declaraciones
+    # anteriores) y al cerrar un bloque sus variables dejan de ser visibles.
+    # Por símbolo solo se guarda su nombre, en la lista de ranuras
+    def __init__(self):
+        self.nombres = []       # Nombre de la variable de cada ranura
+        self.visibles = {}      # Nombre -> ranuras visibles; la última es la del bloque más interior
+        self.ambitos = [[]]     # Nombres declarados en cada bloque abierto
+
+    def __contains__(self, nombre):
+        return nombre in self.visibles
+
+    def __iter__(self):
+        # Nombres declarados en algún momento, sin repetir
+        return iter(dict.fromkeys(self.nombres))
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def abrir(self):
+        self.ambitos.append([])
+
+    def cerrar(self):
+        visibles = self.visibles
+        for nombre in self.ambitos.pop():
+            ranuras = visibles[nombre]
+            ranuras.pop()
+            if not ranuras:
+                del visibles[nombre]
+
+    def declarar(self, nombre):
+        ranura = len(self.nombres)
+        self.nombres.append(nombre)
+        self.visibles.setdefault(nombre, []).append(ranura)
+        self.ambitos[-1].append(nombre)
+        return ranura
+
+    def buscar(self, nombre):
+        # Ranura de la variable visible con ese nombre, o None
+        ranuras = self.visibles.get(nombre)
+        return ranuras[-1] if ranuras else None
+
+
+class SemanticAnalyzer:
+    def __init__(self):
+        # Las variables no se pueden volver a declarar mientras son visibles,
+        # salvo la de un FOR, que como en C oculta a la de fuera dentro del
+        # bucle. Tras un bloque sus variables dejan de existir y el nombre
+        # puede volver a declararse, con otro tipo si se quiere: el tipo
+        # inferido es por declaración
+        self.symbol_table = TablaSimbolos()
+        # Tipo inferido de cada ranura de la tabla de símbolos: ENTERO,
+        # DECIMAL, CARACTER o CADENA
+        self.tipos = {}
+        # Lo que el recorrido anota para la inferencia de tipos: pares
+        # (ranura, expresión que se le asigna), las demás expresiones
+        # (condiciones, PRINT y argumentos) y las ranuras de los FOR. Al
+        # resolver los identificadores se anota también en qué asignaciones
+        # se usa cada ranura
+        self.asignaciones = []
+        self.usos = {}
+        self.expresiones = []
+        self.bucles = []
+        # Método visit_* de cada clase de nodo, resuelto una sola vez
+        self.despacho = tabla_despacho(self, 'visit_', self.generic_visit)
+
+    def analyze(self, ast):
+        if isinstance(ast, ASTPlano):
+            self.visit_plano(ast)
+            tipo_de = lambda expresion: tipo_expresion_plana(ast, expresion, self.tipos)
+            posicion_de = lambda expresion: (ast.lineas[expresion], ast.columnas[expresion])
+        else:
+            self.visit(ast)
+            ast.ranuras = len(self.symbol_table)
+            tipo_de = lambda expresion: tipo_expresion(expresion, self.tipos)
+            posicion_de = lambda expresion: (expresion.linea, expresion.columna)
+        self.inferir(tipo_de, posicion_de)
+        for expresion in self.expresiones:
+            tipo_de(expresion)
+        for ranura, inicio in self.bucles:
+            if self.tipos[ranura] == CADENA:
+                raise SemanticError(f"Variable de bucle '{self.symbol_table.nombres[ranura]}' de tipo string.",
+                                    *posicion_de(inicio))
+
+    def variables(self):
+        # Pares (nombre, tipo) de cada declaración, en orden
+        return [(nombre, self.tipos[ranura]) for ranura, nombre in enumerate(self.symbol_table.nombres)]
+
+    def inferir(self, tipo_de, posicion_de):
+        # Punto fijo sobre las asignaciones: el tipo de una variable combina
+        # los de todo lo que se le asigna, y cuando cambia se vuelven a
+        # evaluar las asignaciones que la usan. Un tipo solo puede subir de
+        # rango, así que cada asignación se evalúa unas pocas veces. Las
+        # variables que no reciben ningún valor de tipo conocido son int
+        asignaciones = self.asignaciones
+        usos = self.usos
+        self.propagar(list(range(len(asignaciones) - 1, -1, -1)), usos, tipo_de, posicion_de)
+        pendientes = []
+        for ranura in range(len(self.symbol_table)):
+            if ranura not in self.tipos:
+                self.tipos[ranura] = ENTERO
+                pendientes.extend(usos.get(ranura, ()))
+        self.propagar(pendientes, usos, tipo_de, posicion_de)
+
+    def propagar(self, pendientes, usos, tipo_de, posicion_de):
+        asignaciones = self.asignaciones
+        tipos = self.tipos
+        while pendientes:
+            ranura, expresion = asignaciones[pendientes.pop()]
+            tipo = tipo_de(expresion)
+            if tipo is None:
+                continue
+            actual = tipos.get(ranura)
+            nuevo = combinar(actual, tipo)
+            if nuevo is None:
+                raise SemanticError(f"Variable '{self.symbol_table.nombres[ranura]}' con valores de tipos "
+                                    f"incompatibles ({actual} y {tipo}).", *posicion_de(expresion))
+            if nuevo != actual:
+                tipos[ranura] = nuevo
+                pendientes.extend(usos.get(ranura, ()))
+
+    def visit(self, node):
+        # Recorrido en profundidad con una pila explícita de iteradores, sin
+        # recursión: cada visit_* comprueba su nodo y devuelve los hijos que
+        # quedan por visitar, en orden (o None si no tiene), con las marcas
+        # de apertura y cierre de sus bloques. De las expresiones solo se
+        # resuelven los identificadores; se anotan para la inferencia de tipos
+        despacho = self.despacho
+        generic_visit = self.generic_visit
+        tabla = self.symbol_table
+        pila = [iter((node,))]
+        while pila:
+            nodo = next(pila[-1], _FIN)
+            if nodo is _FIN:
+                pila.pop()
+                continue
+            if nodo is _CERRAR:
+                tabla.cerrar()
+                continue
+            if nodo is _ABRIR:
+                tabla.abrir()
+                continue
+            hijos = despacho.get(type(nodo), generic_visit)(nodo)
+            if hijos is not None:
+                pila.append(iter(hijos))
+
+    def visit_plano(self, ast):
+        # Mismas comprobaciones sobre un ASTPlano, leyendo sus columnas sin
+        # crear objetos por nodo. Las anotaciones para la inferencia guardan
+        # índices de nodos en lugar de nodos, y las ranuras de declaraciones,
+        # FOR e identificadores se anotan en la columna ast.ranuras
+        tipos, campo1, campo2 = ast.tipos, ast.campo1, ast.campo2
+        valores = ast.valores
+        ranuras = ast.ranuras = array('i', [NINGUNO]) * len(ast)
+        tabla = self.symbol_table
+        asignaciones = self.asignaciones
+        usos = self.usos
+        expresiones = self.expresiones
+
+        def resolver(expresion, indice=None):
+            # Comprueba que las variables de la expresión son visibles y anota
+            # sus usos en la asignación indice
+            pila = [expresion]
+            while pila:
+                nodo = pila.pop()
+                clase = tipos[nodo]
+                if clase < plano.PRIMERA_HOJA:
+                    pila.append(campo1[nodo])
+                    pila.append(campo2[nodo])
+                elif clase == plano.IDENTIFICADOR:
+                    nombre = valores[campo1[nodo]]
+                    ranura = tabla.buscar(nombre)
+                    if ranura is None:
+                        raise SemanticError(f"Variable '{nombre}' no declarada.", ast.lineas[nodo], ast.columnas[nodo])
+                    ranuras[nodo] = ranura
+                    if indice is not None:
+                        anotar_uso(usos, ranura, indice)
+
+        def asignar(ranura, expresion):
+            asignaciones.append((ranura, expresion))
+            resolver(expresion, len(asignaciones) - 1)
+        pila = [iter(ast.lista(campo1[ast.raiz]))]
+        while pila:
+            for nodo in pila[-1]:
+                if nodo is _CERRAR:
+                    tabla.cerrar()
+                    continue
+                if nodo is _ABRIR:
+                    tabla.abrir()
+                    continue
+                tipo = tipos[nodo]
+                if tipo == DECLARACION:
+                    id = valores[campo1[nodo]]
+                    expresion = campo2[nodo]
+                    if expresion != NINGUNO:
+                        resolver(expresion, len(asignaciones))
+                    if id in tabla:
+                        raise SemanticError(f"Variable '{id}' ya declarada.", ast.lineas[nodo], ast.columnas[nodo])
+                    ranura = ranuras[nodo] = tabla.declarar(id)
+                    if expresion != NINGUNO:
+                        asignaciones.append((ranura, expresion))
+                elif tipo == ASIGNACION:
+                    id = valores[campo1[nodo]]
+                    ranura = tabla.buscar(id)
+                    if ranura is None:
+                        raise SemanticError(f"Variable '{id}' no declarada.", ast.lineas[nodo], ast.columnas[nodo])
+                    ranuras[nodo] = ranura
+                    asignar(ranura, campo2[nodo])
+                elif tipo == plano.IMPRESION:
+                    resolver(campo1[nodo])
+                    expresiones.append(campo1[nodo])
+                elif tipo == plano.LLAMADA_FUNCION:
+                    for argumento in ast.lista(campo2[nodo]):
+                        resolver(argumento)
+                        expresiones.append(argumento)
+                elif tipo == CONDICIONAL:
+                    resolver(campo1[nodo])
+                    expresiones.append(campo1[nodo])
+                    tabla.abrir()
+                    pila.append(chain(ast.lista(campo2[nodo]), (_CERRAR, _ABRIR), ast.lista(ast.campo3[nodo]),
+                                      (_CERRAR,)))
+                    break
+                elif tipo == BUCLE_WHILE:
+                    resolver(campo1[nodo])
+                    expresiones.append(campo1[nodo])
+                    tabla.abrir()
+                    pila.append(chain(ast.lista(campo2[nodo]), (_CERRAR,)))
+                    break
+                elif tipo == BUCLE_FOR:
+                    resolver(campo2[nodo], len(asignaciones))
+                    tabla.abrir()
+                    ranura = ranuras[nodo] = tabla.declarar(valores[campo1[nodo]])
+                    asignaciones.append((ranura, campo2[nodo]))
+                    asignar(ranura, ast.campo3[nodo])
+                    self.bucles.append((ranura, campo2[nodo]))
+                    pila.append(chain(ast.lista(ast.campo4[nodo]), (_CERRAR,)))
+                    break
+            else:
+                pila.pop()
+
+    def generic_visit(self, node):
+        if isinstance(node, list):
+            return node
+        return None
+
+    def visit_programa(self, node):
+        return node.instrucciones
+
+    def resolver(self, expresion, indice=None):
+        # Anota en cada identificador de la expresión la ranura de la
+        # variable visible con su nombre y, si la expresión es la de la
+        # asignación indice, el uso de la variable
+        visibles = self.symbol_table.visibles
+        usos = self.usos
+        pila = [expresion]
+        while pila:
+            nodo = pila.pop()
+            clase = type(nodo)
+            if clase is Identificador:
+                ranuras = visibles.get(nodo.valor)
+                if not ranuras:
+                    raise SemanticError(f"Variable '{nodo.valor}' no declarada.", nodo.linea, nodo.columna)
+                nodo.ranura = ranuras[-1]
+                if indice is not None:
+                    anotar_uso(usos, nodo.ranura, indice)
+            elif clase is Expresion or clase is Condicion:
+                pila.append(nodo.izquierda)
+                pila.append(nodo.derecha)
+
+    def asignar(self, ranura, expresion):
+        self.asignaciones.append((ranura, expresion))
+        self.resolver(expresion, len(self.asignaciones) - 1)
+
+    def visit_declaracion(self, node):
+        # El valor inicial se resuelve antes de declarar (no puede usar la
+        # propia variable) y la asignación se anota ya con la ranura nueva
+        id = node.id
+        if node.expresion is not None:
+            self.resolver(node.expresion, len(self.asignaciones))
+        if id in self.symbol_table:
+            raise SemanticError(f"Variable '{id}' ya declarada.", node.linea, node.columna)
+        node.ranura = self.symbol_table.declarar(id)
+        if node.expresion is not None:
+            self.asignaciones.append((node.ranura, node.expresion))
+
+    def visit_asignacion(self, node):
+        id = node.id
+        ranura = self.symbol_table.buscar(id)
+        if ranura is None:
+            raise SemanticError(f"Variable '{id}' no declarada.", node.linea, node.columna)
+        node.ranura = ranura
+        self.asignar(ranura, node.expresion)
+
+    def visit_condicional(self, node):
+        self.resolver(node.condicion)
+        self.expresiones.append(node.condicion)
+        self.symbol_table.abrir()
+        return chain(node.instrucciones_then, (_CERRAR, _ABRIR), node.instrucciones_else, (_CERRAR,))
+
+    def visit_bucle_while(self, node):
+        self.resolver(node.condicion)
+        self.expresiones.append(node.condicion)
+        self.symbol_table.abrir()
+        return chain(node.instrucciones, (_CERRAR,))
+
+    def visit_bucle_for(self, node):
+        # Como for (T id = inicio; id <= fin; id++): el inicio se resuelve
+        # fuera del bucle y el límite ya con su variable, que solo existe
+        # dentro
+        self.resolver(node.inicio, len(self.asignaciones))
+        self.symbol_table.abrir()
+        node.ranura = self.symbol_table.declarar(node.id)
+        self.asignaciones.append((node.ranura, node.inicio))
+        self.asignar(node.ranura, node.fin)
+        self.bucles.append((node.ranura, node.inicio))
+        return chain(node.instrucciones, (_CERRAR,))
+
+    def visit_impresion(self, node):
+        self.resolver(node.expresion)
+        self.expresiones.append(node.expresion)
+
+    def visit_llamada_funcion(self, node):
+        for argumento in node.argumentos:
+            self.resolver(argumento)
+        self.expresiones.extend(node.argumentos)
+
+# Marcas de la pila de visit: fin de un iterador y apertura y cierre de un
+# bloque
+_FIN = object()
+_ABRIR = object()
+_CERRAR = object()
+
+class SemanticError(Exception):
+    # Con la posición del error, el mensaje termina con la línea y columna
+    def __init__(self, mensaje, linea=None, columna=None):
+        self.linea = linea
+        self.columna = columna
+        if linea:
+            mensaje = f"{mensaje.rstrip('.')} (línea {linea}, columna {columna})."
+        super().__init__(mensaje)
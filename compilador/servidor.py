@@ -0,0 +1,285 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .lexico import TokenBuffer, tokenize
+from .optimizador import Optimizer
+from .perfil import Perfil, etapa
+from .plano import ParserPlano
+from .semantico import SemanticAnalyzer, SemanticError
+from .sintactico import Parser
+from .traductor import ASTToCTranslator
+
+# Servidor de compilación: mantiene el compilador cargado (módulos importados
+# y autómata del léxico generado) y atiende peticiones JSON, una por línea,
+# por la entrada estándar o por un socket Unix. Así los programas pequeños
+# que mandan el editor o los tests no pagan cada vez el arranque del
+# intérprete ni las importaciones.
+#
+# Petición:  {"id": 1, "op": "translate", "fuente": "BEGIN ... END",
+#             "opciones": {"plano": false, "optimizar": true, "perfil": false}}
+#            {"id": 2, "op": "cancel", "objetivo": 1}
+# Respuesta: {"id": 1, "ok": true, "resultado": ..., "latencia_ms": ...}
+#            {"id": 1, "ok": false, "error": {"tipo": "SemanticError", "mensaje": ..., "linea": 3, "columna": 4}, ...}
+#            {"id": 1, "ok": false, "cancelada": true, ...}
+#
+# op es tokenize (lista de [tipo, valor, línea, columna]), parse (repr del
+# AST), analyze (pares [nombre, tipo inferido] de cada declaración, en orden)
+# o translate (código C). Las peticiones de una conexión se atienden a la vez
+# y cada respuesta sale en cuanto está lista, no en el orden de llegada: el
+# cliente las empareja por id. La latencia va desde que se lee la petición hasta que se escribe la
+# respuesta (con "perfil": true se añade además el tiempo de cada etapa).
+#
+# Las etapas se ejecutan en un pool de hilos, para que el bucle de eventos
+# siga leyendo peticiones (y cancelaciones) mientras tanto y un programa
+# pequeño no espere a que termine uno enorme. Una petición cancelada responde
+# enseguida; si ya estaba en ejecución, su hilo se detiene al acabar la etapa
+# en curso.
+
+OPERACIONES = ('tokenize', 'parse', 'analyze', 'translate')
+WORKERS = 4
+# Longitud máxima de una línea de petición (el fuente va dentro)
+LIMITE_MENSAJE = 1 << 26
+
+
+class Cancelada(Exception):
+    pass
+
+
+class ErrorPeticion(Exception):
+    pass
+
+
+def ejecutar_operacion(operacion, fuente, opciones, cancelada):
+    # Se ejecuta en un hilo del pool. Entre etapa y etapa se comprueba si la
+    # petición se canceló
+    # El perfil no mide memoria: tracemalloc es del proceso entero y las
+    # peticiones se ejecutan a la vez
+    perfil = Perfil() if opciones.get('perfil') else None
+
+    def seguir():
+        if cancelada.is_set():
+            raise Cancelada()
+
+    if operacion == 'tokenize':
+        with etapa(perfil, 'tokenize'):
+            resultado = [list(token) for token in tokenize(fuente)]
+    else:
+        plano = opciones.get('plano', False)
+        with etapa(perfil, 'tokenize'):
+            tokens = TokenBuffer(fuente)
+        seguir()
+        with etapa(perfil, 'parse'):
+            ast = (ParserPlano if plano else Parser)(tokens).parse()
+        if operacion == 'parse':
+            resultado = repr(ast)
+        else:
+            seguir()
+            analizador = SemanticAnalyzer()
+            with etapa(perfil, 'analyze'):
+                analizador.analyze(ast)
+            if operacion == 'analyze':
+                resultado = analizador.variables()
+            else:
+                if opciones.get('optimizar', True) and not plano:
+                    seguir()
+                    with etapa(perfil, 'optimize'):
+                        ast = Optimizer(analizador.tipos).optimize(ast)
+                seguir()
+                with etapa(perfil, 'translate'):
+                    resultado = ASTToCTranslator(ast, analizador.tipos).translate()
+    return resultado, None if perfil is None else perfil.informe()
+
+
+def es_id(valor):
+    return valor is None or isinstance(valor, (str, int))
+
+
+def describir_error(error):
+    descripcion = {'tipo': type(error).__name__, 'mensaje': str(error)}
+    for atributo in ('linea', 'columna'):
+        if getattr(error, atributo, None) is not None:
+            descripcion[atributo] = getattr(error, atributo)
+    return descripcion
+
+
+class Conexion:
+    # Estado de un cliente: sus peticiones en curso (id -> (tarea que
+    # responde, futuro del pool, evento de cancelación)) y el candado que
+    # evita mezclar respuestas al escribir
+    def __init__(self, lector, escritor):
+        self.lector = lector
+        self.escritor = escritor
+        self.pendientes = {}
+        self.escribiendo = asyncio.Lock()
+
+    async def responder(self, respuesta):
+        linea = json.dumps(respuesta, ensure_ascii=False).encode('utf-8') + b'\n'
+        async with self.escribiendo:
+            self.escritor.write(linea)
+            await self.escritor.drain()
+
+
+class ServidorCompilacion:
+    def __init__(self, workers=WORKERS):
+        self.ejecutor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        # Primera compilación fuera de las peticiones: llena las cachés que
+        # quedan (tablas de despacho, clases de caracteres del léxico...)
+        ejecutar_operacion('translate', 'BEGIN\nVAR x = 1;\nPRINT x;\nEND\n', {}, threading.Event())
+
+    def cerrar(self):
+        self.ejecutor.shutdown(cancel_futures=True)
+
+    async def atender(self, lector, escritor):
+        # Lee peticiones hasta que el cliente cierra su lado y espera a
+        # responder las que quedan
+        conexion = Conexion(lector, escritor)
+        try:
+            while True:
+                try:
+                    linea = await lector.readline()
+                except ValueError:
+                    await conexion.responder({'id': None, 'ok': False, 'error': {
+                        'tipo': 'ErrorPeticion', 'mensaje': f'Petición de más de {LIMITE_MENSAJE} bytes'}})
+                    break
+                if not linea:
+                    break
+                if linea.strip():
+                    await self.recibir(conexion, linea, time.perf_counter())
+            tareas = [tarea for tarea, _, _ in conexion.pendientes.values()]
+            if tareas:
+                await asyncio.gather(*tareas, return_exceptions=True)
+        finally:
+            for tarea, futuro, cancelada in list(conexion.pendientes.values()):
+                cancelada.set()
+                futuro.cancel()
+                tarea.cancel()
+            escritor.close()
+
+    async def recibir(self, conexion, linea, recibida):
+        id = None
+        try:
+            try:
+                mensaje = json.loads(linea)
+            except ValueError as error:
+                raise ErrorPeticion(f'JSON no válido: {error}')
+            if not isinstance(mensaje, dict):
+                raise ErrorPeticion('La petición debe ser un objeto JSON')
+            id = mensaje.get('id')
+            # Los id se usan como claves de pendientes: una lista o un objeto
+            # no se pueden buscar en el diccionario
+            if not es_id(id):
+                raise ErrorPeticion(f'El id debe ser un string, un entero o null, no {id!r}')
+            operacion = mensaje.get('op')
+            if operacion == 'cancel':
+                objetivo = mensaje.get('objetivo')
+                if not es_id(objetivo):
+                    raise ErrorPeticion(f'El objetivo debe ser un string, un entero o null, no {objetivo!r}')
+                # Se cancela el futuro y no la tarea, que así responde
+                # siempre a la petición cancelada
+                pendiente = conexion.pendientes.get(objetivo)
+                if pendiente is not None:
+                    pendiente[2].set()
+                    pendiente[1].cancel()
+                await conexion.responder({'id': id, 'ok': True, 'cancelada': pendiente is not None})
+                return
+            if operacion not in OPERACIONES:
+                raise ErrorPeticion(f"op debe ser una de {', '.join(OPERACIONES + ('cancel',))}, no {operacion!r}")
+            if not isinstance(mensaje.get('fuente'), str):
+                raise ErrorPeticion("Falta el texto fuente en 'fuente'")
+            opciones = mensaje.get('opciones') or {}
+            if not isinstance(opciones, dict):
+                raise ErrorPeticion("'opciones' debe ser un objeto JSON")
+            if id is None or id in conexion.pendientes:
+                raise ErrorPeticion(f'La petición necesita un id que no esté en curso, no {id!r}')
+        except ErrorPeticion as error:
+            await conexion.responder({'id': id, 'ok': False, 'error': describir_error(error)})
+            return
+        cancelada = threading.Event()
+        futuro = asyncio.get_running_loop().run_in_executor(
+            self.ejecutor, ejecutar_operacion, operacion, mensaje['fuente'], opciones, cancelada)
+        tarea = asyncio.create_task(self.procesar(conexion, id, futuro, recibida))
+        conexion.pendientes[id] = (tarea, futuro, cancelada)
+
+    async def procesar(self, conexion, id, futuro, recibida):
+        respuesta = {'id': id}
+        try:
+            resultado, perfil = await futuro
+            respuesta['ok'] = True
+            respuesta['resultado'] = resultado
+            if perfil is not None:
+                respuesta['perfil'] = perfil
+        except (asyncio.CancelledError, Cancelada):
+            respuesta['ok'] = False
+            respuesta['cancelada'] = True
+        except Exception as error:
+            # Los errores del programa (SyntaxError, SemanticError) y
+            # cualquier otro fallo se devuelven al cliente: el servidor sigue
+            respuesta['ok'] = False
+            respuesta['error'] = describir_error(error)
+        finally:
+            del conexion.pendientes[id]
+        respuesta['latencia_ms'] = (time.perf_counter() - recibida) * 1000
+        try:
+            await conexion.responder(respuesta)
+        except ConnectionError:
+            pass
+
+    async def servir_socket(self, ruta):
+        # SIGTERM cierra el servidor de forma ordenada (y main borra el socket)
+        servidor = await asyncio.start_unix_server(self.atender, ruta, limit=LIMITE_MENSAJE)
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, servidor.close)
+        async with servidor:
+            try:
+                await servidor.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    async def servir_stdio(self):
+        bucle = asyncio.get_running_loop()
+        lector = asyncio.StreamReader(limit=LIMITE_MENSAJE)
+        await bucle.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(lector), sys.stdin)
+        transporte, protocolo = await bucle.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+        escritor = asyncio.StreamWriter(transporte, protocolo, lector, bucle)
+        await self.atender(lector, escritor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m compilador.servidor',
+                                     description='Servidor de compilación con peticiones JSON por línea.')
+    parser.add_argument('--socket', metavar='RUTA', help='escuchar en un socket Unix (por defecto, entrada y salida estándar)')
+    parser.add_argument('-j', '--workers', type=int, default=WORKERS,
+                        help=f'hilos que ejecutan las peticiones (por defecto {WORKERS}; 0: uno por núcleo)')
+    args = parser.parse_args(argv)
+    servidor = ServidorCompilacion(args.workers)
+    try:
+        if args.socket:
+            # Un socket que quedó de una ejecución anterior se reemplaza;
+            # cualquier otro archivo con ese nombre es un error
+            if os.path.exists(args.socket):
+                if not stat.S_ISSOCK(os.stat(args.socket).st_mode):
+                    parser.error(f'{args.socket} existe y no es un socket')
+                os.unlink(args.socket)
+            try:
+                asyncio.run(servidor.servir_socket(args.socket))
+            finally:
+                if os.path.exists(args.socket):
+                    os.unlink(args.socket)
+        else:
+            asyncio.run(servidor.servir_stdio())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.cerrar()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,366 @@
+from collections import deque
+
+from .lexico import TIPOS, VALOR_FIJO, TokenBuffer
+from .nodos import (Asignacion, BucleFor, BucleWhile, Cadena, Caracter, Condicion, Condicional, Declaracion,
+                    Expresion, Identificador, Impresion, LlamadaFuncion, Numero, Programa)
+
+# Clase de la hoja del AST para cada tipo de token que puede ser un operando
+HOJAS = {
+    'ID': Identificador,
+    'NUMBER_INT': Numero,
+    'NUMBER_FLOAT': Numero,
+    'STRING': Cadena,
+    'CHAR': Caracter,
+}
+
+class Parser:
+    # Constructores de los nodos. Una subclase puede cambiarlos por métodos
+    # con los mismos argumentos para construir otra representación del AST
+    # (ver compilador.plano) sin tocar la gramática
+    Programa = Programa
+    Declaracion = Declaracion
+    Asignacion = Asignacion
+    Condicional = Condicional
+    BucleWhile = BucleWhile
+    BucleFor = BucleFor
+    Impresion = Impresion
+    LlamadaFuncion = LlamadaFuncion
+    Expresion = Expresion
+    Condicion = Condicion
+    hojas = HOJAS
+
+    def __init__(self, tokens):
+        self.buffer = None
+        self.flujo = None
+        if isinstance(tokens, TokenBuffer):
+            # Modo columnar: se leen directamente los códigos de tipo del buffer
+            self.buffer = tokens
+            self.tokens = tokens.tipos
+            self.linea = self.inicio_linea = self.fin_linea = 0
+        elif isinstance(tokens, list):
+            self.tokens = tokens
+        else:
+            # Modo flujo: los tokens se extraen del iterador bajo demanda y
+            # solo se guarda una pequeña ventana de anticipación
+            self.tokens = None
+            self.flujo = iter(tokens)
+            self.ventana = deque()
+        self.pos = 0
+        self.cargar_actual()
+
+    def cargar_actual(self):
+        # Cachea el token actual y su tipo para no indexar en cada consulta
+        if self.buffer is not None:
+            self.actual = TIPOS[self.tokens[self.pos]] if self.pos < len(self.tokens) else None
+            return
+        if self.flujo is None:
+            token = self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        else:
+            if not self.ventana:
+                self.llenar(1)
+            token = self.ventana[0] if self.ventana else None
+        self.token_actual = token
+        self.actual = token[0] if token is not None else None
+
+    def llenar(self, n):
+        while len(self.ventana) < n:
+            token = next(self.flujo, None)
+            if token is None:
+                break
+            self.ventana.append(token)
+
+    def peek(self, k=0):
+        # Tipo del token k posiciones por delante del actual (None al final)
+        if self.flujo is None:
+            if self.pos + k >= len(self.tokens):
+                return None
+            if self.buffer is not None:
+                return TIPOS[self.tokens[self.pos + k]]
+            return self.tokens[self.pos + k][0]
+        self.llenar(k + 1)
+        return self.ventana[k][0] if k < len(self.ventana) else None
+
+    def posicion(self):
+        # Línea y columna del token actual, para los nodos del AST
+        if self.buffer is not None:
+            # Casi siempre el token está en la misma línea que el anterior,
+            # así que se guarda el rango de esa línea y solo se biseca al
+            # salir de él; además los nodos de una línea comparten el int
+            inicio = self.buffer.inicios[self.pos]
+            if not self.inicio_linea <= inicio < self.fin_linea:
+                self.linea, self.inicio_linea, self.fin_linea = self.buffer.rango_linea(inicio)
+            return self.linea, inicio - self.inicio_linea
+        return self.token_actual[2], self.token_actual[3]
+
+    def error_token(self, mensaje):
+        # Los caracteres que no forman ningún token llegan como ERROR
+        if self.actual == 'ERROR':
+            valor = self.buffer.valor(self.pos) if self.buffer is not None else self.token_actual[1]
+            return SyntaxError(f"Invalid character {valor!r} at position {self.pos}")
+        return SyntaxError(mensaje)
+
+    def consume(self, expected_type):
+        if self.actual != expected_type:
+            raise self.error_token(f"Expected {expected_type} at position {self.pos}")
+        pos = self.pos
+        self.pos = pos + 1
+        if self.buffer is not None:
+            # Camino rápido del modo columnar: solo se corta el fuente para
+            # los tokens cuyo texto no es fijo
+            tipos = self.tokens
+            token_value = VALOR_FIJO[tipos[pos]]
+            if token_value is None:
+                token_value = self.buffer.valor(pos)
+            self.actual = TIPOS[tipos[pos + 1]] if pos + 1 < len(tipos) else None
+            return token_value
+        token_value = self.token_actual[1]
+        if self.flujo is not None:
+            self.ventana.popleft()
+        self.cargar_actual()
+        return token_value
+
+    def parse(self):
+        return self.programa()
+
+    def parse_stream(self):
+        # Produce las instrucciones de nivel superior una a una, sin construir
+        # la lista completa del programa
+        self.consume('BEGIN')
+        while self.actual not in {'END', 'ELSE', None}:
+            yield self.instruccion()
+        self.consume('END')
+
+    def programa(self):
+        linea, columna = self.posicion() if self.actual is not None else (0, 0)
+        self.consume('BEGIN')
+        instrucciones = self.instrucciones()
+        self.consume('END')
+        return self.Programa(instrucciones, linea, columna)
+
+    def instrucciones(self):
+        instrucciones = self.nueva_lista()
+        self.abrir_lista()
+        self.analizar_bloques(instrucciones, False)
+        self.cerrar_lista()
+        return instrucciones
+
+    def instruccion(self):
+        instrucciones = []
+        self.analizar_bloques(instrucciones, True)
+        return instrucciones[0]
+
+    def analizar_bloques(self, raiz, una):
+        # Analiza instrucciones sin recursión, así que el anidamiento solo
+        # está limitado por la memoria. Cada IF/WHILE/FOR abierto es un nodo
+        # en pila y la lista de instrucciones que se está llenando para él
+        # está en listas. Con una se vuelve tras completar una sola
+        # instrucción.
+        marcado = self.marcado
+        pila = []
+        listas = []
+        lista = raiz
+        while True:
+            tipo = self.actual
+            if tipo == 'END' or tipo == 'ELSE' or tipo is None:
+                if not pila:
+                    if una:
+                        raise SyntaxError(f"Unexpected token {tipo} at position {self.pos}")
+                    return
+                nodo = pila[-1]
+                if marcado:
+                    self.cerrar_lista()
+                if tipo == 'ELSE':
+                    lista_else = self.abrir_else(nodo)
+                    if lista_else is not None:
+                        self.consume('ELSE')
+                        lista = listas[-1] = lista_else
+                        if marcado:
+                            self.abrir_lista()
+                        continue
+                self.consume('END')
+                pila.pop()
+                listas.pop()
+                self.cerrar_bloque(nodo)
+                lista = listas[-1] if listas else raiz
+                lista.append(nodo)
+            elif tipo == 'IF' or tipo == 'WHILE' or tipo == 'FOR':
+                if marcado:
+                    self.abrir_instruccion()
+                if tipo == 'IF':
+                    nodo, lista = self.cabecera_condicional()
+                else:
+                    nodo, lista = self.cabecera_bucle()
+                pila.append(nodo)
+                listas.append(lista)
+                if marcado:
+                    self.abrir_lista()
+                continue
+            else:
+                if marcado:
+                    self.abrir_instruccion()
+                lista.append(self.instruccion_simple())
+            if marcado:
+                self.cerrar_instruccion()
+            if una and not pila:
+                return
+
+    def nueva_lista(self):
+        return []
+
+    def abrir_else(self, nodo):
+        # Crea y devuelve la lista del ELSE de nodo, o None si no admite uno
+        if type(nodo) is Condicional and nodo.instrucciones_else is None:
+            nodo.instrucciones_else = []
+            return nodo.instrucciones_else
+        return None
+
+    def cerrar_bloque(self, nodo):
+        # Se llama al consumir el END de nodo
+        if type(nodo) is Condicional and nodo.instrucciones_else is None:
+            nodo.instrucciones_else = []
+
+    def posicion_nodo(self, nodo):
+        return nodo.linea, nodo.columna
+
+    # Ganchos para quien necesite conocer los rangos de tokens de cada
+    # instrucción y de cada lista (ver compilador.incremental); solo se
+    # llaman desde analizar_bloques si marcado es verdadero
+    marcado = False
+
+    def abrir_lista(self):
+        pass
+
+    def cerrar_lista(self):
+        pass
+
+    def abrir_instruccion(self):
+        pass
+
+    def cerrar_instruccion(self):
+        pass
+
+    def instruccion_simple(self):
+        token_type = self.actual
+        if token_type == 'VAR':
+            return self.declaracion()
+        elif token_type == 'ID':
+            return self.asignacion()
+        elif token_type == 'PRINT':
+            return self.impresion()
+        elif token_type == 'CALL':
+            return self.llamada_funcion()
+        else:
+            raise self.error_token(f"Unexpected token {token_type} at position {self.pos}")
+
+    def declaracion(self):
+        linea, columna = self.posicion()
+        self.consume('VAR')
+        id = self.consume('ID')
+        if self.actual == 'ASSIGN':
+            self.consume('ASSIGN')
+            expresion = self.expresion()
+            self.consume('STMT_END')
+            return self.Declaracion(id, expresion, linea, columna)
+        else:
+            self.consume('STMT_END')
+            return self.Declaracion(id, None, linea, columna)
+
+    def asignacion(self):
+        linea, columna = self.posicion()
+        id = self.consume('ID')
+        self.consume('ASSIGN')
+        expresion = self.expresion()
+        self.consume('STMT_END')
+        return self.Asignacion(id, expresion, linea, columna)
+
+    # Las cabeceras de los bloques devuelven el nodo y la lista de
+    # instrucciones que analizar_bloques debe llenar
+    def cabecera_condicional(self):
+        linea, columna = self.posicion()
+        self.consume('IF')
+        condicion = self.condicion()
+        self.consume('THEN')
+        lista = self.nueva_lista()
+        return self.Condicional(condicion, lista, None, linea, columna), lista
+
+    def cabecera_bucle(self):
+        linea, columna = self.posicion()
+        lista = self.nueva_lista()
+        if self.actual == 'WHILE':
+            self.consume('WHILE')
+            condicion = self.condicion()
+            self.consume('DO')
+            nodo = self.BucleWhile(condicion, lista, linea, columna)
+        else:
+            self.consume('FOR')
+            id = self.consume('ID')
+            self.consume('ASSIGN')
+            inicio = self.expresion()
+            self.consume('TO')
+            fin = self.expresion()
+            self.consume('DO')
+            nodo = self.BucleFor(id, inicio, fin, lista, linea, columna)
+        return nodo, lista
+
+    def impresion(self):
+        linea, columna = self.posicion()
+        self.consume('PRINT')
+        expresion = self.expresion()
+        self.consume('STMT_END')
+        return self.Impresion(expresion, linea, columna)
+
+    def llamada_funcion(self):
+        linea, columna = self.posicion()
+        self.consume('CALL')
+        id = self.consume('ID')
+        self.consume('LPAREN')
+        if self.actual != 'RPAREN':
+            argumentos = self.argumentos()
+        else:
+            argumentos = []
+        self.consume('RPAREN')
+        self.consume('STMT_END')
+        return self.LlamadaFuncion(id, argumentos, linea, columna)
+
+    def argumentos(self):
+        argumentos = [self.expresion()]
+        while self.actual == 'COMMA':
+            self.consume('COMMA')
+            argumentos.append(self.expresion())
+        return argumentos
+
+    def expresion(self):
+        termino = self.termino()
+        while self.actual == 'OP':
+            operador = self.consume('OP')
+            termino_derecho = self.termino()
+            linea, columna = self.posicion_nodo(termino)
+            termino = self.Expresion(termino, operador, termino_derecho, linea, columna)
+        return termino
+
+    def termino(self):
+        token_type = self.actual
+        clase = self.hojas.get(token_type)
+        if clase is None:
+            raise self.error_token(f"Unexpected token {token_type} at position {self.pos}")
+        buffer = self.buffer
+        if buffer is None:
+            linea, columna = self.posicion()
+            return clase(self.consume(token_type), linea, columna)
+        # Camino rápido del modo columnar: posicion y consume en línea, ya
+        # que casi la mitad de los tokens de un programa son operandos
+        pos = self.pos
+        inicio = buffer.inicios[pos]
+        if not self.inicio_linea <= inicio < self.fin_linea:
+            self.linea, self.inicio_linea, self.fin_linea = buffer.rango_linea(inicio)
+        tipos = self.tokens
+        self.pos = pos + 1
+        self.actual = TIPOS[tipos[pos + 1]] if pos + 1 < len(tipos) else None
+        return clase(buffer.valor(pos), self.linea, inicio - self.inicio_linea)
+
+    def condicion(self):
+        expresion_izq = self.expresion()
+        operador = self.consume('OP_REL')
+        expresion_der = self.expresion()
+        linea, columna = self.posicion_nodo(expresion_izq)
+        return self.Condicion(expresion_izq, operador, expresion_der, linea, columna)
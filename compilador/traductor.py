@@ -0,0 +1,458 @@
+import io
+import os
+from itertools import chain
+
+from . import plano
+from .nodos import Hoja, Nodo, Operacion, tabla_despacho
+from .semantico import CADENA, CARACTER, DECIMAL, ENTERO, SemanticAnalyzer, tipo_expresion, tipo_expresion_plana
+
+# Tamaño a partir del cual el escritor vuelca su búfer en la salida
+TAMANO_BUFFER = 1 << 16
+
+
+class EscritorC:
+    # Escribe líneas de código C en un archivo (o cualquier objeto con write)
+    # llevando la indentación y agrupando las escrituras en un búfer, de modo
+    # que el coste es proporcional al tamaño de la salida y la memoria no
+    # depende de ella
+    def __init__(self, salida, tamano_buffer=TAMANO_BUFFER):
+        self.salida = salida
+        self.tamano_buffer = tamano_buffer
+        self.partes = []
+        self.pendiente = 0
+        self.nivel = 0
+        self.sangrias = ['']
+
+    def linea(self, texto):
+        if self.nivel >= len(self.sangrias):
+            self.sangrias.extend('    ' * n for n in range(len(self.sangrias), self.nivel + 1))
+        texto = f'{self.sangrias[self.nivel]}{texto}\n'
+        self.partes.append(texto)
+        self.pendiente += len(texto)
+        if self.pendiente >= self.tamano_buffer:
+            self.vaciar()
+
+    def vaciar(self):
+        if self.partes:
+            self.salida.write(''.join(self.partes))
+            self.partes.clear()
+            self.pendiente = 0
+
+
+# Cómo se declara una variable de cada tipo (seguido del nombre) y con qué
+# función del entorno de ejecución se imprime
+DECLARADORES = {ENTERO: 'int ', DECIMAL: 'double ', CARACTER: 'char ', CADENA: 'const char *'}
+IMPRESORES = {ENTERO: '_rt_imprimir_int', DECIMAL: '_rt_imprimir_double', CARACTER: '_rt_imprimir_char',
+              CADENA: '_rt_imprimir_cadena'}
+
+# Entorno de ejecución que se escribe delante de main: PRINT no llama a
+# printf, sino que formatea el valor (seguido de un salto de línea) en un
+# búfer grande que se vuelca con fwrite al llenarse y al terminar main. Los
+# enteros se formatean a mano; los double también cuando son enteros
+# pequeños, y si no con snprintf y el mismo %g que printf. Las funciones son
+# static inline para que las que el programa no usa no den avisos
+ENTORNO_C = r'''#include <string.h>
+
+static char _rt_salida[1 << 16];
+static size_t _rt_usado;
+
+static inline void _rt_vaciar(void) {
+    fwrite(_rt_salida, 1, _rt_usado, stdout);
+    _rt_usado = 0;
+}
+
+static inline void _rt_reservar(size_t n) {
+    if (_rt_usado + n > sizeof _rt_salida) {
+        _rt_vaciar();
+    }
+}
+
+static inline void _rt_escribir_int(int v) {
+    char cifras[10];
+    int n = 0;
+    unsigned int u = v < 0 ? 0u - (unsigned int) v : (unsigned int) v;
+    if (v < 0) {
+        _rt_salida[_rt_usado++] = '-';
+    }
+    do {
+        cifras[n++] = (char) ('0' + u % 10);
+        u /= 10;
+    } while (u);
+    while (n) {
+        _rt_salida[_rt_usado++] = cifras[--n];
+    }
+}
+
+static inline void _rt_imprimir_int(int v) {
+    _rt_reservar(12);
+    _rt_escribir_int(v);
+    _rt_salida[_rt_usado++] = '\n';
+}
+
+static inline void _rt_imprimir_double(double v) {
+    _rt_reservar(32);
+    if (v > -1e6 && v < 1e6 && v == (int) v && (v != 0 || 1 / v > 0)) {
+        _rt_escribir_int((int) v);
+    } else {
+        _rt_usado += snprintf(_rt_salida + _rt_usado, 31, "%g", v);
+    }
+    _rt_salida[_rt_usado++] = '\n';
+}
+
+static inline void _rt_imprimir_char(char c) {
+    _rt_reservar(2);
+    _rt_salida[_rt_usado++] = c;
+    _rt_salida[_rt_usado++] = '\n';
+}
+
+static inline void _rt_imprimir_cadena(const char *s) {
+    size_t n = strlen(s);
+    _rt_reservar(n + 1);
+    if (n >= sizeof _rt_salida) {
+        fwrite(s, 1, n, stdout);
+    } else {
+        memcpy(_rt_salida + _rt_usado, s, n);
+        _rt_usado += n;
+    }
+    _rt_salida[_rt_usado++] = '\n';
+}
+'''.splitlines()
+
+
+# Marcas que las instrucciones con cuerpo intercalan entre sus instrucciones
+# para que translate_to ajuste la indentación
+SANGRAR = object()
+DESANGRAR = object()
+
+
+class ASTToCTranslator:
+    def __init__(self, ast, tipos=None):
+        # tipos es el de un SemanticAnalyzer que ya ha analizado el AST (o
+        # el AST del que sale tras optimizarlo); si no se da, se analiza al
+        # traducir
+        self.ast = ast
+        self.tipos = tipos
+        self.escritor = None
+        # Método translate_* de cada clase de nodo, resuelto una sola vez
+        self.despacho = tabla_despacho(self, 'translate_')
+
+    def translate(self):
+        salida = io.StringIO()
+        self.translate_to(salida)
+        return salida.getvalue()
+
+    def translate_to(self, salida):
+        # Escribe la traducción directamente en salida. El recorrido usa una
+        # pila explícita de iteradores en lugar de recursión: las
+        # instrucciones con cuerpo escriben su cabecera y devuelven la
+        # secuencia de lo que falta (instrucciones, marcas de indentación y
+        # líneas de cierre), que se procesa antes de seguir con sus hermanas
+        escritor = self.escritor = EscritorC(salida)
+        if self.tipos is None:
+            analizador = SemanticAnalyzer()
+            analizador.analyze(self.ast)
+            self.tipos = analizador.tipos
+        if isinstance(self.ast, plano.ASTPlano):
+            self.translate_plano(escritor)
+            escritor.vaciar()
+            return
+        self.recorrer((self.ast,))
+        escritor.vaciar()
+
+    def recorrer(self, elementos):
+        # Traduce una secuencia de nodos, marcas y líneas en self.escritor
+        escritor = self.escritor
+        despacho = self.despacho
+        pila = [iter(elementos)]
+        while pila:
+            for elemento in pila[-1]:
+                if isinstance(elemento, Nodo):
+                    resto = despacho[type(elemento)](elemento)
+                    if resto is not None:
+                        pila.append(iter(resto))
+                        break
+                elif elemento is SANGRAR:
+                    escritor.nivel += 1
+                elif elemento is DESANGRAR:
+                    escritor.nivel -= 1
+                else:
+                    escritor.linea(elemento)
+            else:
+                pila.pop()
+
+    def translate_paralelo(self, salida, workers=None, partes=None):
+        # Como translate_to, pero las instrucciones de nivel superior se
+        # reparten en grupos consecutivos que se traducen en un pool de
+        # procesos; los textos se escriben en orden, así que el C es idéntico.
+        # Solo para el AST de objetos
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if partes is None:
+            # Varios grupos por trabajador equilibran la carga
+            partes = workers * 4
+        if self.tipos is None:
+            analizador = SemanticAnalyzer()
+            analizador.analyze(self.ast)
+            self.tipos = analizador.tipos
+        instrucciones = self.ast.instrucciones
+        escritor = self.escritor = EscritorC(salida)
+        self.translate_cabecera()
+        escritor.vaciar()
+        grupos = repartir(instrucciones, partes)
+        if workers <= 1 or len(grupos) <= 1:
+            escritor.nivel = 1
+            self.recorrer(instrucciones)
+            escritor.nivel = 0
+        else:
+            # Con fork los trabajadores heredan el AST en lugar de recibirlo
+            # serializado
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            contexto = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() \
+                else None
+            with ProcessPoolExecutor(workers, contexto, _iniciar_trabajador, (instrucciones, self.tipos)) as pool:
+                for texto in pool.map(_traducir_grupo, grupos):
+                    salida.write(texto)
+        for linea in ("    _rt_vaciar();", "    return 0;", "}"):
+            escritor.linea(linea)
+        escritor.vaciar()
+
+    def translate_plano(self, escritor):
+        # Igual que el recorrido de translate_to pero sobre un ASTPlano: los
+        # elementos de la pila son índices de nodos en lugar de nodos
+        ast = self.ast
+        tipos, campo1, campo2, campo3 = ast.tipos, ast.campo1, ast.campo2, ast.campo3
+        textos = self.textos = [valor if isinstance(valor, str) else str(valor) for valor in ast.valores]
+        expresion = self.expresion_plana
+        self.translate_cabecera()
+        pila = [self.translate_bloque(ast.lista(campo1[ast.raiz]), "    _rt_vaciar();", "    return 0;", "}")]
+        while pila:
+            for elemento in pila[-1]:
+                if type(elemento) is not int:
+                    if elemento is SANGRAR:
+                        escritor.nivel += 1
+                    elif elemento is DESANGRAR:
+                        escritor.nivel -= 1
+                    else:
+                        escritor.linea(elemento)
+                    continue
+                tipo = tipos[elemento]
+                if tipo == plano.DECLARACION:
+                    id = textos[campo1[elemento]]
+                    declarador = self.declarador(ast.ranuras[elemento])
+                    if campo2[elemento] != plano.NINGUNO:
+                        escritor.linea(f"{declarador}{id} = {expresion(campo2[elemento])};")
+                    else:
+                        escritor.linea(f"{declarador}{id};")
+                elif tipo == plano.ASIGNACION:
+                    escritor.linea(f"{textos[campo1[elemento]]} = {expresion(campo2[elemento])};")
+                elif tipo == plano.IMPRESION:
+                    impresor = IMPRESORES[tipo_expresion_plana(ast, campo1[elemento], self.tipos) or ENTERO]
+                    escritor.linea(f"{impresor}({expresion(campo1[elemento])});")
+                elif tipo == plano.LLAMADA_FUNCION:
+                    args = ", ".join(expresion(arg) for arg in ast.lista(campo2[elemento]))
+                    escritor.linea(f"{textos[campo1[elemento]]}({args});")
+                elif tipo == plano.CONDICIONAL:
+                    escritor.linea(f"if {expresion(campo1[elemento])} {{")
+                    instrucciones_then = ast.lista(campo2[elemento])
+                    instrucciones_else = ast.lista(campo3[elemento])
+                    if instrucciones_else:
+                        pila.append(chain(self.translate_bloque(instrucciones_then, "} else {"),
+                                          self.translate_bloque(instrucciones_else, "}")))
+                    else:
+                        pila.append(self.translate_bloque(instrucciones_then, "}"))
+                    break
+                elif tipo == plano.BUCLE_WHILE:
+                    escritor.linea(f"while {expresion(campo1[elemento])} {{")
+                    pila.append(self.translate_bloque(ast.lista(campo2[elemento]), "}"))
+                    break
+                elif tipo == plano.BUCLE_FOR:
+                    id = textos[campo1[elemento]]
+                    inicio = expresion(campo2[elemento])
+                    fin = expresion(campo3[elemento])
+                    declarador = self.declarador(ast.ranuras[elemento])
+                    escritor.linea(f"for ({declarador}{id} = {inicio}; {id} <= {fin}; {id}++) {{")
+                    pila.append(self.translate_bloque(ast.lista(ast.campo4[elemento]), "}"))
+                    break
+                else:
+                    raise ValueError(f"Unknown node type: {ast.tipo(elemento)}")
+            else:
+                pila.pop()
+
+    def expresion_plana(self, nodo):
+        # Texto de la expresión, condición u operando nodo de un ASTPlano
+        ast = self.ast
+        tipos, campo1, campo2, campo3 = ast.tipos, ast.campo1, ast.campo2, ast.campo3
+        textos = self.textos
+        if tipos[nodo] >= plano.PRIMERA_HOJA:
+            return textos[campo1[nodo]]
+        partes = []
+        pila = [nodo]
+        while pila:
+            actual = pila.pop()
+            if type(actual) is str:
+                partes.append(actual)
+            elif tipos[actual] >= plano.PRIMERA_HOJA:
+                partes.append(textos[campo1[actual]])
+            else:
+                partes.append("(")
+                pila.extend((")", campo2[actual], f" {textos[campo3[actual]]} ", campo1[actual]))
+        return ''.join(partes)
+
+    def translate_node(self, node):
+        # Las instrucciones simples se escriben en el escritor y las que tienen
+        # cuerpo devuelven lo que queda por traducir (ver translate_to); las
+        # expresiones, condiciones y operandos devuelven su texto
+        metodo = self.despacho.get(type(node))
+        if metodo is None:
+            raise TypeError(f"Unexpected node type: {type(node).__name__}, value: {node}")
+        return metodo(node)
+
+    def declarador(self, ranura):
+        # Los tipos son por declaración: dos variables con el mismo nombre en
+        # bloques distintos pueden tener tipos distintos
+        return DECLARADORES[self.tipos.get(ranura, ENTERO)]
+
+    def translate_bloque(self, instrucciones, *cierre):
+        return chain((SANGRAR,), instrucciones, (DESANGRAR,), cierre)
+
+    def translate_programa(self, node):
+        self.translate_cabecera()
+        return self.translate_bloque(node.instrucciones, "    _rt_vaciar();", "    return 0;", "}")
+
+    def translate_cabecera(self):
+        escritor = self.escritor
+        escritor.linea("#include <stdio.h>")
+        for linea in ENTORNO_C:
+            escritor.linea(linea)
+        escritor.linea("")
+        escritor.linea("int main() {")
+
+    def translate_declaracion(self, node):
+        id = node.id
+        if node.expresion is not None:
+            expr = self.translate_node(node.expresion)
+            self.escritor.linea(f"{self.declarador(node.ranura)}{id} = {expr};")
+        else:
+            self.escritor.linea(f"{self.declarador(node.ranura)}{id};")
+
+    def translate_asignacion(self, node):
+        id = node.id
+        expr = self.translate_node(node.expresion)
+        self.escritor.linea(f"{id} = {expr};")
+
+    def translate_condicional(self, node):
+        condicion = self.translate_node(node.condicion)
+        instrucciones_then = node.instrucciones_then
+        instrucciones_else = node.instrucciones_else
+        self.escritor.linea(f"if {condicion} {{")
+        if instrucciones_else:
+            return chain(self.translate_bloque(instrucciones_then, "} else {"),
+                         self.translate_bloque(instrucciones_else, "}"))
+        return self.translate_bloque(instrucciones_then, "}")
+
+    def translate_bucle_while(self, node):
+        condicion = self.translate_node(node.condicion)
+        self.escritor.linea(f"while {condicion} {{")
+        return self.translate_bloque(node.instrucciones, "}")
+
+    def translate_bucle_for(self, node):
+        id = node.id
+        inicio = self.translate_node(node.inicio)
+        fin = self.translate_node(node.fin)
+        self.escritor.linea(f"for ({self.declarador(node.ranura)}{id} = {inicio}; {id} <= {fin}; {id}++) {{")
+        return self.translate_bloque(node.instrucciones, "}")
+
+    def translate_impresion(self, node):
+        expr = self.translate_node(node.expresion)
+        impresor = IMPRESORES[tipo_expresion(node.expresion, self.tipos) or ENTERO]
+        self.escritor.linea(f"{impresor}({expr});")
+
+    def translate_llamada_funcion(self, node):
+        id = node.id
+        argumentos = node.argumentos
+        args = ", ".join(self.translate_node(arg) for arg in argumentos)
+        self.escritor.linea(f"{id}({args});")
+
+    def translate_expresion(self, node):
+        # Las expresiones se anidan por la izquierda tantas veces como
+        # operadores tengan, así que se recorren con una pila y el texto se
+        # junta una sola vez al final en lugar de copiarlo en cada nivel. El
+        # caso más común, dos operandos simples, no necesita la pila
+        despacho = self.despacho
+        izquierda, derecha = node.izquierda, node.derecha
+        if isinstance(izquierda, Hoja) and isinstance(derecha, Hoja):
+            return f"({despacho[type(izquierda)](izquierda)} {node.operador} {despacho[type(derecha)](derecha)})"
+        partes = []
+        pila = [node]
+        while pila:
+            actual = pila.pop()
+            if isinstance(actual, Operacion):
+                partes.append("(")
+                pila.extend((")", actual.derecha, f" {actual.operador} ", actual.izquierda))
+            elif isinstance(actual, str):
+                partes.append(actual)
+            else:
+                partes.append(self.translate_node(actual))
+        return ''.join(partes)
+
+    def translate_condicion(self, node):
+        return self.translate_expresion(node)
+
+    def translate_identificador(self, node):
+        return node.valor
+
+    def translate_numero(self, node):
+        return str(node.valor)
+
+    def translate_cadena(self, node):
+        return node.valor
+
+    def translate_caracter(self, node):
+        return node.valor
+
+
+def repartir(instrucciones, partes):
+    # Rangos [inicio, fin) de hasta partes grupos consecutivos de
+    # instrucciones con un peso parecido. El peso de una instrucción son las
+    # líneas del fuente hasta la siguiente, que sigue bien al tamaño de su
+    # traducción (la última pesa la media)
+    n = len(instrucciones)
+    if n == 0:
+        return []
+    pesos = [max(1, instrucciones[i + 1].linea - instrucciones[i].linea) for i in range(n - 1)]
+    pesos.append(max(1, sum(pesos) // max(1, n - 1)))
+    total = sum(pesos)
+    grupos = []
+    inicio = 0
+    acumulado = 0
+    for i, peso in enumerate(pesos):
+        acumulado += peso
+        if acumulado * partes >= total * (len(grupos) + 1) and i + 1 < n:
+            grupos.append((inicio, i + 1))
+            inicio = i + 1
+    grupos.append((inicio, n))
+    return grupos
+
+
+# Estado de cada proceso trabajador de translate_paralelo
+_trabajo = None
+
+
+def _iniciar_trabajador(instrucciones, tipos):
+    global _trabajo
+    _trabajo = (instrucciones, tipos)
+
+
+def _traducir_grupo(grupo):
+    # Texto C de un grupo de instrucciones de nivel superior, sangrado como
+    # el cuerpo de main
+    instrucciones, tipos = _trabajo
+    traductor = ASTToCTranslator(None, tipos)
+    salida = io.StringIO()
+    escritor = traductor.escritor = EscritorC(salida)
+    escritor.nivel = 1
+    inicio, fin = grupo
+    traductor.recorrer(instrucciones[inicio:fin])
+    escritor.vaciar()
+    return salida.getvalue()
@@ -0,0 +1,282 @@
+import codecs
+
+from .maquina import ErrorEjecucion, _formatear_decimal
+from .nodos import (Asignacion, BucleFor, BucleWhile, Cadena, Caracter, Condicional, Declaracion, Identificador,
+                    Impresion, LlamadaFuncion, Operacion)
+from .semantico import CADENA, CARACTER, DECIMAL, ENTERO, SemanticError, tipo_hoja, tipo_operacion
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Ejecución por lotes: un mismo programa sobre n conjuntos de valores
+# iniciales a la vez (barridos de parámetros). Cada variable es un array de
+# NumPy con un valor por instancia (carril) y cada instrucción se ejecuta una
+# sola vez para todos, bajo una máscara con los carriles activos: un IF
+# ejecuta sus dos ramas con la máscara de los carriles que entran en cada
+# una, y un WHILE o un FOR repite su cuerpo mientras quede algún carril en
+# el bucle, con la máscara de los que siguen dentro. La semántica es la del
+# C generado y de MaquinaVirtual: int32 con desbordamiento circular,
+# división entera truncada, double y ámbitos de bloque. NumPy es opcional y
+# solo se necesita para este módulo.
+
+
+def _dtype(tipo):
+    # Tipo de array de cada tipo del lenguaje: los char se guardan como su
+    # código y los strings como objetos
+    if tipo == DECIMAL:
+        return np.float64
+    if tipo == CADENA:
+        return object
+    return np.int32
+
+
+def _formatear(valor, tipo):
+    if tipo == DECIMAL:
+        return _formatear_decimal(float(valor))
+    if tipo == CARACTER:
+        return f'{chr(valor)}\n'
+    if tipo == CADENA:
+        return f'{valor}\n'
+    return f'{int(valor)}\n'
+
+
+class ResultadoVectorial:
+    def __init__(self, n, variables, impresiones):
+        self.n = n
+        self.variables = variables      # Nombre -> array con su valor final en cada carril
+        self.impresiones = impresiones  # (máscara, valores de los carriles activos, tipo) por PRINT ejecutado
+
+    def __repr__(self):
+        return f'ResultadoVectorial({self.n} carriles, {len(self.variables)} variables, {len(self.impresiones)} PRINT)'
+
+    def salidas(self):
+        # Texto que habría escrito cada instancia, igual que MaquinaVirtual
+        partes = [[] for _ in range(self.n)]
+        for mascara, valores, tipo in self.impresiones:
+            for carril, valor in zip(np.flatnonzero(mascara).tolist(), valores):
+                partes[carril].append(_formatear(valor, tipo))
+        return [''.join(lista) for lista in partes]
+
+    def salida(self, carril):
+        partes = []
+        for mascara, valores, tipo in self.impresiones:
+            if mascara[carril]:
+                partes.append(_formatear(valores[int(np.count_nonzero(mascara[:carril]))], tipo))
+        return ''.join(partes)
+
+
+class InterpreteVectorial:
+    def __init__(self, tipos, funciones=None):
+        # tipos es el de SemanticAnalyzer. Las funciones de CALL reciben la
+        # máscara de carriles activos y un array por argumento
+        if np is None:
+            raise ImportError("La ejecución vectorial necesita NumPy (pip install numpy)")
+        self.tipos = tipos
+        self.funciones = dict(funciones or {})
+
+    def ejecutar(self, programa, n, iniciales=None):
+        # iniciales: nombre -> valor o array de n valores que sustituye al
+        # valor inicial de las variables declaradas en el nivel superior
+        if programa.ranuras is None:
+            raise ValueError("El AST no tiene ranuras de variables: analízalo antes con SemanticAnalyzer")
+        self.n = n
+        self.iniciales = dict(iniciales or {})
+        # Array de cada ranura de variable, y ranuras del nivel superior
+        self.valores = [None] * programa.ranuras
+        self.globales = {}
+        self.impresiones = []
+        # Cada marco es [iterador de instrucciones, máscara, función que al
+        # agotarse devuelve el marco siguiente (otra vuelta de un bucle) o
+        # None]
+        raiz = self.raiz = [iter(programa.instrucciones), np.ones(n, dtype=bool), None]
+        pila = [raiz]
+        with np.errstate(all='ignore'):
+            while pila:
+                marco = pila[-1]
+                mascara = marco[1]
+                for instruccion in marco[0]:
+                    clase = type(instruccion)
+                    if clase is Condicional:
+                        condicion = self.condicion(instruccion.condicion, mascara)
+                        rama_else = mascara & ~condicion
+                        rama_then = mascara & condicion
+                        if instruccion.instrucciones_else and rama_else.any():
+                            pila.append([iter(instruccion.instrucciones_else), rama_else, None])
+                        if rama_then.any():
+                            pila.append([iter(instruccion.instrucciones_then), rama_then, None])
+                        break
+                    elif clase is BucleWhile:
+                        siguiente = self.bucle_while(instruccion, mascara)
+                        if siguiente is not None:
+                            pila.append(siguiente)
+                        break
+                    elif clase is BucleFor:
+                        siguiente = self.bucle_for(instruccion, mascara)
+                        if siguiente is not None:
+                            pila.append(siguiente)
+                        break
+                    else:
+                        self.instruccion_simple(instruccion, marco)
+                else:
+                    pila.pop()
+                    if marco[2] is not None:
+                        siguiente = marco[2]()
+                        if siguiente is not None:
+                            pila.append(siguiente)
+        variables = {id: self.valores[ranura] for id, ranura in self.globales.items()}
+        return ResultadoVectorial(n, variables, self.impresiones)
+
+    def bucle_while(self, nodo, mascara):
+        # Marco de la primera vuelta, o None si ningún carril entra
+        dentro = mascara & self.condicion(nodo.condicion, mascara)
+        if not dentro.any():
+            return None
+
+        def vuelta():
+            siguen = dentro & self.condicion(nodo.condicion, dentro)
+            return self.bucle_while(nodo, siguen)
+        return [iter(nodo.instrucciones), dentro, vuelta]
+
+    def bucle_for(self, nodo, mascara):
+        inicio, _ = self.evaluar(nodo.inicio, mascara)
+        variable = np.zeros(self.n, dtype=_dtype(self.tipos.get(nodo.ranura, ENTERO)))
+        np.copyto(variable, inicio, where=mascara, casting='unsafe')
+        self.valores[nodo.ranura] = variable
+
+        def siguiente(activos):
+            dentro = activos & (variable <= self.evaluar(nodo.fin, activos)[0])
+            if not dentro.any():
+                return None
+
+            def vuelta():
+                np.add(variable, 1, out=variable, where=dentro, casting='unsafe')
+                return siguiente(dentro)
+            return [iter(nodo.instrucciones), dentro, vuelta]
+        return siguiente(mascara)
+
+    def instruccion_simple(self, nodo, marco):
+        mascara = marco[1]
+        clase = type(nodo)
+        if clase is Asignacion:
+            valor, _ = self.evaluar(nodo.expresion, mascara)
+            np.copyto(self.valores[nodo.ranura], valor, where=mascara, casting='unsafe')
+        elif clase is Declaracion:
+            variable = np.zeros(self.n, dtype=_dtype(self.tipos.get(nodo.ranura, ENTERO)))
+            if variable.dtype == object:
+                variable[:] = ''
+            if marco is self.raiz and nodo.id in self.iniciales:
+                np.copyto(variable, self.iniciales[nodo.id], casting='unsafe')
+            elif nodo.expresion is not None:
+                valor, _ = self.evaluar(nodo.expresion, mascara)
+                np.copyto(variable, valor, where=mascara, casting='unsafe')
+            self.valores[nodo.ranura] = variable
+            if marco is self.raiz:
+                self.globales[nodo.id] = nodo.ranura
+        elif clase is Impresion:
+            valor, tipo = self.evaluar(nodo.expresion, mascara)
+            valores = np.broadcast_to(valor, (self.n,))[mascara]
+            self.impresiones.append((mascara, valores, tipo or ENTERO))
+        elif clase is LlamadaFuncion:
+            funcion = self.funciones.get(nodo.id)
+            if funcion is None:
+                raise ErrorEjecucion(f"Función '{nodo.id}' no definida.", nodo.linea, nodo.columna)
+            argumentos = [np.broadcast_to(self.evaluar(argumento, mascara)[0], (self.n,))
+                          for argumento in nodo.argumentos]
+            funcion(mascara, *argumentos)
+
+    def hoja(self, nodo):
+        clase = type(nodo)
+        if clase is Identificador:
+            return self.valores[nodo.ranura]
+        elif clase is Cadena:
+            valor = nodo.valor[1:-1]
+            return codecs.decode(valor, 'unicode_escape') if '\\' in valor else valor
+        elif clase is Caracter:
+            return np.int32(ord(nodo.valor[1]))
+        elif type(nodo.valor) is float:
+            return np.float64(nodo.valor)
+        return np.int32(nodo.valor)
+
+    def evaluar(self, nodo, mascara):
+        # Valor (array o escalar) y tipo de una expresión. La expresión se
+        # calcula en todos los carriles; la máscara sirve para no dar por
+        # errónea una división por cero en los inactivos
+        rama = []
+        while isinstance(nodo, Operacion):
+            rama.append(nodo)
+            nodo = nodo.izquierda
+        valor = self.hoja(nodo)
+        tipo = tipo_hoja(nodo, self.tipos)
+        for operacion in reversed(rama):
+            derecha = operacion.derecha
+            if isinstance(derecha, Operacion):
+                valor_derecha, tipo_derecha = self.evaluar(derecha, mascara)
+            else:
+                valor_derecha, tipo_derecha = self.hoja(derecha), tipo_hoja(derecha, self.tipos)
+            tipo = tipo_operacion(tipo, operacion.operador, tipo_derecha, False, operacion.linea, operacion.columna)
+            valor = self.operar(valor, operacion, valor_derecha, tipo == DECIMAL, mascara)
+        return valor, tipo
+
+    def operar(self, izquierda, operacion, derecha, decimal, mascara):
+        operador = operacion.operador
+        if decimal:
+            izquierda = np.asarray(izquierda, dtype=np.float64)
+        if operador == '+':
+            return izquierda + derecha
+        elif operador == '-':
+            return izquierda - derecha
+        elif operador == '*':
+            return izquierda * derecha
+        elif decimal:
+            return izquierda / derecha
+        # División entera truncada, en 64 bits para que INT_MIN / -1 se
+        # desborde como en int32 al volver
+        izquierda = np.asarray(izquierda, dtype=np.int64)
+        derecha = np.asarray(derecha, dtype=np.int64)
+        ceros = derecha == 0
+        if (ceros & mascara).any():
+            raise ErrorEjecucion("División entera por cero.", operacion.linea, operacion.columna)
+        derecha = np.where(ceros, 1, derecha)
+        cociente = np.abs(izquierda) // np.abs(derecha)
+        return np.where((izquierda < 0) != (derecha < 0), -cociente, cociente).astype(np.int32)
+
+    def condicion(self, condicion, mascara):
+        izquierda, _ = self.evaluar(condicion.izquierda, mascara)
+        derecha, _ = self.evaluar(condicion.derecha, mascara)
+        operador = condicion.operador
+        if operador == '<':
+            return np.broadcast_to(izquierda < derecha, (self.n,))
+        elif operador == '>':
+            return np.broadcast_to(izquierda > derecha, (self.n,))
+        elif operador == '<=':
+            return np.broadcast_to(izquierda <= derecha, (self.n,))
+        elif operador == '>=':
+            return np.broadcast_to(izquierda >= derecha, (self.n,))
+        elif operador == '!=':
+            return np.broadcast_to(izquierda != derecha, (self.n,))
+        raise SemanticError(f"Operador '{operador}' no válido.", condicion.linea, condicion.columna)
+
+
+def ejecutar_vectorial(fuente, iniciales, n=None, funciones=None, optimizar=True):
+    # Analiza el programa fuente y lo ejecuta una vez por conjunto de
+    # valores iniciales. n es el número de instancias; por defecto, la
+    # longitud de los arrays de iniciales
+    from .lexico import TokenBuffer
+    from .sintactico import Parser
+    from .semantico import SemanticAnalyzer
+    if np is None:
+        raise ImportError("La ejecución vectorial necesita NumPy (pip install numpy)")
+    if n is None:
+        longitudes = {len(valor) for valor in iniciales.values() if np.ndim(valor) == 1}
+        if len(longitudes) != 1:
+            raise ValueError("n no se puede deducir de iniciales: indica el número de instancias")
+        n = longitudes.pop()
+    ast = Parser(TokenBuffer(fuente)).parse()
+    analizador = SemanticAnalyzer()
+    analizador.analyze(ast)
+    if optimizar:
+        from .optimizador import Optimizer
+        ast = Optimizer(analizador.tipos).optimize(ast)
+    return InterpreteVectorial(analizador.tipos, funciones).ejecutar(ast, n, iniciales)
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'benchmarks')))
+
+from generador import GeneradorProgramas
+
+
+@pytest.fixture
+def generar():
+    # Programa sintético válido (benchmarks/generador.py) de unas n
+    # instrucciones; con la misma semilla, siempre el mismo
+    def generar(n, semilla=0, **opciones):
+        return GeneradorProgramas(semilla=semilla, **opciones).generar(n)
+    return generar
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from generador import PRODUCCIONES, GeneradorProgramas, leer_mezcla
+from suite import comparar, main
+
+import compilador
+
+
+def test_misma_semilla_mismo_programa(generar):
+    assert generar(500, semilla=3) == generar(500, semilla=3)
+    assert generar(500, semilla=3) != generar(500, semilla=4)
+
+
+@pytest.mark.parametrize('opciones', [
+    {},
+    {'profundidad': 1, 'ancho': 1},
+    {'profundidad': 12, 'ancho': 9, 'tamano_bloque': 2},
+    {'mezcla': leer_mezcla('IF=1,WHILE=1,FOR=1,PRINT=1'), 'profundidad': 3},
+    {'mezcla': leer_mezcla('CALL=1')},
+])
+def test_programas_validos(generar, opciones):
+    fuente = generar(600, **opciones)
+    for plano in (False, True):
+        assert compilador.compile(fuente, plano=plano).rstrip().endswith('return 0;\n}')
+    # El anidamiento no pasa de la profundidad pedida
+    sangrias = {len(linea) - len(linea.lstrip(' ')) for linea in fuente.splitlines()}
+    assert max(sangrias) <= 4 * opciones.get('profundidad', 4) + 4
+
+
+def test_cubre_todas_las_producciones(generar):
+    fuente = generar(2000)
+    primeras = {linea.split()[0] for linea in fuente.splitlines()[1:-1]}
+    assert primeras >= {'VAR', 'PRINT', 'CALL', 'IF', 'ELSE', 'WHILE', 'FOR', 'END'}
+    assert any('=' in linea and linea.split()[0].startswith(('v', 's', 'i')) for linea in fuente.splitlines())
+
+
+def test_leer_mezcla():
+    assert leer_mezcla('var=3, IF=0.5') == dict(dict.fromkeys(PRODUCCIONES, 0), VAR=3.0, IF=0.5)
+    with pytest.raises(ValueError, match='GOTO'):
+        leer_mezcla('GOTO=1')
+    with pytest.raises(ValueError):
+        GeneradorProgramas(mezcla=leer_mezcla('VAR=0'))
+
+
+def informe(por_segundo, pico):
+    return {'parametros': {'n': 10}, 'resultados': {'parse': {'por_segundo': por_segundo, 'pico_memoria': pico}}}
+
+
+def test_comparar():
+    base = informe(1000.0, 100)
+    assert comparar(informe(950.0, 105), base, 0.1)[1] is False
+    lineas, regresion = comparar(informe(800.0, 100), base, 0.1)
+    assert regresion and 'REGRESIÓN velocidad' in lineas[0]
+    lineas, regresion = comparar(informe(1000.0, 200), base, 0.1)
+    assert regresion and 'REGRESIÓN memoria' in lineas[0]
+    actual = informe(1000.0, 100)
+    actual['parametros']['n'] = 20
+    actual['resultados']['tokenize'] = actual['resultados']['parse']
+    lineas, regresion = comparar(actual, base, 0.1)
+    assert not regresion
+    assert lineas[0].startswith('aviso: parámetros distintos') and lineas[-1] == 'tokenize   sin base'
+
+
+def test_main_guarda_y_compara(tmp_path, capsys):
+    ruta = tmp_path / 'base.json'
+    assert main(['-n', '300', '-r', '1', '--salida', str(ruta)]) == 0
+    base = json.loads(ruta.read_text())
+    assert set(base['resultados']) == {'tokenize', 'parse', 'analyze', 'translate'}
+    assert all(medida['cantidad'] > 0 and medida['por_segundo'] > 0 for medida in base['resultados'].values())
+    assert main(['-n', '300', '-r', '1', '--comparar', str(ruta), '--tolerancia', '1000']) == 0
+    # Una base mucho más rápida es una regresión
+    for medida in base['resultados'].values():
+        medida['por_segundo'] *= 1000
+    ruta.write_text(json.dumps(base))
+    assert main(['-n', '300', '-r', '1', '--comparar', str(ruta)]) == 1
+    assert 'REGRESIÓN velocidad' in capsys.readouterr().out
@@ -0,0 +1,116 @@
+import os
+import pickle
+
+import pytest
+
+import compilador
+from compilador.__main__ import main
+from compilador.cache import CacheCompilacion
+
+FUENTE = """BEGIN
+VAR x = 2 + 3 * 4;
+IF 1 > 2 THEN
+    PRINT x;
+END
+PRINT x;
+END
+"""
+
+
+@pytest.mark.parametrize('optimizar', [True, False])
+@pytest.mark.parametrize('emit', compilador.ETAPAS)
+def test_cache_igual_que_sin_cache(tmp_path, emit, optimizar):
+    esperado = repr(compilador.compile(FUENTE, emit, optimizar=optimizar))
+    cache = CacheCompilacion(str(tmp_path))
+    assert repr(compilador.compile(FUENTE, emit, cache=cache, optimizar=optimizar)) == esperado
+    assert repr(compilador.compile(FUENTE, emit, cache=cache, optimizar=optimizar)) == esperado
+    assert (cache.fallos, cache.aciertos) == (1, 1)
+
+
+@pytest.mark.parametrize('emit', ['tokens', 'ast'])
+def test_solo_las_etapas_pedidas(tmp_path, emit):
+    # Sin análisis semántico, igual que sin caché
+    fuente = 'BEGIN\nx = 1 + 2;\nEND\n'
+    cache = CacheCompilacion(str(tmp_path))
+    for _ in range(2):
+        assert repr(compilador.compile(fuente, emit, cache=cache)) == repr(compilador.compile(fuente, emit))
+    assert cache.aciertos == 1
+    with pytest.raises(compilador.SemanticError):
+        compilador.compile(fuente, cache=cache)
+
+
+def test_optimizar_es_parte_de_la_clave(tmp_path):
+    cache = CacheCompilacion(str(tmp_path))
+    optimizado = compilador.compile(FUENTE, cache=cache)
+    sin_optimizar = compilador.compile(FUENTE, cache=cache, optimizar=False)
+    assert optimizado != sin_optimizar
+    assert cache.aciertos == 0
+    assert compilador.compile(FUENTE, cache=cache, optimizar=False) == sin_optimizar
+    assert cache.aciertos == 1
+
+
+def test_cli_cache_sin_optimizar(tmp_path):
+    fuente = tmp_path / 'programa.txt'
+    fuente.write_text(FUENTE)
+    directorio = str(tmp_path / 'cache')
+    for intento in range(2):
+        salida = tmp_path / f'salida{intento}.c'
+        assert main([str(fuente), '--cache', directorio, '--sin-optimizar', '-o', str(salida)]) == 0
+        assert salida.read_text() == compilador.compile(FUENTE, optimizar=False)
+
+
+def test_errores_no_se_guardan(tmp_path):
+    cache = CacheCompilacion(str(tmp_path))
+    with pytest.raises(compilador.SemanticError):
+        cache.compilar('BEGIN\nx = 1;\nEND\n')
+    assert cache.entradas() == []
+
+
+def test_expulsion_lru(tmp_path):
+    cache = CacheCompilacion(str(tmp_path), tamano_maximo=1, intervalo_expulsion=1)
+    for i in range(3):
+        cache.compilar(f'BEGIN\nPRINT {i};\nEND\n')
+    # Cada escritura expulsa todo lo que supera el límite (ni una entrada cabe)
+    assert cache.expulsiones >= 2
+    assert all(os.path.exists(ruta) for _, _, ruta in cache.entradas())
+
+
+def test_expulsion_entre_procesos_de_vida_corta(tmp_path):
+    # Cada instancia (un proceso de la línea de comandos) escribe una sola
+    # vez, lejos del intervalo de expulsión, y aun así se respeta el límite
+    # (de unas cinco entradas)
+    tamano_maximo = 5 * len(pickle.dumps(compilador.compile('BEGIN\nPRINT 10;\nEND\n'), pickle.HIGHEST_PROTOCOL))
+    for i in range(40):
+        cache = CacheCompilacion(str(tmp_path), tamano_maximo=tamano_maximo)
+        cache.compilar(f'BEGIN\nPRINT {i};\nEND\n')
+        assert sum(tamano for _, tamano, _ in cache.entradas()) <= tamano_maximo
+    # Se quedan las más recientes
+    assert 3 <= len(cache.entradas()) < 10
+    assert os.path.exists(cache.ruta(cache.clave('BEGIN\nPRINT 39;\nEND\n')))
+
+
+def test_compartida_entre_instancias(tmp_path):
+    CacheCompilacion(str(tmp_path)).compilar(FUENTE)
+    otra = CacheCompilacion(str(tmp_path))
+    assert otra.compilar(FUENTE) == compilador.compile(FUENTE)
+    assert otra.estadisticas()['tasa_aciertos'] == 1.0
+
+
+def test_entrada_corrupta_es_un_fallo(tmp_path):
+    cache = CacheCompilacion(str(tmp_path))
+    cache.compilar(FUENTE)
+    ruta = cache.ruta(cache.clave(FUENTE))
+    with open(ruta, 'wb') as archivo:
+        archivo.write(b'no es pickle')
+    assert cache.compilar(FUENTE) == compilador.compile(FUENTE)
+    assert (cache.fallos, cache.escrituras) == (2, 2)
+
+
+def test_otra_version_no_acierta(tmp_path, monkeypatch):
+    from compilador import cache as modulo
+    cache = CacheCompilacion(str(tmp_path))
+    cache.compilar(FUENTE)
+    monkeypatch.setattr(modulo, '_version', 'otra')
+    cache.compilar(FUENTE)
+    assert cache.aciertos == 0
+    assert len(cache.entradas()) == 2
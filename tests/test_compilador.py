@@ -0,0 +1,76 @@
+import subprocess
+import sys
+
+import pytest
+
+import compilador
+from compilador.__main__ import main
+
+FUENTE = 'BEGIN\nVAR x = 2;\nPRINT x * 3;\nEND\n'
+
+
+def test_importar_no_hace_trabajo():
+    # Importar el paquete no carga ninguna etapa ni escribe nada
+    codigo = ('import sys, compilador; '
+              'print(sorted(m for m in sys.modules if m.startswith("compilador.")))')
+    proceso = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True)
+    assert proceso.stdout == '[]\n'
+    assert proceso.stderr == ''
+
+
+@pytest.mark.parametrize('emit, cargados', [
+    ('tokens', {'compilador.lexico'}),
+    ('c', {'compilador.lexico', 'compilador.sintactico', 'compilador.semantico', 'compilador.traductor'}),
+])
+def test_cli_solo_importa_lo_que_usa(tmp_path, emit, cargados):
+    archivo = tmp_path / 'programa.txt'
+    archivo.write_text(FUENTE)
+    codigo = ('import sys; from compilador.__main__ import main; '
+              f'main([{str(archivo)!r}, "--emit", {emit!r}, "-o", {str(tmp_path / "salida")!r}]); '
+              'print(sorted(m for m in sys.modules if m.startswith(("compilador.", "concurrent", "multiprocessing"))))')
+    proceso = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True)
+    modulos = set(eval(proceso.stdout))
+    assert modulos >= cargados
+    # Ni la máquina virtual, ni el ejecutor nativo, ni los pools de procesos
+    assert not modulos & {'compilador.maquina', 'compilador.nativo', 'compilador.cache', 'concurrent.futures',
+                          'multiprocessing'}
+    if emit == 'tokens':
+        assert 'compilador.semantico' not in modulos and 'compilador.perfil' not in modulos
+
+
+def test_compile_por_etapas():
+    assert compilador.compile(FUENTE, emit='tokens') == compilador.tokenize(FUENTE)
+    assert repr(compilador.compile(FUENTE, emit='ast')) == \
+        "Programa([Declaracion('x', Numero(2)), Impresion(Expresion(Identificador('x'), '*', Numero(3)))])"
+    assert 'int x = 2;' in compilador.compile(FUENTE)
+    with pytest.raises(ValueError):
+        compilador.compile(FUENTE, emit='bytecode')
+
+
+def test_exportados_perezosos():
+    from compilador.sintactico import Parser
+    assert compilador.Parser is Parser
+    assert set(compilador.__all__) >= {'compile', 'tokenize', 'SemanticAnalyzer', 'ASTToCTranslator'}
+    with pytest.raises(AttributeError):
+        compilador.NoExiste
+
+
+@pytest.mark.parametrize('emit', compilador.ETAPAS)
+def test_cli_emit(tmp_path, capsys, emit):
+    archivo = tmp_path / 'programa.txt'
+    archivo.write_text(FUENTE)
+    assert main([str(archivo), '--emit', emit]) == 0
+    salida = capsys.readouterr().out
+    if emit == 'tokens':
+        assert salida == ''.join(f'{token!r}\n' for token in compilador.tokenize(FUENTE))
+    elif emit == 'ast':
+        assert salida == f"{compilador.compile(FUENTE, emit='ast')!r}\n"
+    else:
+        assert salida == compilador.compile(FUENTE)
+
+
+def test_cli_error_del_programa(tmp_path, capsys):
+    archivo = tmp_path / 'programa.txt'
+    archivo.write_text('BEGIN\nx = 1;\nEND\n')
+    assert main([str(archivo)]) == 1
+    assert capsys.readouterr().err.startswith("error: Variable 'x' no declarada")
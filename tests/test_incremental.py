@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+import compilador
+from compilador.incremental import DocumentoIncremental
+from compilador.lexico import tokenize
+from compilador.nodos import Nodo
+from compilador.sintactico import Parser
+
+FUENTE = """BEGIN
+VAR x = 1;
+VAR y = 2;
+IF x < y THEN
+    PRINT x;
+    WHILE x < 10 DO
+        x = x + 1;
+    END
+ELSE
+    PRINT y;
+END
+FOR i = 1 TO 3 DO
+    PRINT i * y;
+END
+END
+"""
+
+# Líneas que se pueden insertar en cualquier bloque tras las declaraciones
+LINEAS = ['    x = x + 2;\n', '    PRINT y;\n', '\n', '  \t\n', '    CALL f(x, y);\n']
+
+
+def posiciones(ast):
+    pila = [ast]
+    while pila:
+        nodo = pila.pop()
+        yield type(nodo).__name__, nodo.linea, nodo.columna
+        for campo in nodo.campos:
+            valor = getattr(nodo, campo)
+            if isinstance(valor, Nodo):
+                pila.append(valor)
+            elif isinstance(valor, list):
+                pila.extend(reversed(valor))
+
+
+def comprobar(documento):
+    texto = documento.texto
+    ast = Parser(tokenize(texto)).parse()
+    assert repr(documento.ast) == repr(ast)
+    assert [token[:2] + token[3:] for token in documento.tokens] == \
+        [token[:2] + token[3:] for token in tokenize(texto)]
+    assert [documento.linea_token(i) for i in range(len(documento.tokens))] == \
+        [token[2] for token in documento.tokens]
+    if not any('\n' in str(token[1]) for token in documento.tokens):
+        # tokenize no cuenta los saltos dentro de un literal y el documento sí
+        assert [token[2] for token in documento.tokens] == [token[2] for token in tokenize(texto)]
+        assert list(posiciones(documento.ast)) == list(posiciones(ast))
+
+
+def test_ediciones_igual_que_analizar_de_nuevo():
+    aleatorio = random.Random(0)
+    documento = DocumentoIncremental(FUENTE)
+    for _ in range(200):
+        n = len(documento.lineas)
+        inicio = aleatorio.randrange(3, n - 1)
+        if aleatorio.random() < 0.7:
+            documento.editar(inicio, inicio, aleatorio.choice(LINEAS))
+        elif documento.lineas[inicio] in LINEAS:
+            documento.editar(inicio, inicio + 1, '')
+        comprobar(documento)
+    assert documento.traducir() == compilador.compile(documento.texto)
+
+
+def test_reutiliza_lo_que_no_cambia():
+    documento = DocumentoIncremental(FUENTE)
+    antes = list(documento.ast.instrucciones)
+    # Dentro del FOR: las instrucciones anteriores no se vuelven a analizar
+    documento.editar(12, 12, '    PRINT i;\n')
+    despues = documento.ast.instrucciones
+    assert all(a is b for a, b in zip(antes[:3], despues[:3]))
+    comprobar(documento)
+
+
+def test_error_y_recuperacion():
+    documento = DocumentoIncremental(FUENTE)
+    with pytest.raises(SyntaxError):
+        documento.editar(1, 2, 'VAR = 1;\n')
+    documento.editar(1, 2, 'VAR x = 5;\n')
+    comprobar(documento)
+    assert 'int x = 5;' in documento.traducir()
+
+
+def test_edicion_con_comillas():
+    documento = DocumentoIncremental(FUENTE)
+    documento.editar(4, 5, '    PRINT "uno\ndos";\n')
+    comprobar(documento)
+    documento.editar(5, 6, 'dos" + "tres";\n')
+    comprobar(documento)
+
+
+def test_errores_en_su_linea_tras_insertar_varias():
+    documento = DocumentoIncremental(FUENTE)
+    documento.editar(3, 3, '    PRINT x;\n    PRINT y;\n\n')
+    documento.editar(15, 16, '    PRINT i * z;\n')
+    comprobar(documento)
+    with pytest.raises(compilador.SemanticError, match=r"'z' no declarada \(línea 16, columna 14\)"):
+        documento.traducir()
+    # Borrar líneas también mueve lo que sigue
+    documento.editar(3, 6, '')
+    documento.editar(12, 13, '    PRINT i * y;\n')
+    documento.editar(1, 2, 'VAR x = 1;\n\n\n\n')
+    documento.editar(5, 6, '')
+    comprobar(documento)
+    with pytest.raises(compilador.SemanticError) as error:
+        documento.traducir()
+    assert (error.value.linea, error.value.columna) == (6, 7)
+    with pytest.raises(compilador.SemanticError, match=str(error.value).replace('(', r'\(').replace(')', r'\)')):
+        compilador.compile(documento.texto)
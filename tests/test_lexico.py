@@ -0,0 +1,132 @@
+import io
+
+import pytest
+
+from compilador import compile, lexico
+from compilador.__main__ import main
+from compilador.lexico import (PALABRAS_CLAVE, TIPOS, TokenBuffer, TokenBufferMapeado, cortes_seguros, escanear,
+                               token_re, tokenize, tokenize_paralelo, tokenize_stream)
+
+FUENTES = [
+    '',
+    'BEGIN\nVAR x = 1.5;\nPRINT x * 2;\nEND\n',
+    'BEGINX END_ IFTHEN "a\nb" \'c\' // coment\n  x<=y != z == w 12 12.5 12.\r\n\t$',
+    'FOR i = 1 TO 10 DO\n    CALL f(i, "x;y", \'z\');\nEND\n' * 50,
+]
+
+
+@pytest.mark.parametrize('fuente', FUENTES)
+def test_escanear_igual_que_token_re(fuente):
+    # El autómata reconoce lo mismo que la expresión regular (que no separa
+    # las palabras clave de ID)
+    tokens = [(TIPOS[tipo], fuente[inicio:fin]) for tipo, inicio, fin in escanear(fuente)]
+    esperados = [(mo.lastgroup, mo.group()) for mo in token_re.finditer(fuente)]
+    assert [valor for _, valor in tokens] == [valor for _, valor in esperados]
+    assert all(tipo == esperado or esperado == 'ID' for (tipo, _), (esperado, _) in zip(tokens, esperados))
+
+
+def casi_claves():
+    # Palabras que caen en la misma posición del hash que una palabra clave
+    # (misma primera y última letra y misma longitud) y otras parecidas
+    for clave in PALABRAS_CLAVE:
+        yield clave.lower()
+        yield clave + 'X'
+        yield clave[:-1]
+        yield clave + '_'
+        yield '_' + clave
+        if len(clave) > 2:
+            yield clave[0] + 'x' * (len(clave) - 2) + clave[-1]
+        yield clave[0] + clave[1:].lower()
+
+
+@pytest.mark.parametrize('contenido', [str, lambda texto: texto.encode('ascii')])
+def test_palabras_clave(contenido):
+    palabras = list(PALABRAS_CLAVE) + list(casi_claves())
+    texto = ' '.join(palabras)
+    tipos = [TIPOS[tipo] for tipo, _, _ in escanear(contenido(texto)) if TIPOS[tipo] != 'SKIP']
+    assert tipos == list(PALABRAS_CLAVE) + ['ID'] * (len(palabras) - len(PALABRAS_CLAVE))
+
+
+@pytest.mark.parametrize('fuente', FUENTES)
+def test_token_buffer_igual_que_tokenize(fuente):
+    assert list(TokenBuffer(fuente)) == tokenize(fuente)
+
+
+@pytest.mark.parametrize('fuente', FUENTES)
+@pytest.mark.parametrize('tamano_bloque', [1, 3, 7, 1 << 16])
+def test_stream_igual_que_tokenize(fuente, tamano_bloque):
+    assert list(tokenize_stream(io.StringIO(fuente), tamano_bloque)) == tokenize(fuente)
+
+
+@pytest.mark.parametrize('fuente', FUENTES)
+def test_mapeado_igual_que_tokenize(tmp_path, fuente):
+    ruta = tmp_path / 'programa.txt'
+    ruta.write_bytes(fuente.encode('utf-8'))
+    with TokenBufferMapeado(ruta) as tokens:
+        assert list(tokens) == tokenize(fuente)
+
+
+def test_mapeado_no_ascii(tmp_path):
+    # Mismos tipos y valores que con el texto; las columnas son en bytes y
+    # una secuencia UTF-8 no válida es un carácter de error por byte
+    fuente = 'VAR x = "ñandú";\nPRINT é;\n'
+    ruta = tmp_path / 'programa.txt'
+    ruta.write_bytes(fuente.encode('utf-8') + b'\xff x')
+    with TokenBufferMapeado(ruta) as tokens:
+        mapeados = list(tokens)
+    esperados = tokenize(fuente + '� x')
+    assert [token[:3] for token in mapeados] == [token[:3] for token in esperados]
+    assert mapeados[4][3] == 17 and esperados[4][3] == 15
+    assert mapeados[-1][3] == 2
+
+
+@pytest.mark.parametrize('partes', [1, 2, 5, 40])
+def test_paralelo_igual_que_tokenize(partes):
+    fuente = FUENTES[3] + 'VAR s = "dos\nlineas";\n' + FUENTES[3]
+    inicios, lineas = cortes_seguros(fuente, partes)
+    assert inicios[0] == 0 and all(fuente[inicio - 1] == '\n' for inicio in inicios[1:])
+    assert tokenize_paralelo(fuente, workers=2, partes=partes) == tokenize(fuente)
+
+
+def test_cortes_fuera_de_los_literales():
+    # Literales de varias líneas por todas partes: ningún corte cae dentro
+    fuente = ''.join(f'PRINT "a\n{i}\nb";\nPRINT \'\n\';\nVAR x{i} = {i};\n' for i in range(200))
+    literales = [mo.span() for mo in token_re.finditer(fuente) if mo.lastgroup in ('STRING', 'CHAR')]
+    for partes in range(1, 30):
+        inicios, lineas = cortes_seguros(fuente, partes)
+        assert 1 <= len(inicios) <= partes
+        for inicio, linea in zip(inicios[1:], lineas[1:]):
+            assert fuente[inicio - 1] == '\n'
+            assert not any(a < inicio < b for a, b in literales)
+            assert tokenize(fuente[inicio:])[0][2] == 1
+            assert [token for token in tokenize(fuente) if token[2] >= linea][0][1] == \
+                tokenize(fuente[inicio:])[0][1]
+
+
+def test_tokenize_reparte_sobre_el_umbral(monkeypatch):
+    fuente = FUENTES[3] * 4
+    monkeypatch.setattr(lexico, 'UMBRAL_PARALELO', len(fuente))
+    llamadas = []
+    paralelo = lexico.tokenize_paralelo
+    monkeypatch.setattr(lexico, 'tokenize_paralelo', lambda *argumentos: llamadas.append(1) or paralelo(*argumentos))
+    assert tokenize(fuente, workers=2) == tokenize(fuente)
+    # Un carácter por debajo del umbral ya no se reparte
+    assert tokenize(fuente[:-1], workers=2) == tokenize(fuente[:-1])
+    assert llamadas == [1]
+
+
+def test_mapeado_en_la_linea_de_comandos(tmp_path, capsys):
+    fuente = 'BEGIN\nVAR x = 1.5;\nFOR i = 1 TO 3 DO\n    PRINT x * i;\n    PRINT "s";\nEND\nEND\n'
+    ruta = tmp_path / 'programa.txt'
+    ruta.write_text(fuente)
+    with TokenBufferMapeado(ruta) as tokens:
+        # Los valores se convierten al pedirlos y el mapa se cierra al salir
+        assert [tokens.valor(i) for i in range(6)] == ['BEGIN', 'VAR', 'x', '=', 1.5, ';']
+        mapa = tokens.mapa
+    assert mapa.closed
+    assert main([str(ruta), '--mmap']) == 0
+    assert capsys.readouterr().out == compile(fuente)
+    assert main([str(ruta), '--mmap', '--emit', 'tokens']) == 0
+    assert capsys.readouterr().out == ''.join(f'{token!r}\n' for token in tokenize(fuente))
+    with pytest.raises(SystemExit):
+        main([str(ruta), '--mmap', '--cache', str(tmp_path)])
@@ -0,0 +1,57 @@
+import pytest
+
+import compilador
+from compilador.lote import compilar_lote, main
+
+PROGRAMA = 'BEGIN\nVAR x = {};\nPRINT x;\nEND\n'
+
+
+def escribir(ruta, texto):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_text(texto)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_lote_sigue_tras_archivos_malos(tmp_path, workers):
+    fuentes = tmp_path / 'fuentes'
+    escribir(fuentes / 'a.txt', PROGRAMA.format(1))
+    escribir(fuentes / 'b.txt', 'BEGIN\nx = 1;\nEND\n')
+    (fuentes / 'c.txt').write_bytes(b'BEGIN\nPRINT "\xff\xfe";\nEND\n')
+    escribir(fuentes / 'd.txt', 'BEGIN\nPRINT ;\nEND\n')
+    escribir(fuentes / 'e.txt', PROGRAMA.format(5))
+    resultados, resumen = compilar_lote([str(fuentes)], workers=workers, chunksize=1, destino=str(tmp_path / 'c'))
+    errores = {r.ruta.rsplit('/', 1)[1]: r.error for r in resultados}
+    assert errores['a.txt'] is None and errores['e.txt'] is None
+    assert errores['b.txt'].startswith('SemanticError')
+    assert errores['c.txt'].startswith('UnicodeDecodeError')
+    assert errores['d.txt'].startswith('SyntaxError')
+    assert (resumen.archivos, resumen.correctos, resumen.errores) == (5, 2, 3)
+    assert (tmp_path / 'c' / 'e.c').read_text() == compilador.compile(PROGRAMA.format(5))
+
+
+def test_subdirectorios_no_se_pisan(tmp_path):
+    fuentes = tmp_path / 'fuentes'
+    escribir(fuentes / 'uno' / 'p.txt', PROGRAMA.format(1))
+    escribir(fuentes / 'dos' / 'p.txt', PROGRAMA.format(2))
+    destino = tmp_path / 'c'
+    _, resumen = compilar_lote([str(fuentes)], workers=1, destino=str(destino))
+    assert resumen.correctos == 2
+    assert (destino / 'uno' / 'p.c').read_text() == compilador.compile(PROGRAMA.format(1))
+    assert (destino / 'dos' / 'p.c').read_text() == compilador.compile(PROGRAMA.format(2))
+
+
+def test_colision_se_rechaza(tmp_path, capsys):
+    escribir(tmp_path / 'uno' / 'p.txt', PROGRAMA.format(1))
+    escribir(tmp_path / 'dos' / 'p.txt', PROGRAMA.format(2))
+    destino = tmp_path / 'c'
+    with pytest.raises(ValueError):
+        compilar_lote([str(tmp_path / 'uno'), str(tmp_path / 'dos')], workers=1, destino=str(destino))
+    assert main([str(tmp_path / 'uno'), str(tmp_path / 'dos'), '-d', str(destino)]) == 2
+    assert 'mismo archivo' in capsys.readouterr().err
+    assert not destino.exists()
+
+
+def test_sin_destino_devuelve_el_codigo(tmp_path):
+    escribir(tmp_path / 'p.txt', PROGRAMA.format(3))
+    resultados, _ = compilar_lote([str(tmp_path / 'p.txt')], workers=1)
+    assert resultados[0].codigo == compilador.compile(PROGRAMA.format(3))
@@ -0,0 +1,159 @@
+import io
+
+import pytest
+
+from compilador.__main__ import main
+from compilador.maquina import ErrorEjecucion, ejecutar
+from compilador.nativo import CacheBinarios, EjecutorNativo, buscar_cc
+
+# Programas que se pueden ejecutar (los generados pueden no terminar)
+PROGRAMAS = [
+    """BEGIN
+VAR x = 2147483647;
+VAR y = 0;
+x = x + 1;
+PRINT x;
+y = x - 1;
+PRINT y;
+PRINT 0 - 7 / 2;
+PRINT 46341 * 46341;
+END
+""",
+    """BEGIN
+VAR c = 'a';
+VAR d = c + 2;
+VAR t = "texto";
+PRINT c;
+PRINT d;
+PRINT t;
+c = 'z';
+PRINT c;
+END
+""",
+    """BEGIN
+VAR a = 1.5;
+VAR cero = 0.0;
+PRINT a / 4;
+PRINT 10 / 4.0;
+PRINT a / cero;
+PRINT 0 - a / cero;
+PRINT cero / cero;
+PRINT 1000000.5 * 3;
+PRINT 0.1 + 0.2;
+END
+""",
+    """BEGIN
+VAR n = 5;
+VAR total = 20;
+FOR i = 1 TO n DO
+    FOR j = i TO n DO
+        IF i * j > 6 THEN
+            total = total + j;
+        ELSE
+            total = total - 1;
+        END
+    END
+    n = n - 1;
+END
+PRINT total;
+WHILE total > 0 DO
+    total = total - 3;
+    IF total >= 4 THEN
+        PRINT total;
+    END
+END
+FOR k = 3 TO 1 DO
+    PRINT k;
+END
+END
+""",
+    """BEGIN
+VAR cero = 0.0;
+VAR n = cero / cero;
+VAR x = 2;
+IF n < 1 THEN
+    PRINT 1;
+ELSE
+    PRINT 2;
+END
+IF n != n THEN
+    PRINT 3;
+END
+IF n >= 1 THEN
+    PRINT 4;
+END
+IF x <= 2 THEN
+    PRINT 5;
+END
+IF x > 1 THEN
+    PRINT 6;
+END
+WHILE n > x DO
+    PRINT 7;
+END
+END
+""",
+    """BEGIN
+VAR s = 0.5;
+FOR i = 1 TO 20000 DO
+    s = s + i / 3;
+    IF i >= 19998 THEN
+        PRINT s;
+        PRINT i;
+    END
+END
+END
+""",
+]
+
+
+def salida_maquina(fuente, optimizar=True, funciones=None):
+    salida = io.StringIO()
+    ejecutar(fuente, funciones, salida, optimizar)
+    return salida.getvalue()
+
+
+@pytest.mark.skipif(buscar_cc() is None, reason='no hay compilador de C')
+@pytest.mark.parametrize('fuente', PROGRAMAS)
+def test_igual_que_el_c_compilado(tmp_path, fuente):
+    ejecutor = EjecutorNativo(cache=CacheBinarios(str(tmp_path)))
+    for optimizar in (True, False):
+        assert salida_maquina(fuente, optimizar) == ejecutor.ejecutar(fuente, optimizar).salida
+
+
+def test_division_entera_por_cero():
+    salida = io.StringIO()
+    with pytest.raises(ErrorEjecucion) as error:
+        ejecutar('BEGIN\nVAR x = 0;\nPRINT 5;\nPRINT 7 / x;\nEND\n', salida=salida)
+    assert (error.value.linea, error.value.columna) == (4, 6)
+    # Lo impreso antes del error no se pierde
+    assert salida.getvalue() == '5\n'
+
+
+def test_llamadas_a_funciones():
+    llamadas = []
+    fuente = "BEGIN\nFOR i = 1 TO 2 DO\n    CALL f(i, 'c', 1.5, \"s\");\n    PRINT i;\nEND\nEND\n"
+
+    def f(*argumentos):
+        llamadas.append(argumentos)
+        print('f', file=salida)
+
+    salida = io.StringIO()
+    ejecutar(fuente, {'f': f}, salida)
+    assert llamadas == [(1, 99, 1.5, 's'), (2, 99, 1.5, 's')]
+    # La salida se vuelca antes de cada llamada, en orden
+    assert salida.getvalue() == 'f\n1\nf\n2\n'
+    with pytest.raises(ErrorEjecucion, match="Función 'f' no definida"):
+        ejecutar(fuente, salida=io.StringIO())
+
+
+def test_cli_ejecutar(tmp_path, capsys):
+    archivo = tmp_path / 'programa.txt'
+    archivo.write_text(PROGRAMAS[3])
+    assert main([str(archivo), '--ejecutar']) == 0
+    assert capsys.readouterr().out == salida_maquina(PROGRAMAS[3])
+    archivo.write_text('BEGIN\nVAR x = 0;\nPRINT 1 / x;\nEND\n')
+    assert main([str(archivo), '--ejecutar']) == 1
+    assert capsys.readouterr().err.startswith('error: División entera por cero')
+    with pytest.raises(SystemExit):
+        main([str(archivo), '--ejecutar', '--plano'])
@@ -0,0 +1,77 @@
+import os
+import subprocess
+
+import pytest
+
+from compilador import compile
+from compilador.nativo import CacheBinarios, EjecutorNativo, buscar_cc
+
+pytestmark = pytest.mark.skipif(buscar_cc() is None, reason='no hay compilador de C')
+
+FUENTE = 'BEGIN\nVAR x = 6;\nFOR i = 1 TO 3 DO\n    PRINT x * i;\nEND\nEND\n'
+
+
+def test_ejecutar_y_acierto(tmp_path):
+    ejecutor = EjecutorNativo(cache=CacheBinarios(str(tmp_path)))
+    primero = ejecutor.ejecutar(FUENTE)
+    segundo = ejecutor.ejecutar(FUENTE)
+    assert primero.salida == segundo.salida == '6\n12\n18\n'
+    assert (primero.en_cache, segundo.en_cache) == (False, True)
+    assert primero.codigo == 0
+
+
+def test_expulsion_durante_la_ejecucion(tmp_path):
+    cache = CacheBinarios(str(tmp_path))
+    ejecutor = EjecutorNativo(cache=cache)
+    codigo = compile(FUENTE)
+    with ejecutor.reservar(codigo):
+        pass
+    with ejecutor.reservar(codigo) as (ruta, en_cache):
+        assert en_cache
+        # Otro proceso expulsa todo entre la consulta y la ejecución
+        cache.tamano_maximo = 0
+        cache.expulsar()
+        assert cache.entradas() == []
+        assert subprocess.run([ruta], capture_output=True, text=True).stdout == '6\n12\n18\n'
+    assert not os.path.exists(ruta)
+    cache.tamano_maximo = 1 << 30
+    with ejecutor.reservar(codigo) as (_, en_cache):
+        assert not en_cache
+
+
+def test_cache_menor_que_un_binario(tmp_path):
+    # La expulsión que sigue a cada compilación borra el binario recién
+    # hecho, pero la ejecución usa su propio enlace
+    ejecutor = EjecutorNativo(cache=CacheBinarios(str(tmp_path), tamano_maximo=1, intervalo_expulsion=1))
+    for _ in range(2):
+        resultado = ejecutor.ejecutar(FUENTE)
+        assert resultado.salida == '6\n12\n18\n'
+        assert not resultado.en_cache
+    assert [nombre for _, _, nombres in os.walk(tmp_path) for nombre in nombres] == []
+
+
+def test_entorno_de_impresion(tmp_path):
+    # Los formatos hechos a mano coinciden con los de printf
+    valores = ['0', '7', '0 - 2147483647 - 1', '2147483647', '0.5', '1.5 * 3', '1000000.0',
+               '0.1 + 0.2', '10000000000.0 / 3', '0 - 1 * 0.0', "'z'", '"cadena"', '"' + 'x' * 70000 + '"']
+    fuente = 'BEGIN\n' + ''.join(f'PRINT {valor};\n' for valor in valores) + 'END\n'
+    esperado = ['0', '7', '-2147483648', '2147483647', '0.5', '4.5', '1e+06', '%g' % (0.1 + 0.2),
+                '%g' % (1e10 / 3), '-0', 'z', 'cadena', 'x' * 70000]
+    ejecutor = EjecutorNativo(cache=CacheBinarios(str(tmp_path)))
+    for optimizar in (True, False):
+        assert ejecutor.ejecutar(fuente, optimizar=optimizar).salida.split('\n')[:-1] == esperado
+
+
+def test_salida_mayor_que_el_bufer(tmp_path):
+    fuente = 'BEGIN\nFOR i = 1 TO 30000 DO\n    PRINT i * 3;\n    PRINT i + 0.5;\nEND\nEND\n'
+    resultado = EjecutorNativo(cache=CacheBinarios(str(tmp_path))).ejecutar(fuente)
+    assert resultado.salida == ''.join(f'{i * 3}\n{i + 0.5:g}\n' for i in range(1, 30001))
+
+
+def test_expulsion_en_cada_ejecutor(tmp_path):
+    # Como en la línea de comandos: un ejecutor nuevo por programa
+    for i in range(5):
+        cache = CacheBinarios(str(tmp_path), tamano_maximo=40000)
+        assert EjecutorNativo(cache=cache).ejecutar(f'BEGIN\nPRINT {i};\nEND\n').salida == f'{i}\n'
+        assert sum(tamano for _, tamano, _ in cache.entradas()) <= 40000
+    assert cache.expulsiones > 0
@@ -0,0 +1,71 @@
+import pickle
+
+import pytest
+
+import compilador
+from compilador.nodos import CLASES, Nodo, tabla_despacho
+
+FUENTE = """BEGIN
+VAR x = 1.5;
+  IF x > 1 THEN
+    PRINT x * 2;
+  END
+FOR i = 1 TO 3 DO CALL f(i, "s", 'c'); END
+END
+"""
+
+
+def nodos(ast):
+    pila = [ast]
+    while pila:
+        nodo = pila.pop()
+        yield nodo
+        for campo in nodo.campos:
+            valor = getattr(nodo, campo)
+            if isinstance(valor, Nodo):
+                pila.append(valor)
+            elif isinstance(valor, list):
+                pila.extend(valor)
+
+
+@pytest.mark.parametrize('clase', CLASES)
+def test_sin_diccionario(clase):
+    nodo = clase.__new__(clase)
+    assert not hasattr(nodo, '__dict__')
+    with pytest.raises(AttributeError):
+        nodo.otro = 1
+
+
+def test_posiciones_del_fuente():
+    ast = compilador.compile(FUENTE, emit='ast')
+    posiciones = {(type(nodo).__name__, getattr(nodo, 'valor', None)): (nodo.linea, nodo.columna)
+                  for nodo in nodos(ast)}
+    assert posiciones[('Programa', None)] == (1, 0)
+    assert posiciones[('Declaracion', None)] == (2, 0)
+    assert posiciones[('Condicional', None)] == (3, 2)
+    assert posiciones[('Impresion', None)] == (4, 4)
+    assert posiciones[('Identificador', 'i')] == (6, 25)
+    assert posiciones[('Cadena', '"s"')] == (6, 28)
+    assert posiciones[('Caracter', "'c'")] == (6, 33)
+
+
+def test_se_serializan():
+    # La caché y el pool de traducción los pasan con pickle
+    ast = compilador.compile(FUENTE, emit='ast')
+    assert repr(pickle.loads(pickle.dumps(ast))) == repr(ast)
+
+
+def test_tabla_despacho():
+    class Visitante:
+        def visit_programa(self, nodo):
+            return 'programa'
+
+        def visit_numero(self, nodo):
+            return 'numero'
+
+    visitante = Visitante()
+    tabla = tabla_despacho(visitante, 'visit_')
+    assert {clase.tipo for clase in tabla} == {'programa', 'numero'}
+    assert tabla_despacho(visitante, 'visit_', len).keys() == set(CLASES)
+    ast = compilador.compile(FUENTE, emit='ast')
+    assert tabla[type(ast)](ast) == 'programa'
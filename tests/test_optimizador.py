@@ -0,0 +1,181 @@
+import io
+import random
+
+import pytest
+
+import compilador
+from compilador.maquina import ejecutar
+from compilador.optimizador import Optimizer
+
+
+def optimizado(fuente):
+    return Optimizer().optimize(compilador.compile(fuente, emit='ast'))
+
+
+@pytest.mark.parametrize('expresion, valor', [
+    ('2 + 3 * 4', 'Numero(20)'),            # Las expresiones se anidan por la izquierda
+    ('0 - 7 / 2', 'Numero(-3)'),            # División entera truncada como en C
+    ('1.5 * 2', 'Numero(3.0)'),
+    ("'a' + 1", "Expresion(Caracter(\"'a'\"), '+', Numero(1))"),
+    ('7 / 0', "Expresion(Numero(7), '/', Numero(0))"),
+    ('2147483647 + 1', "Expresion(Numero(2147483647), '+', Numero(1))"),
+])
+def test_plegado_de_constantes(expresion, valor):
+    assert repr(optimizado(f'BEGIN\nVAR x = {expresion};\nEND\n')) == f"Programa([Declaracion('x', {valor})])"
+
+
+def test_ramas_muertas():
+    fuente = """BEGIN
+VAR a = 1;
+IF 1 > 2 THEN
+    PRINT 1;
+ELSE
+    PRINT a;
+END
+WHILE 0 > 1 DO
+    PRINT 3;
+END
+FOR i = 5 TO 1 DO
+    PRINT i;
+END
+IF a > 1 THEN
+END
+END
+"""
+    assert repr(optimizado(fuente)) == "Programa([Declaracion('a', Numero(1)), Impresion(Identificador('a'))])"
+
+
+def test_rama_con_declaraciones_conserva_su_bloque():
+    # Sacar la rama al bloque de fuera cambiaría el ámbito de z
+    fuente = 'BEGIN\nIF 2 > 1 THEN\nVAR z = "a";\nPRINT z;\nEND\nVAR z = 2;\nPRINT z;\nEND\n'
+    codigo = compilador.compile(fuente)
+    assert '{\n        const char *z = "a";' in codigo
+    salida = io.StringIO()
+    ejecutar(fuente, salida=salida)
+    assert salida.getvalue() == 'a\n2\n'
+
+
+def test_no_modifica_el_ast(generar):
+    ast = compilador.compile(generar(300), emit='ast')
+    antes = repr(ast)
+    Optimizer().optimize(ast)
+    assert repr(ast) == antes
+
+
+@pytest.mark.parametrize('semilla', range(3))
+def test_misma_salida_con_y_sin_optimizar(semilla):
+    azar = random.Random(semilla)
+    lineas = ['BEGIN', 'VAR x = 3;', 'VAR y = 2.5;']
+    for _ in range(40):
+        a, b = azar.randint(0, 9), azar.randint(1, 9)
+        lineas.append(azar.choice([f'PRINT {a} * {b} - x;', f'x = x + {a} / {b};', f'y = y * {b} - {a};',
+                                   f'IF {a} > {b} THEN\nPRINT y;\nELSE\nPRINT {a} + 0.5;\nEND',
+                                   f'PRINT {a} / {b} + y;']))
+    lineas.append('END')
+    fuente = '\n'.join(lineas) + '\n'
+    salidas = []
+    for optimizar in (True, False):
+        salida = io.StringIO()
+        ejecutar(fuente, salida=salida, optimizar=optimizar)
+        salidas.append(salida.getvalue())
+    assert salidas[0] == salidas[1]
+
+
+BUCLES = """BEGIN
+VAR n = 4;
+VAR k = 3;
+VAR s = 0;
+FOR i = 1 TO n * 2 DO
+    s = i * k + s;
+    PRINT n * k + i;
+END
+WHILE s > 10 DO
+    s = s - 7;
+    PRINT n * k - s;
+END
+WHILE k < 6 DO
+    k = k + 1;
+    PRINT n * k;
+END
+END
+"""
+
+
+def test_invariantes_y_reduccion_de_fuerza():
+    codigo = compilador.compile(BUCLES)
+    assert '    int _t0 = (n * 2);\n    int _t1 = (1 * k);\n    int _t2 = (n * k);\n' \
+        '    for (int i = 1; i <= _t0; i++) {\n        s = (_t1 + s);\n' \
+        '        _rt_imprimir_int((_t2 + i));\n        _t1 = (_t1 + k);\n    }\n' in codigo
+    assert '    int _t3 = (n * k);\n    while (s > 10) {\n' in codigo
+    # k cambia dentro del bucle, así que n * k no se puede sacar
+    assert '    while (k < 6) {\n        k = (k + 1);\n        _rt_imprimir_int((n * k));\n' in codigo
+    salidas = []
+    for optimizar in (True, False):
+        salida = io.StringIO()
+        ejecutar(BUCLES, salida=salida, optimizar=optimizar)
+        salidas.append(salida.getvalue())
+    assert salidas[0] == salidas[1]
+    assert salidas[0].split()[-3:] == ['16', '20', '24']
+
+
+def salidas_con_y_sin_optimizar(fuente):
+    salidas = []
+    for optimizar in (True, False):
+        salida = io.StringIO()
+        ejecutar(fuente, salida=salida, optimizar=optimizar)
+        salidas.append(salida.getvalue())
+    return salidas
+
+
+@pytest.mark.parametrize('expresion', ['1 * i * i - i', 'i * 11 * i', '7 * i * i / 4', 'i * k * i * k + i * k'])
+def test_productos_no_lineales(expresion):
+    # Un temporal de reducción cambia en cada vuelta: no es un factor
+    fuente = f'BEGIN\nVAR k = 3;\nFOR i = 0 TO 4 DO\n    VAR v = {expresion};\n    PRINT v;\nEND\nEND\n'
+    optimizada, sin_optimizar = salidas_con_y_sin_optimizar(fuente)
+    assert optimizada == sin_optimizar
+
+
+def bucles_aleatorios(azar):
+    lineas = ['BEGIN', 'VAR k = 3;', 'VAR s = 0;']
+    contador = 0
+
+    def expresion(variables):
+        partes = [azar.choice(variables + [str(azar.randint(0, 9))])]
+        for _ in range(azar.randint(1, 4)):
+            partes += [azar.choice('+-*'), azar.choice(variables + [str(azar.randint(0, 9))])]
+        return ' '.join(partes)
+
+    # Cada elemento de la pila: (variables visibles, instrucciones que quedan)
+    pila = [(['k', 's'], azar.randint(2, 4))]
+    while pila:
+        variables, quedan = pila.pop()
+        if not quedan:
+            if pila:
+                lineas.append('END')
+            continue
+        pila.append((variables, quedan - 1))
+        contador += 1
+        azar_instruccion = azar.random()
+        if azar_instruccion < 0.35 and len(pila) < 4:
+            lineas.append(f'FOR i{contador} = {azar.randint(0, 3)} TO {azar.choice(["k", "4"])} DO')
+            pila.append((variables + [f'i{contador}'], azar.randint(1, 3)))
+        elif azar_instruccion < 0.55:
+            lineas.append(f'VAR v{contador} = {expresion(variables)};')
+            lineas.append(f'PRINT v{contador};')
+            variables.append(f'v{contador}')
+        elif azar_instruccion < 0.75:
+            lineas.append(f's = {expresion(variables)};')
+        elif azar_instruccion < 0.85:
+            lineas.append(f'k = {azar.randint(0, 6)};')
+        else:
+            lineas.append(f'PRINT {expresion(variables)};')
+    lineas.append('END')
+    return '\n'.join(lineas) + '\n'
+
+
+def test_bucles_aleatorios_igual_que_sin_optimizar():
+    azar = random.Random(0)
+    for _ in range(300):
+        fuente = bucles_aleatorios(azar)
+        optimizada, sin_optimizar = salidas_con_y_sin_optimizar(fuente)
+        assert optimizada == sin_optimizar, fuente
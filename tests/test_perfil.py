@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+import compilador
+from compilador.__main__ import main
+from compilador.cache import CacheCompilacion
+from compilador.perfil import ETAPAS_PERFIL, Perfil
+
+FUENTE = """BEGIN
+VAR x = 1;
+IF x > 0 THEN
+    VAR y = 2.5;
+    WHILE y < 3 DO
+        y = y + 1;
+    END
+END
+FOR i = 1 TO 2 DO
+    VAR y = "a";
+    PRINT y;
+END
+END
+"""
+
+
+@pytest.mark.parametrize('plano', [False, True])
+def test_compile_con_perfil(plano):
+    perfil = Perfil()
+    # Medir no cambia el resultado
+    assert compilador.compile(FUENTE, plano=plano, perfil=perfil) == compilador.compile(FUENTE, plano=plano)
+    assert list(perfil.etapas) == [etapa for etapa in ETAPAS_PERFIL if not (plano and etapa == 'optimize')]
+    informe = json.loads(perfil.json())
+    assert informe['segundos'] == pytest.approx(sum(medida['segundos'] for medida in informe['etapas'].values()))
+    assert informe['tokens']['total'] == len(compilador.tokenize(FUENTE)) == 46
+    assert informe['tokens']['por_tipo']['ID'] == 9
+    nodos = informe['nodos']
+    assert (nodos['total'], nodos['profundidad'], nodos['anidamiento_bloques']) == (24, 6, 2)
+    assert nodos['por_clase']['Declaracion'] == 3
+    # y se declara dos veces en bloques distintos
+    assert informe['simbolos'] == {'ranuras': 4, 'variables': 3}
+    assert 'cprofile' not in informe
+
+
+def test_solo_las_etapas_ejecutadas():
+    perfil = Perfil()
+    compilador.compile(FUENTE, emit='tokens', perfil=perfil)
+    assert list(perfil.etapas) == ['tokenize']
+    assert set(perfil.informe()) == {'etapas', 'segundos', 'tokens'}
+    assert perfil.texto().splitlines()[-1].startswith('tokens: 46 (ID 9, ')
+
+
+def test_memoria_y_cprofile():
+    perfil = Perfil(memoria=True, cprofile='parse')
+    compilador.compile(FUENTE, perfil=perfil)
+    assert all(medida['pico_memoria'] > 0 for medida in perfil.etapas.values())
+    informe = perfil.informe()
+    assert informe['cprofile']['etapa'] == 'parse'
+    assert 'parse' in informe['cprofile']['salida']
+    assert 'cProfile de parse:' in perfil.texto()
+    with pytest.raises(ValueError):
+        Perfil(cprofile='link')
+
+
+def test_no_se_combina_con_la_cache(tmp_path):
+    with pytest.raises(ValueError):
+        compilador.compile(FUENTE, cache=CacheCompilacion(str(tmp_path)), perfil=Perfil())
+
+
+@pytest.mark.parametrize('formato', ['json', None])
+def test_cli_profile(tmp_path, capsys, formato):
+    archivo = tmp_path / 'programa.txt'
+    archivo.write_text(FUENTE)
+    assert main([str(archivo), '--profile'] + ([formato] if formato else [])) == 0
+    salida = capsys.readouterr()
+    assert salida.out == compilador.compile(FUENTE)
+    if formato == 'json':
+        informe = json.loads(salida.err)
+        assert list(informe['etapas']) == list(ETAPAS_PERFIL)
+        assert informe['simbolos'] == {'ranuras': 4, 'variables': 3}
+    else:
+        assert 'tabla de símbolos: 4 ranuras, 3 variables' in salida.err
+
+
+@pytest.mark.parametrize('opciones', [['--profile-memoria'], ['--profile-etapa', 'parse'], ['--profile', '--cache', 'x'],
+                                      ['--profile', '--ejecutar']])
+def test_cli_opciones_incompatibles(tmp_path, capsys, opciones):
+    archivo = tmp_path / 'programa.txt'
+    archivo.write_text(FUENTE)
+    with pytest.raises(SystemExit):
+        main([str(archivo)] + opciones)
+    assert 'error:' in capsys.readouterr().err
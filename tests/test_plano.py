@@ -0,0 +1,44 @@
+import pytest
+
+import compilador
+from compilador.lexico import TokenBuffer
+from compilador.perfil import recorrer_ast, recorrer_plano
+from compilador.plano import ASTPlano, ParserPlano
+from compilador.semantico import SemanticError
+from compilador.sintactico import Parser
+
+
+@pytest.mark.parametrize('semilla', range(5))
+def test_mismo_c_que_el_ast_de_objetos(generar, semilla):
+    fuente = generar(300, semilla)
+    assert compilador.compile(fuente, plano=True) == compilador.compile(fuente, optimizar=False)
+
+
+@pytest.mark.parametrize('semilla', range(3))
+def test_mismos_nodos(generar, semilla):
+    tokens = TokenBuffer(generar(300, semilla))
+    plano = ParserPlano(tokens).parse()
+    objetos = Parser(tokens).parse()
+    assert isinstance(plano, ASTPlano)
+    assert recorrer_plano(plano) == recorrer_ast(objetos)
+
+
+@pytest.mark.parametrize('fuente', [
+    'BEGIN\nx = 1;\nEND\n',
+    'BEGIN\nVAR x = 1;\nVAR x = 2;\nEND\n',
+    'BEGIN\nVAR s = "a";\nPRINT s * 2;\nEND\n',
+    'BEGIN\nIF 1 < 2 THEN\nVAR y = 1;\nEND\nPRINT y;\nEND\n',
+])
+def test_mismos_errores(fuente):
+    with pytest.raises(SemanticError) as objetos:
+        compilador.compile(fuente)
+    with pytest.raises(SemanticError) as plano:
+        compilador.compile(fuente, plano=True)
+    assert str(plano.value) == str(objetos.value)
+
+
+def test_columnas_compactas(generar):
+    # Unos pocos bytes por nodo en las columnas, frente a los cientos de un
+    # objeto
+    ast = ParserPlano(TokenBuffer(generar(2000))).parse()
+    assert ast.memoria() < 40 * len(ast)
@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+import compilador
+from compilador.lexico import TokenBuffer
+from compilador.maquina import ejecutar
+from compilador.plano import ParserPlano
+from compilador.semantico import SemanticAnalyzer, SemanticError
+from compilador.sintactico import Parser
+
+# Dos variables s en bloques distintos, cada una con su tipo
+BLOQUES = """BEGIN
+VAR c = 1;
+IF c > 0 THEN
+    VAR s = "a";
+    PRINT s;
+END
+IF c > 0 THEN
+    VAR s = 2;
+    PRINT s + 1;
+END
+FOR i = 1 TO 2 DO
+    VAR s = 1.5;
+    PRINT s * i;
+END
+END
+"""
+
+
+def analizar(fuente, plano=False):
+    ast = (ParserPlano if plano else Parser)(TokenBuffer(fuente)).parse()
+    analizador = SemanticAnalyzer()
+    analizador.analyze(ast)
+    return analizador
+
+
+@pytest.mark.parametrize('plano', [False, True])
+def test_tipos_por_declaracion(plano):
+    analizador = analizar(BLOQUES, plano)
+    assert analizador.variables() == [('c', 'int'), ('s', 'string'), ('s', 'int'), ('i', 'int'), ('s', 'double')]
+
+
+@pytest.mark.parametrize('opciones', [{}, {'plano': True}, {'optimizar': False}])
+def test_c_declara_cada_variable_con_su_tipo(opciones):
+    codigo = compilador.compile(BLOQUES, **opciones)
+    assert 'const char *s = "a";' in codigo
+    assert 'int s = 2;' in codigo
+    assert 'double s = 1.5;' in codigo
+
+
+def test_maquina_con_tipos_por_declaracion():
+    salida = io.StringIO()
+    ejecutar(BLOQUES, salida=salida)
+    assert salida.getvalue() == 'a\n3\n1.5\n3\n'
+
+
+@pytest.mark.parametrize('plano', [False, True])
+def test_tipos_incompatibles_en_la_misma_variable(plano):
+    with pytest.raises(SemanticError, match="Variable 's' con valores de tipos incompatibles"):
+        analizar('BEGIN\nVAR s = "a";\ns = 2;\nEND\n', plano)
+
+
+def test_variable_de_bucle_string():
+    with pytest.raises(SemanticError, match="Variable de bucle 'i' de tipo string"):
+        analizar('BEGIN\nVAR a = "x";\nFOR i = a TO a DO\nPRINT 1;\nEND\nEND\n')
+
+
+@pytest.mark.parametrize('plano', [False, True])
+def test_uso_repetido_se_anota_una_vez(plano):
+    # Si no, cada cambio del tipo de y evaluaría la asignación una vez por
+    # aparición y el análisis sería cuadrático en la longitud de la expresión
+    analizador = analizar('BEGIN\nVAR y = 1;\nVAR x = 1' + ' + y' * 1000 + ';\nPRINT x;\nEND\n', plano)
+    assert analizador.usos[0] == [1]
+    assert analizador.variables() == [('y', 'int'), ('x', 'int')]
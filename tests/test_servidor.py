@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from compilador.servidor import LIMITE_MENSAJE, ServidorCompilacion
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def conversar(*peticiones):
+    # Manda las peticiones por la entrada estándar y devuelve las respuestas
+    # por id (las que no tienen id quedan en la clave None, en orden)
+    entrada = ''.join((p if isinstance(p, str) else json.dumps(p)) + '\n' for p in peticiones)
+    proceso = subprocess.run([sys.executable, '-m', 'compilador.servidor'], input=entrada, capture_output=True,
+                             text=True, cwd=RAIZ, timeout=60)
+    assert proceso.returncode == 0, proceso.stderr
+    respuestas = {}
+    for linea in proceso.stdout.splitlines():
+        respuesta = json.loads(linea)
+        clave = respuesta['id'] if not isinstance(respuesta['id'], list) else 'lista'
+        respuestas.setdefault(clave, []).append(respuesta)
+    return respuestas
+
+
+def test_operaciones_y_latencia():
+    fuente = 'BEGIN\nVAR x = 2;\nPRINT x * 3;\nEND\n'
+    respuestas = conversar(
+        {'id': 1, 'op': 'tokenize', 'fuente': fuente},
+        {'id': 2, 'op': 'analyze', 'fuente': fuente},
+        {'id': 3, 'op': 'translate', 'fuente': fuente, 'opciones': {'perfil': True}},
+        {'id': 'p', 'op': 'parse', 'fuente': 'BEGIN END'},
+    )
+    assert respuestas[1][0]['resultado'][:2] == [['BEGIN', 'BEGIN', 1, 0], ['VAR', 'VAR', 2, 0]]
+    assert respuestas[2][0]['resultado'] == [['x', 'int']]
+    assert 'int main' in respuestas[3][0]['resultado']
+    assert 'translate' in respuestas[3][0]['perfil']['etapas']
+    assert respuestas['p'][0]['resultado'] == 'Programa([])'
+    assert all(r[0]['ok'] and r[0]['latencia_ms'] >= 0 for r in respuestas.values())
+
+
+def test_errores_del_programa():
+    respuestas = conversar(
+        {'id': 1, 'op': 'analyze', 'fuente': 'BEGIN\nx = 1;\nEND\n'},
+        {'id': 2, 'op': 'translate', 'fuente': 'BEGIN @ END'},
+    )
+    assert respuestas[1][0]['error']['tipo'] == 'SemanticError'
+    assert respuestas[1][0]['error']['linea'] == 2
+    assert respuestas[2][0]['error']['tipo'] == 'SyntaxError'
+
+
+def test_peticiones_mal_formadas_no_detienen_el_servidor():
+    respuestas = conversar(
+        '{no es json',
+        '[1, 2]',
+        {'id': [1], 'op': 'tokenize', 'fuente': 'BEGIN END'},
+        {'id': 5, 'op': 'cancel', 'objetivo': {'a': 1}},
+        {'id': 6, 'op': 'compilar', 'fuente': ''},
+        {'id': 7, 'op': 'parse'},
+        {'id': 8, 'op': 'cancel', 'objetivo': 99},
+        {'id': 9, 'op': 'parse', 'fuente': 'BEGIN END'},
+    )
+    assert len(respuestas[None]) == 2
+    assert respuestas['lista'][0]['error']['tipo'] == 'ErrorPeticion'
+    for id in (5, 6, 7):
+        assert respuestas[id][0]['ok'] is False
+        assert respuestas[id][0]['error']['tipo'] == 'ErrorPeticion'
+    assert respuestas[8][0] == {'id': 8, 'ok': True, 'cancelada': False}
+    assert respuestas[9][0]['ok']
+
+
+def test_cancelacion():
+    # Con un solo hilo, la segunda petición espera en el pool y la
+    # cancelación llega antes de que empiece
+    async def probar():
+        servidor = ServidorCompilacion(workers=1)
+        lector = asyncio.StreamReader(limit=LIMITE_MENSAJE)
+        salidas = []
+
+        class Escritor:
+            def write(self, datos):
+                salidas.append(json.loads(datos))
+
+            async def drain(self):
+                pass
+
+            def close(self):
+                pass
+
+        grande = 'BEGIN\n' + ''.join(f'VAR x{i} = {i} * 2;\n' for i in range(20000)) + 'END\n'
+        for peticion in ({'id': 1, 'op': 'translate', 'fuente': grande},
+                         {'id': 2, 'op': 'translate', 'fuente': 'BEGIN END'},
+                         {'id': 3, 'op': 'cancel', 'objetivo': 2}):
+            lector.feed_data(json.dumps(peticion).encode() + b'\n')
+        lector.feed_eof()
+        await servidor.atender(lector, Escritor())
+        servidor.cerrar()
+        return {salida['id']: salida for salida in salidas}
+
+    respuestas = asyncio.run(probar())
+    assert respuestas[1]['ok']
+    assert respuestas[2] == {'id': 2, 'ok': False, 'cancelada': True, 'latencia_ms': respuestas[2]['latencia_ms']}
+    assert respuestas[3]['cancelada'] is True
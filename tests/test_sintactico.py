@@ -0,0 +1,88 @@
+import io
+import sys
+
+import pytest
+
+import compilador
+from compilador.lexico import TokenBuffer, tokenize, tokenize_stream
+from compilador.maquina import ejecutar
+from compilador.sintactico import Parser
+
+FUENTE = """BEGIN
+VAR x = 1;
+VAR s = "a;b";
+IF x < 2 THEN
+    PRINT x + 2 * 3;
+ELSE
+    CALL f(x, 'c');
+END
+WHILE x < 10 DO
+    x = x + 1;
+END
+FOR i = 1 TO x DO
+    PRINT i;
+END
+END
+"""
+
+
+def test_parser_de_flujo_igual_que_de_lista():
+    # Los tokens se piden al generador según hacen falta
+    esperado = repr(Parser(tokenize(FUENTE)).parse())
+    assert repr(Parser(tokenize_stream(io.StringIO(FUENTE), 4)).parse()) == esperado
+    assert repr(Parser(TokenBuffer(FUENTE)).parse()) == esperado
+
+
+def test_parser_de_flujo_no_lee_de_mas():
+    leidos = []
+
+    def tokens():
+        for token in tokenize(FUENTE):
+            leidos.append(token)
+            yield token
+    instrucciones = Parser(tokens()).parse_stream()
+    primera = next(instrucciones)
+    assert type(primera).__name__ == 'Declaracion'
+    # Solo la primera instrucción y la ventana de anticipación
+    assert len(leidos) < 10
+    assert len(list(instrucciones)) == 4
+
+
+def test_parse_stream_igual_que_parse():
+    programa = Parser(tokenize(FUENTE)).parse()
+    instrucciones = list(Parser(tokenize_stream(io.StringIO(FUENTE))).parse_stream())
+    assert repr(instrucciones) == repr(programa.instrucciones)
+
+
+def test_error_de_sintaxis_en_flujo():
+    with pytest.raises(SyntaxError, match='Expected ID'):
+        Parser(tokenize_stream(io.StringIO('BEGIN\nVAR = 1;\nEND\n'))).parse()
+
+
+def test_anidamiento_mas_profundo_que_la_recursion():
+    # Más niveles que el límite de recursión de Python en todas las etapas
+    niveles = sys.getrecursionlimit() + 500
+    cabeceras = ['IF x < 1 THEN\n', 'WHILE x < 1 DO\n', 'FOR i = 1 TO 1 DO\n']
+    fuente = ('BEGIN\nVAR x = 0;\n' + ''.join(cabeceras[n % 3] for n in range(niveles)) + 'x = x + 1;\n' +
+              'END\n' * niveles + 'PRINT x;\nEND\n')
+    programa = Parser(TokenBuffer(fuente)).parse()
+    nodo, profundidad = programa.instrucciones[1], 0
+    while nodo is not None:
+        profundidad += 1
+        cuerpo = getattr(nodo, 'instrucciones', None) or getattr(nodo, 'instrucciones_then', None)
+        nodo = cuerpo[0] if cuerpo and type(cuerpo[0]).__name__ != 'Asignacion' else None
+    assert profundidad == niveles
+    codigo = compilador.compile(fuente)
+    assert codigo == compilador.compile(fuente, plano=True)
+    assert '    ' * niveles + '    x = (x + 1);\n' in codigo
+    salida = io.StringIO()
+    ejecutar(fuente, salida=salida)
+    assert salida.getvalue() == '1\n'
+
+
+def test_expresion_muy_larga():
+    fuente = 'BEGIN\nVAR y = 1;\nVAR x = 1' + ' + y' * 20000 + ';\nPRINT x;\nEND\n'
+    assert compilador.compile(fuente).count(' + y') == 20000
+    salida = io.StringIO()
+    ejecutar(fuente, salida=salida)
+    assert salida.getvalue() == '20001\n'
@@ -0,0 +1,140 @@
+import io
+
+import pytest
+
+import compilador
+from compilador.__main__ import main
+from compilador.lexico import TokenBuffer
+from compilador.semantico import SemanticAnalyzer
+from compilador.sintactico import Parser
+from compilador.traductor import ASTToCTranslator, EscritorC, repartir
+
+FUENTE = """BEGIN
+VAR n = 0;
+VAR total = 0.5;
+WHILE n < 3 DO
+    n = n + 1;
+    IF n != 2 THEN
+        PRINT n;
+    ELSE
+        PRINT "dos";
+    END
+END
+FOR i = 1 TO n DO
+    total = total + i;
+    CALL f(i, 'c');
+END
+PRINT total;
+END
+"""
+
+
+def analizado(fuente):
+    ast = Parser(TokenBuffer(fuente)).parse()
+    analizador = SemanticAnalyzer()
+    analizador.analyze(ast)
+    return ast, analizador.tipos
+
+
+class SalidaContada(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.escrituras = []
+
+    def write(self, texto):
+        self.escrituras.append(len(texto))
+        return super().write(texto)
+
+
+def test_escritor_agrupa_las_escrituras():
+    salida = SalidaContada()
+    escritor = EscritorC(salida, tamano_buffer=100)
+    for i in range(1000):
+        escritor.nivel = i % 3
+        escritor.linea(f'x{i};')
+    escritor.vaciar()
+    assert salida.getvalue() == ''.join(f"{'    ' * (i % 3)}x{i};\n" for i in range(1000))
+    # Cada escritura junta varias líneas y ninguna supera mucho el búfer
+    assert len(salida.escrituras) < 1000 // 5
+    assert max(salida.escrituras) < 100 + 20
+
+
+def test_translate_to_igual_que_translate():
+    fuente = FUENTE.replace('BEGIN\n', 'BEGIN\n' + 'PRINT 1 + 2 * 3;\n' * 5000, 1)
+    ast, tipos = analizado(fuente)
+    salida = SalidaContada()
+    ASTToCTranslator(ast, tipos).translate_to(salida)
+    assert salida.getvalue() == ASTToCTranslator(ast, tipos).translate()
+    assert len(salida.escrituras) > 1
+    assert salida.getvalue().rstrip().endswith('return 0;\n}')
+
+
+def test_bloques_sangrados():
+    codigo = compilador.compile(FUENTE, optimizar=False)
+    assert '    while (n < 3) {\n        n = (n + 1);\n        if (n != 2) {\n            _rt_imprimir_int(n);\n' \
+        '        } else {\n            _rt_imprimir_cadena("dos");\n        }\n    }\n' in codigo
+    assert '    for (int i = 1; i <= n; i++) {\n        total = (total + i);\n        f(i, \'c\');\n    }\n' in codigo
+
+
+def test_tipos_en_c():
+    fuente = """BEGIN
+VAR a = 1;
+VAR b = 1.5;
+VAR c = 'x';
+VAR d = "hola";
+VAR e = c + 1;
+VAR g = a + b;
+VAR h = a / 2;
+VAR w = 1;
+w = w + 2.5;
+PRINT c;
+PRINT h * 2.0;
+PRINT d;
+PRINT e;
+END
+"""
+    codigo = compilador.compile(fuente, optimizar=False)
+    # char se promociona a int en la aritmética y int a double
+    for declaracion in ('int a = 1;', 'double b = 1.5;', "char c = 'x';", 'const char *d = "hola";',
+                        'int e = (c + 1);', 'double g = (a + b);', 'int h = (a / 2);', 'double w = 1;'):
+        assert f'    {declaracion}\n' in codigo
+    assert '    _rt_imprimir_char(c);\n    _rt_imprimir_double((h * 2.0));\n' \
+        '    _rt_imprimir_cadena(d);\n    _rt_imprimir_int(e);\n' in codigo
+
+
+def test_impresion_por_el_entorno():
+    codigo = compilador.compile(FUENTE)
+    assert codigo.count('static char _rt_salida[') == 1
+    assert 'printf(' not in codigo.split('int main', 1)[1]
+    assert codigo.rstrip().endswith('    _rt_vaciar();\n    return 0;\n}')
+
+
+@pytest.mark.parametrize('partes', [1, 3, 16, 1000])
+def test_translate_paralelo_igual_que_translate_to(generar, partes):
+    ast, tipos = analizado(generar(400, semilla=partes))
+    esperado = ASTToCTranslator(ast, tipos).translate()
+    salida = io.StringIO()
+    ASTToCTranslator(ast, tipos).translate_paralelo(salida, workers=2, partes=partes)
+    assert salida.getvalue() == esperado
+    # Sin tipos, los calcula él
+    salida = io.StringIO()
+    ASTToCTranslator(ast).translate_paralelo(salida, workers=2, partes=partes)
+    assert salida.getvalue() == esperado
+
+
+def test_repartir():
+    ast, _ = analizado(FUENTE)
+    instrucciones = ast.instrucciones
+    for partes in range(1, 8):
+        grupos = repartir(instrucciones, partes)
+        assert len(grupos) <= partes
+        assert [i for inicio, fin in grupos for i in range(inicio, fin)] == list(range(len(instrucciones)))
+    assert repartir([], 4) == []
+
+
+def test_cli_workers(tmp_path, capsys, generar):
+    archivo = tmp_path / 'programa.txt'
+    fuente = generar(200)
+    archivo.write_text(fuente)
+    assert main([str(archivo), '-j', '2']) == 0
+    assert capsys.readouterr().out == compilador.compile(fuente)
@@ -0,0 +1,81 @@
+import io
+
+import pytest
+
+from compilador.maquina import ErrorEjecucion, ejecutar
+from compilador.vectorial import ejecutar_vectorial
+
+np = pytest.importorskip('numpy')
+
+FUENTE = """BEGIN
+VAR x = 0;
+VAR tasa = 0.0;
+VAR c = 'a';
+VAR pasos = 0;
+WHILE x > 1 DO
+    IF x / 2 * 2 < x THEN
+        x = 3 * x + 1;
+    ELSE
+        x = x / 2;
+    END
+    pasos = pasos + 1;
+END
+VAR capital = 100.0;
+FOR anio = 1 TO pasos DO
+    capital = capital + capital * tasa;
+    IF anio >= pasos THEN
+        PRINT capital;
+    END
+END
+PRINT pasos;
+IF pasos > 10 THEN
+    VAR etiqueta = "largo";
+    PRINT etiqueta;
+    PRINT c + 1;
+ELSE
+    PRINT c;
+END
+x = 2147483647 + pasos;
+PRINT x;
+END
+"""
+
+
+def salida_maquina(iniciales):
+    fuente = FUENTE
+    for nombre, valor in iniciales.items():
+        inicial = {'x': 'VAR x = 0;', 'tasa': 'VAR tasa = 0.0;', 'c': "VAR c = 'a';"}[nombre]
+        fuente = fuente.replace(inicial, f'VAR {nombre} = {valor};')
+    salida = io.StringIO()
+    ejecutar(fuente, salida=salida)
+    return salida.getvalue()
+
+
+@pytest.mark.parametrize('optimizar', [True, False])
+def test_cada_carril_igual_que_la_maquina(optimizar):
+    xs = [1, 2, 3, 6, 7, 27, 97, 0]
+    tasas = [0.5, 0.01, 0.25, 1.0, 0.0, 0.001, 0.1, 2.0]
+    caracteres = [ord(c) for c in 'abcdefgh']
+    resultado = ejecutar_vectorial(FUENTE, {'x': xs, 'tasa': np.array(tasas), 'c': caracteres},
+                                   optimizar=optimizar)
+    assert resultado.n == len(xs)
+    salidas = resultado.salidas()
+    for carril, (x, tasa, c) in enumerate(zip(xs, tasas, caracteres)):
+        esperada = salida_maquina({'x': x, 'tasa': tasa, 'c': repr(chr(c))})
+        assert salidas[carril] == resultado.salida(carril) == esperada
+    pasos = resultado.variables['pasos']
+    assert pasos.dtype == np.int32
+    assert pasos.tolist() == [0, 1, 7, 8, 16, 111, 118, 0]
+    assert resultado.variables['x'].tolist() == [(2147483647 + p + 2 ** 31) % 2 ** 32 - 2 ** 31 for p in pasos.tolist()]
+
+
+def test_valor_comun_y_errores():
+    fuente = 'BEGIN\nVAR x = 1;\nVAR y = 0;\nIF x > 2 THEN\n    PRINT 10 / y;\nEND\nPRINT x;\nEND\n'
+    # Un valor escalar vale para todos los carriles
+    assert ejecutar_vectorial(fuente, {'x': 3, 'y': 5}, n=2).salidas() == ['2\n3\n', '2\n3\n']
+    with pytest.raises(ValueError):
+        ejecutar_vectorial(fuente, {'x': 3})
+    # La división solo falla si algún carril la ejecuta
+    assert ejecutar_vectorial(fuente, {'x': [1, 2]}).salidas() == ['1\n', '2\n']
+    with pytest.raises(ErrorEjecucion, match='línea 5'):
+        ejecutar_vectorial(fuente, {'x': [1, 3]})